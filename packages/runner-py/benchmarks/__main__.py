@@ -0,0 +1,104 @@
+"""
+Micro-benchmarks of the runtime primitives of the runner.
+
+    python -m benchmarks [--filter NAME] [--save FILE] [--compare FILE]
+
+Run from the root of the package. Every benchmark reports its throughput, the
+median and 99th percentile latency per message, and its peak memory usage.
+With `--compare`, the exit code is non-zero if the throughput of any
+benchmark dropped by more than the threshold relative to the baseline.
+"""
+
+import argparse
+import asyncio
+import functools
+import sys
+
+from . import harness, workloads
+
+# Benchmarks, the largest message size they are run with (zero if they do not
+# depend on it), and the fraction of the message count they process.
+BENCHMARKS = {
+    "channel": (workloads.channel, sys.maxsize, 1),
+    "channel_batch": (workloads.channel_batch, sys.maxsize, 1),
+    "callback_channel": (workloads.callback_channel, sys.maxsize, 1),
+    "dictionary_arguments": (workloads.dictionary_arguments, 0, 1),
+    "grpc_arguments": (workloads.grpc_arguments, 0, 1),
+    "channel_message": (workloads.channel_message, sys.maxsize, 1),
+    "template": (workloads.template, sys.maxsize, 1),
+    "shacl_validator": (workloads.shacl_validator, 16384, 0.01),
+    "shacl_validator_turtle": (workloads.shacl_validator_turtle, 16384, 0.01),
+    "shacl_validator_graph": (workloads.shacl_validator_graph, 16384, 0.01),
+}
+
+for codec, content_type in workloads.CODECS.items():
+    for operation in (workloads.codec_encode, workloads.codec_decode):
+        name = f"codec_{codec}_{operation.__name__.removeprefix('codec_')}"
+        workload = functools.partial(operation, content_type=content_type)
+        BENCHMARKS[name] = (workload, 16384, 0.01)
+
+
+async def run(args: argparse.Namespace) -> list[harness.Result]:
+    results = []
+
+    for name, (workload, max_size, fraction) in BENCHMARKS.items():
+        if args.filter and args.filter not in name:
+            continue
+
+        count = max(1, int(args.count * fraction))
+        sizes = [size for size in args.sizes if size <= max_size] if max_size else [0]
+        for size in sizes:
+            try:
+                result = await harness.measure(name, size, count, workload)
+            except ImportError as exception:
+                print(f"Skipping {name}: {exception}", file=sys.stderr)
+                break
+            results.append(result)
+
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--filter", help="only run benchmarks containing this name")
+    parser.add_argument("--count", type=int, default=10000, help="messages per run")
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=[64, 4096, 65536],
+        help="comma separated message sizes in bytes",
+    )
+    parser.add_argument("--save", metavar="FILE", help="store the results as baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative drop in throughput which counts as a regression",
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    harness.report(results)
+
+    codecs = [result for result in results if result.name.startswith("codec_")]
+    if codecs:
+        workloads.codec_sizes(sorted({result.size for result in codecs}))
+
+    if args.save:
+        harness.save(results, args.save)
+
+    if args.compare:
+        print()
+        regressions = harness.compare(
+            results, harness.load(args.compare), args.threshold
+        )
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
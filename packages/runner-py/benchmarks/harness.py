@@ -0,0 +1,113 @@
+import gc
+import json
+import time
+import tracemalloc
+from typing import Awaitable, Callable, List, NamedTuple
+
+# A workload processes `count` messages of `size` bytes, and appends the
+# latency of every message in nanoseconds to the given list.
+Workload = Callable[[int, int, List[int]], Awaitable[None]]
+
+
+class Result(NamedTuple):
+    name: str
+    size: int
+    count: int
+    seconds: float
+    throughput: float
+    p50: float
+    p99: float
+    peak_memory: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}[{self.size}]"
+
+
+def percentile(values: List[int], fraction: float) -> float:
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def measure(name: str, size: int, count: int, workload: Workload) -> Result:
+    # Warm up caches and lazily initialized state.
+    await workload(size, max(1, count // 10), [])
+
+    # Timed run, without the overhead of tracing allocations.
+    latencies: List[int] = []
+    gc.collect()
+    start = time.perf_counter()
+    await workload(size, count, latencies)
+    seconds = time.perf_counter() - start
+
+    # Separate run to measure the peak memory of the workload itself.
+    gc.collect()
+    tracemalloc.start()
+    await workload(size, count, [])
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return Result(
+        name=name,
+        size=size,
+        count=count,
+        seconds=seconds,
+        throughput=count / seconds,
+        p50=percentile(latencies, 0.50) / 1000,
+        p99=percentile(latencies, 0.99) / 1000,
+        peak_memory=peak_memory,
+    )
+
+
+def save(results: List[Result], path: str) -> None:
+    with open(path, "w") as file:
+        json.dump({result.key: result._asdict() for result in results}, file, indent=2)
+
+
+def load(path: str) -> dict[str, Result]:
+    with open(path) as file:
+        return {key: Result(**value) for key, value in json.load(file).items()}
+
+
+def report(results: List[Result]) -> None:
+    print(
+        f"{'benchmark':<32} {'msgs/s':>12} {'p50 (us)':>10} {'p99 (us)':>10} {'peak (KiB)':>11}"
+    )
+    for result in results:
+        print(
+            f"{result.key:<32} {result.throughput:>12.0f} {result.p50:>10.1f} "
+            f"{result.p99:>10.1f} {result.peak_memory / 1024:>11.1f}"
+        )
+
+
+def compare(
+    results: List[Result], baseline: dict[str, Result], threshold: float
+) -> List[str]:
+    """
+    Print the change of every benchmark relative to the baseline, and return
+    those of which the throughput dropped by more than `threshold`.
+    """
+    regressions = []
+    print(f"{'benchmark':<32} {'msgs/s':>10} {'p99':>10} {'peak':>10}")
+
+    for result in results:
+        previous = baseline.get(result.key)
+        if previous is None:
+            print(f"{result.key:<32} {'new':>10}")
+            continue
+
+        def change(new: float, old: float) -> str:
+            return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+        print(
+            f"{result.key:<32} {change(result.throughput, previous.throughput):>10} "
+            f"{change(result.p99, previous.p99):>10} "
+            f"{change(result.peak_memory, previous.peak_memory):>10}"
+        )
+
+        if result.throughput < previous.throughput * (1 - threshold):
+            regressions.append(result.key)
+
+    return regressions
@@ -0,0 +1,296 @@
+import asyncio
+import collections
+import os
+import sys
+import tempfile
+import time
+from typing import Iterable, List
+
+import rdfc
+import rdfc.util
+
+# The processors live in sibling packages, which are used from source if they
+# are not installed.
+PACKAGES = os.path.join(os.path.dirname(__file__), "..", "..")
+for package in ("template-py", "shacl-validator-py"):
+    sys.path.append(os.path.join(PACKAGES, package, "src"))
+
+
+async def channel(size: int, count: int, latencies: List[int]) -> None:
+    """Messages passed from one task to another through a channel."""
+    channel = rdfc.util.Channel("channel", capacity=64)
+    message = os.urandom(size)
+    started: collections.deque[int] = collections.deque()
+
+    async def produce():
+        for _ in range(count):
+            started.append(time.perf_counter_ns())
+            await channel.write(message)
+        await channel.close()
+
+    producer = asyncio.create_task(produce())
+    async for _ in channel:
+        latencies.append(time.perf_counter_ns() - started.popleft())
+    await producer
+
+
+async def channel_batch(size: int, count: int, latencies: List[int]) -> None:
+    """Messages passed through a channel in batches of up to 64 messages."""
+    channel = rdfc.util.Channel("channel", capacity=64)
+    message = os.urandom(size)
+    started: collections.deque[int] = collections.deque()
+
+    async def produce():
+        for offset in range(0, count, 64):
+            batch = min(64, count - offset)
+            started.extend([time.perf_counter_ns()] * batch)
+            await channel.write_many([message] * batch)
+        await channel.close()
+
+    producer = asyncio.create_task(produce())
+    while batch := await channel.read_batch(64):
+        now = time.perf_counter_ns()
+        latencies.extend(now - started.popleft() for _ in batch)
+    await producer
+
+
+async def callback_channel(size: int, count: int, latencies: List[int]) -> None:
+    """Writes to a channel which hands messages to a callback."""
+    received = []
+
+    async def on_write(data: bytes) -> None:
+        received.append(data)
+
+    async def on_close() -> None:
+        pass
+
+    channel = rdfc.util.CallbackChannel(on_write, on_close)
+    message = os.urandom(size)
+
+    for _ in range(count):
+        start = time.perf_counter_ns()
+        await channel.write(message)
+        latencies.append(time.perf_counter_ns() - start)
+    await channel.close()
+
+
+async def dictionary_arguments(size: int, count: int, latencies: List[int]) -> None:
+    """Lookups of a reader, a string and an integer argument."""
+    args = rdfc.util.DictionaryArguments(
+        {"incoming": rdfc.util.Channel("incoming"), "name": "value", "number": 42}
+    )
+
+    for _ in range(count):
+        start = time.perf_counter_ns()
+        args.reader("incoming")
+        args.string("name")
+        args.int("number")
+        latencies.append(time.perf_counter_ns() - start)
+
+
+async def grpc_arguments(size: int, count: int, latencies: List[int]) -> None:
+    """Lookups of a string and an integer argument of a serialized stage."""
+    from rdfc.grpc import Arguments
+    from rdfc.proto.intermediate_pb2 import Stage
+
+    stage = Stage()
+    stage.arguments["name"].literal.string = "value"
+    stage.arguments["number"].literal.int32 = 42
+    args = Arguments(stage.arguments, None)
+
+    for _ in range(count):
+        start = time.perf_counter_ns()
+        args.string("name")
+        args.int("number")
+        latencies.append(time.perf_counter_ns() - start)
+
+
+async def channel_message(size: int, count: int, latencies: List[int]) -> None:
+    """Construction, serialization and parsing of channel messages."""
+    from rdfc.proto.channel_pb2 import ChannelMessage, ChannelMessageType
+
+    data = os.urandom(size)
+
+    for _ in range(count):
+        start = time.perf_counter_ns()
+        message = ChannelMessage()
+        message.channel.uri = "http://example.com/channel"
+        message.type = ChannelMessageType.DATA
+        message.data.bytes = data
+        ChannelMessage.FromString(message.SerializeToString())
+        latencies.append(time.perf_counter_ns() - start)
+
+
+async def processor(
+    instance: rdfc.Processor,
+    incoming: rdfc.util.Channel,
+    outgoing: rdfc.util.Channel,
+    messages: Iterable[bytes | rdfc.ObjectMessage],
+    latencies: List[int],
+) -> None:
+    """Feed messages through a processor, and time each from input to output."""
+    started: collections.deque[int] = collections.deque()
+
+    async def produce():
+        for message in messages:
+            started.append(time.perf_counter_ns())
+            if isinstance(message, rdfc.ObjectMessage):
+                await incoming.write_object(message)
+            else:
+                await incoming.write(message)
+        await incoming.close()
+
+    producer = asyncio.create_task(produce())
+    execution = asyncio.create_task(instance.exec())
+    async for _ in outgoing:
+        latencies.append(time.perf_counter_ns() - started.popleft())
+    await asyncio.gather(producer, execution)
+
+
+async def template(size: int, count: int, latencies: List[int]) -> None:
+    """The pass-through template processor."""
+    from rdfc_template import Template
+
+    incoming = rdfc.util.Channel("incoming", capacity=64)
+    outgoing = rdfc.util.Channel("outgoing", capacity=64)
+    args = rdfc.util.DictionaryArguments({"incoming": incoming, "outgoing": outgoing})
+
+    message = os.urandom(size)
+    await processor(Template(args), incoming, outgoing, [message] * count, latencies)
+
+
+SHAPES = b"""
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+@prefix ex: <http://example.com/> .
+
+ex:PointShape a sh:NodeShape ;
+    sh:targetClass ex:Point ;
+    sh:property [ sh:path ex:x ; sh:datatype xsd:integer ; sh:minCount 1 ] ;
+    sh:property [ sh:path ex:y ; sh:datatype xsd:integer ; sh:minCount 1 ] .
+"""
+
+
+def points(size: int, index: int) -> bytes:
+    """A Turtle document of roughly `size` bytes which conforms to `SHAPES`."""
+    lines = ["@prefix ex: <http://example.com/> ."]
+    point = 0
+    while sum(len(line) for line in lines) < size:
+        lines.append(f"ex:p{index}_{point} a ex:Point ; ex:x {point} ; ex:y {index} .")
+        point += 1
+    return "\n".join(lines).encode()
+
+
+def shacl_instance(incoming: rdfc.util.Channel, outgoing: rdfc.util.Channel):
+    from rdfc_shacl import SHACLValidator
+
+    report = rdfc.util.Channel("report")
+    with tempfile.NamedTemporaryFile(suffix=".ttl") as shapes:
+        shapes.write(SHAPES)
+        shapes.flush()
+        args = rdfc.util.DictionaryArguments(
+            {
+                "incoming": incoming,
+                "outgoing": outgoing,
+                "report": report,
+                "shapes": shapes.name,
+            }
+        )
+        return SHACLValidator(args)
+
+
+async def shacl_validator(size: int, count: int, latencies: List[int]) -> None:
+    """Validation of distinct conforming messages against a small shape."""
+    incoming = rdfc.util.Channel("incoming", capacity=64)
+    outgoing = rdfc.util.Channel("outgoing", capacity=64)
+    instance = shacl_instance(incoming, outgoing)
+
+    messages = [points(size, index) for index in range(count)]
+    await processor(instance, incoming, outgoing, messages, latencies)
+
+
+async def shacl_graphs(
+    size: int, count: int, latencies: List[int], objects: bool
+) -> None:
+    """Graphs built by an upstream stage, passed on as Turtle or as objects."""
+    import rdflib
+    from rdfc_shacl.validator import turtle
+
+    incoming = rdfc.util.Channel("incoming", capacity=64)
+    outgoing = rdfc.util.Channel("outgoing", capacity=64)
+    instance = shacl_instance(incoming, outgoing)
+
+    def messages():
+        for index in range(count):
+            graph = rdflib.Graph().parse(data=points(size, index), format="turtle")
+            if objects:
+                yield rdfc.ObjectMessage(graph, turtle)
+            else:
+                yield turtle(graph)
+
+    await processor(instance, incoming, outgoing, messages(), latencies)
+
+
+async def shacl_validator_turtle(size: int, count: int, latencies: List[int]) -> None:
+    await shacl_graphs(size, count, latencies, objects=False)
+
+
+async def shacl_validator_graph(size: int, count: int, latencies: List[int]) -> None:
+    await shacl_graphs(size, count, latencies, objects=True)
+
+
+# Content types of the RDF codecs which are compared with each other.
+CODECS = {
+    "turtle": "text/turtle",
+    "ntriples": "application/n-triples",
+    "binary": "application/x-rdfc-binary",
+}
+
+
+def graphs(size: int, count: int) -> list:
+    """Distinct graphs of roughly `size` bytes of Turtle, at most 64 of them."""
+    import rdflib
+
+    return [
+        rdflib.Graph().parse(data=points(size, index), format="turtle")
+        for index in range(min(count, 64))
+    ]
+
+
+async def codec_encode(
+    size: int, count: int, latencies: List[int], content_type: str
+) -> None:
+    """Serialization of graphs with the codec of a content type."""
+    codec = rdfc.util.find_codec(content_type)
+    inputs = graphs(size, count)
+
+    for index in range(count):
+        start = time.perf_counter_ns()
+        codec.encode(inputs[index % len(inputs)])
+        latencies.append(time.perf_counter_ns() - start)
+
+
+async def codec_decode(
+    size: int, count: int, latencies: List[int], content_type: str
+) -> None:
+    """Parsing of graphs with the codec of a content type."""
+    codec = rdfc.util.find_codec(content_type)
+    payloads = [codec.encode(graph) for graph in graphs(size, count)]
+
+    for index in range(count):
+        start = time.perf_counter_ns()
+        codec.decode(payloads[index % len(payloads)])
+        latencies.append(time.perf_counter_ns() - start)
+
+
+def codec_sizes(sizes: Iterable[int]) -> None:
+    """Print the encoded size of the same graphs with every codec."""
+    print()
+    print(f"{'encoded size':<24}" + "".join(f"{name:>12}" for name in CODECS))
+    for size in sizes:
+        graph = graphs(size, 1)[0]
+        encoded = [
+            len(rdfc.util.find_codec(content_type).encode(graph))
+            for content_type in CODECS.values()
+        ]
+        print(f"{f'[{size}]':<24}" + "".join(f"{length:>12}" for length in encoded))
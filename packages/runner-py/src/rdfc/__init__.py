@@ -1,7 +1,15 @@
 import asyncio
 import pathlib
 import sys
-from rdfc.runtime import Reader, Writer, Processor, Arguments
+from rdfc.runtime import (
+    Reader,
+    Writer,
+    Processor,
+    SyncProcessor,
+    Arguments,
+    Buffer,
+    ObjectMessage,
+)
 
 
 def main():
@@ -16,12 +24,27 @@ def main():
 
         await rdfc.grpc.Server.launch()
 
-    asyncio.run(async_main())
+    # The event loop may be replaced by uvloop, which is optional.
+    from rdfc.grpc.config import Config
+
+    run = asyncio.run
+    if Config.from_env().uvloop:
+        try:
+            import uvloop
+
+            run = uvloop.run
+        except ImportError:
+            print("uvloop is not installed, using the default event loop.")
+
+    run(async_main())
 
 
 __all__ = [
     "Reader",
     "Writer",
     "Processor",
+    "SyncProcessor",
     "Arguments",
+    "Buffer",
+    "ObjectMessage",
 ]
@@ -1,4 +1,6 @@
 from .arguments import Arguments
+from .config import Config
+from .metrics import Metrics
 from .server import Server
 
-__all__ = ["Arguments", "Server"]
+__all__ = ["Arguments", "Config", "Metrics", "Server"]
@@ -81,3 +81,12 @@ class Arguments(rdfc.Arguments):
             raise Exception(f"Argument {key} is not a reader.")
 
         return self.repository.create_reader(result.uri)
+
+    def stream_reader(self, key: str) -> rdfc.runtime.StreamReader:
+        literal = self._literal(key)
+        result = literal.reader
+
+        if result is None:
+            raise Exception(f"Argument {key} is not a reader.")
+
+        return self.repository.create_stream_reader(result.uri)
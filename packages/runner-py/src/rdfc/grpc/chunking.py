@@ -0,0 +1,108 @@
+import random
+import struct
+from typing import Iterator
+
+import rdfc
+
+# Every chunk is prefixed by the message identifier, the sequence number of the
+# chunk within the message, and a flag which marks the final chunk.
+HEADER = struct.Struct("!QIB")
+LAST = 0x01
+
+
+class ChunkException(Exception):
+    pass
+
+
+class Chunker:
+    """
+    Splits the messages of a single writer into frames of at most `chunk_size`
+    bytes of payload. Messages are identified by a random writer prefix and a
+    counter, since the orchestrator may interleave the chunks of several
+    writers on the same channel.
+    """
+
+    chunk_size: int
+    prefix: int
+    counter: int
+
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+        self.prefix = random.getrandbits(32) << 32
+        self.counter = 0
+
+    def split(self, data: bytes) -> Iterator[bytes]:
+        message_id = self.prefix | self.counter
+        self.counter = (self.counter + 1) & 0xFFFFFFFF
+
+        view = memoryview(data)
+        count = max(1, -(-len(view) // self.chunk_size))
+        for sequence in range(count):
+            start = sequence * self.chunk_size
+            flags = LAST if sequence == count - 1 else 0
+            header = HEADER.pack(message_id, sequence, flags)
+            yield header + view[start : start + self.chunk_size]
+
+
+def parse(frame: bytes) -> tuple[int, int, bool, memoryview]:
+    """
+    Returns the message identifier, sequence number, final flag and payload of
+    a frame. The payload is a view on the frame rather than a copy.
+    """
+    if len(frame) < HEADER.size:
+        raise ChunkException("Frame is shorter than the chunk header.")
+
+    message_id, sequence, flags = HEADER.unpack_from(frame)
+    return message_id, sequence, bool(flags & LAST), memoryview(frame)[HEADER.size :]
+
+
+class Reassembler:
+    """
+    Validates the order of the chunks of a single channel, and collects the
+    payloads of partially received messages which must be delivered as a
+    whole.
+    """
+
+    # The next expected sequence number by message identifier.
+    expected: dict[int, int]
+
+    # The received payloads by message identifier.
+    partial: dict[int, list[rdfc.Buffer]]
+
+    def __init__(self):
+        self.expected = dict()
+        self.partial = dict()
+
+    def feed(
+        self,
+        message_id: int,
+        sequence: int,
+        last: bool,
+        payload: rdfc.Buffer,
+        keep: bool,
+    ) -> rdfc.Buffer | None:
+        """
+        Register a chunk. If `keep` is set, the payload is retained and the full
+        message is returned once the final chunk arrives.
+        """
+        expected = self.expected.pop(message_id, 0)
+        if sequence != expected:
+            raise ChunkException(
+                f"Expected chunk {expected} of message {message_id}, got {sequence}."
+            )
+
+        if not last:
+            self.expected[message_id] = expected + 1
+            if keep:
+                self.partial.setdefault(message_id, []).append(payload)
+            return None
+
+        if not keep:
+            return None
+
+        chunks = self.partial.pop(message_id, None)
+        if chunks is None:
+            # A message of a single chunk is passed on without copying.
+            return payload
+        chunks.append(payload)
+        return b"".join(chunks)
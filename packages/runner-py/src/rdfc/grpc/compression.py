@@ -0,0 +1,129 @@
+import gzip
+import time
+import zlib
+from typing import Any
+
+import grpc
+import rdfc
+
+# Compressed payloads start with a single byte which identifies the algorithm,
+# so that payloads below the threshold can be passed on as is.
+RAW = 0
+DEFLATE = 1
+GZIP = 2
+ZSTD = 3
+
+ALGORITHMS = {"deflate": DEFLATE, "gzip": GZIP, "zstd": ZSTD}
+
+# Levels used if none is given. Deflate and gzip share an implementation, and
+# hence the same trade-off between speed and ratio.
+DEFAULT_LEVELS = {DEFLATE: 6, GZIP: 6, ZSTD: 3}
+
+# Compression of the gRPC stream, by configuration value.
+GRPC_COMPRESSION = {
+    "none": grpc.Compression.NoCompression,
+    "deflate": grpc.Compression.Deflate,
+    "gzip": grpc.Compression.Gzip,
+}
+
+
+class CompressionException(Exception):
+    pass
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise CompressionException(
+            "Compression with zstd requires the `zstandard` package."
+        )
+    return zstandard
+
+
+class Compressor:
+    """
+    Compresses the payloads of a channel, and keeps track of the achieved ratio
+    and the time spent on it.
+    """
+
+    # One of the algorithms above, and its level, see `DEFAULT_LEVELS`.
+    algorithm: int
+    level: int
+
+    # Payloads smaller than this are not compressed.
+    threshold: int
+
+    # Bytes before and after compression, and the seconds spent either way.
+    raw_bytes: int
+    compressed_bytes: int
+    compress_seconds: float
+    decompress_seconds: float
+
+    # Instances of the optional `zstandard` package, if used.
+    zstd_compressor: Any
+    zstd_decompressor: Any
+
+    def __init__(self, algorithm: str, level: int = -1, threshold: int = 1024):
+        if algorithm not in ALGORITHMS:
+            raise CompressionException(f"Unknown compression algorithm: {algorithm}")
+
+        self.algorithm = ALGORITHMS[algorithm]
+        self.level = level if level >= 0 else DEFAULT_LEVELS[self.algorithm]
+        self.threshold = threshold
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self.compress_seconds = 0
+        self.decompress_seconds = 0
+        self.zstd_compressor = None
+        self.zstd_decompressor = None
+
+        if self.algorithm == ZSTD:
+            zstandard = _zstd()
+            self.zstd_compressor = zstandard.ZstdCompressor(level=self.level)
+            self.zstd_decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data: rdfc.Buffer) -> bytes:
+        if len(data) < self.threshold:
+            return bytes([RAW]) + data
+
+        start = time.perf_counter()
+        if self.algorithm == DEFLATE:
+            result = zlib.compress(data, self.level)
+        elif self.algorithm == GZIP:
+            result = gzip.compress(data, self.level, mtime=0)
+        else:
+            result = self.zstd_compressor.compress(data)
+        self.compress_seconds += time.perf_counter() - start
+
+        self.raw_bytes += len(data)
+        self.compressed_bytes += len(result)
+        return bytes([self.algorithm]) + result
+
+    def decompress(self, frame: rdfc.Buffer) -> rdfc.Buffer:
+        if not frame:
+            raise CompressionException("Compressed payload without header.")
+
+        algorithm = frame[0]
+        payload = memoryview(frame)[1:]
+        if algorithm == RAW:
+            return payload
+
+        start = time.perf_counter()
+        if algorithm == DEFLATE:
+            result = zlib.decompress(payload)
+        elif algorithm == GZIP:
+            result = gzip.decompress(payload)
+        elif algorithm == ZSTD:
+            if self.zstd_decompressor is None:
+                self.zstd_decompressor = _zstd().ZstdDecompressor()
+            result = self.zstd_decompressor.decompress(payload)
+        else:
+            raise CompressionException(f"Unknown compression header: {algorithm}")
+        self.decompress_seconds += time.perf_counter() - start
+
+        return result
+
+    def ratio(self) -> float:
+        """Size of the compressed payloads relative to the original ones."""
+        return self.compressed_bytes / self.raw_bytes if self.raw_bytes else 1.0
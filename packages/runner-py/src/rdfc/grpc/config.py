@@ -0,0 +1,307 @@
+import json
+import os
+from typing import Any, List, Mapping
+
+import rdfc.util
+from .compression import GRPC_COMPRESSION, CompressionException
+
+
+def _flag(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class Config:
+    """
+    Runtime configuration of the gRPC server. Every field can be set through an
+    environment variable with the `RDFC_` prefix, since the runner process is
+    spawned by the orchestrator with a fixed set of command line arguments.
+    """
+
+    # Maximum number of messages buffered per reader, zero for unbounded.
+    channel_capacity: int
+
+    # Maximum number of bytes buffered per reader, zero for unbounded.
+    channel_byte_budget: int
+
+    # Overrides of the two limits above, by channel URI.
+    channel_limits: dict[str, tuple[int, int]]
+
+    # Limits of the queue of messages bound for the orchestrator.
+    outgoing_capacity: int
+    outgoing_byte_budget: int
+
+    # Upper bounds on the number of messages and bytes pushed to the
+    # orchestrator in a single step of the outgoing message pump, or handed to
+    # the readers of a channel at once.
+    batch_max_messages: int
+    batch_max_bytes: int
+
+    # Seconds to wait for an incomplete batch to fill up, zero to push
+    # whatever is queued right away.
+    batch_linger: float
+
+    # Readers of these channels, and the outgoing queue if `spill_outgoing` is
+    # set, write messages beyond their limits to segment files in
+    # `spill_directory` instead of suspending the writer. At most `spill_limit`
+    # bytes are spilled per queue, zero for unbounded.
+    spill_channels: set[str]
+    spill_outgoing: bool
+    spill_directory: str | None
+    spill_segment_size: int
+    spill_limit: int
+
+    # Deliver messages for readers in this runner directly, instead of routing
+    # them through the orchestrator. The runner only knows about its own
+    # stages, so this may only be enabled if no other runner reads from the
+    # same channels.
+    local_routing: bool
+
+    # Channels of which the messages are transferred in chunks of at most
+    # `chunk_size` bytes. Both the writing and reading runners must agree on
+    # this, since the chunks carry a header inside the channel payload.
+    chunked_channels: set[str]
+    chunk_size: int
+
+    # Channels of which the payloads are compressed with `compression`, one of
+    # deflate, gzip or zstd, at the given level, or at the default level of
+    # the algorithm if negative. Payloads smaller than the threshold are sent
+    # as is, but still carry a one byte header. As with chunking, the writing
+    # and reading runners must agree on this.
+    compressed_channels: set[str]
+    compression: str
+    compression_level: int
+    compression_threshold: int
+
+    # Compression of the gRPC stream to the orchestrator as a whole, one of
+    # none, deflate or gzip. Messages below `compression_threshold` are sent
+    # uncompressed.
+    grpc_compression: str
+
+    # Size of the thread pool for blocking processor code, `None` for the
+    # default of the standard library.
+    threads: int | None
+
+    # Import processors which are packaged as a wheel from a memory mapping of
+    # the archive, instead of through `zipimport`.
+    wheel_mmap: bool
+
+    # Load stages on the thread pool, so that the constructors of stages which
+    # are loaded concurrently run in parallel.
+    parallel_loading: bool
+
+    # Address of the HTTP endpoint which serves metrics at `/metrics` during
+    # execution, a port of zero disables it.
+    metrics_host: str
+    metrics_port: int
+
+    # Largest message the gRPC server sends or receives, zero for the default
+    # of gRPC.
+    max_message_size: int
+
+    # Interval and timeout of keepalive pings in milliseconds, zero to leave
+    # keepalive disabled.
+    keepalive_time_ms: int
+    keepalive_timeout_ms: int
+
+    # HTTP/2 flow control. The window is sized by bandwidth-delay probing
+    # unless disabled, and may be started at `http2_lookahead_bytes`. Writes
+    # are buffered up to `http2_write_buffer_size` bytes. Zero leaves the
+    # default of gRPC.
+    http2_bdp_probe: bool
+    http2_lookahead_bytes: int
+    http2_write_buffer_size: int
+
+    # Any other gRPC channel arguments, as given by name.
+    grpc_options: dict[str, Any]
+
+    # Run the event loop on uvloop, if it is installed.
+    uvloop: bool
+
+    # Fraction of the messages of which the hops through the runner are
+    # traced, and the file to which the spans are appended as JSON lines.
+    trace_sample: float
+    trace_file: str
+
+    def __init__(
+        self,
+        channel_capacity: int = 0,
+        channel_byte_budget: int = 0,
+        channel_limits: dict[str, tuple[int, int]] | None = None,
+        outgoing_capacity: int = 0,
+        outgoing_byte_budget: int = 0,
+        batch_max_messages: int = 256,
+        batch_max_bytes: int = 4 * 1024 * 1024,
+        batch_linger: float = 0,
+        spill_channels: set[str] | None = None,
+        spill_outgoing: bool = False,
+        spill_directory: str | None = None,
+        spill_segment_size: int = 64 * 1024 * 1024,
+        spill_limit: int = 0,
+        local_routing: bool = False,
+        chunked_channels: set[str] | None = None,
+        chunk_size: int = 1024 * 1024,
+        compressed_channels: set[str] | None = None,
+        compression: str = "gzip",
+        compression_level: int = -1,
+        compression_threshold: int = 1024,
+        grpc_compression: str = "none",
+        max_message_size: int = 0,
+        keepalive_time_ms: int = 0,
+        keepalive_timeout_ms: int = 20000,
+        http2_bdp_probe: bool = True,
+        http2_lookahead_bytes: int = 0,
+        http2_write_buffer_size: int = 0,
+        grpc_options: dict[str, Any] | None = None,
+        uvloop: bool = False,
+        threads: int | None = None,
+        wheel_mmap: bool = False,
+        parallel_loading: bool = False,
+        metrics_host: str = "127.0.0.1",
+        metrics_port: int = 0,
+        trace_sample: float = 0,
+        trace_file: str = "rdfc-traces.jsonl",
+    ):
+        self.channel_capacity = channel_capacity
+        self.channel_byte_budget = channel_byte_budget
+        self.channel_limits = channel_limits or dict()
+        self.outgoing_capacity = outgoing_capacity
+        self.outgoing_byte_budget = outgoing_byte_budget
+        self.batch_max_messages = batch_max_messages
+        self.batch_max_bytes = batch_max_bytes
+        self.batch_linger = batch_linger
+        self.spill_channels = spill_channels or set()
+        self.spill_outgoing = spill_outgoing
+        self.spill_directory = spill_directory
+        self.spill_segment_size = spill_segment_size
+        self.spill_limit = spill_limit
+        self.local_routing = local_routing
+        self.chunked_channels = chunked_channels or set()
+        self.chunk_size = chunk_size
+        self.compressed_channels = compressed_channels or set()
+        self.compression = compression
+        self.compression_level = compression_level
+        self.compression_threshold = compression_threshold
+        self.grpc_compression = grpc_compression
+        self.max_message_size = max_message_size
+        self.keepalive_time_ms = keepalive_time_ms
+        self.keepalive_timeout_ms = keepalive_timeout_ms
+        self.http2_bdp_probe = http2_bdp_probe
+        self.http2_lookahead_bytes = http2_lookahead_bytes
+        self.http2_write_buffer_size = http2_write_buffer_size
+        self.grpc_options = grpc_options or dict()
+        self.uvloop = uvloop
+        self.threads = threads
+        self.wheel_mmap = wheel_mmap
+        self.parallel_loading = parallel_loading
+        self.metrics_host = metrics_host
+        self.metrics_port = metrics_port
+        self.trace_sample = trace_sample
+        self.trace_file = trace_file
+
+    def limits(self, uri: str) -> tuple[int, int]:
+        """The capacity and byte budget of a specific channel."""
+        default = (self.channel_capacity, self.channel_byte_budget)
+        return self.channel_limits.get(uri, default)
+
+    def spill(self, uri: str | None = None) -> rdfc.util.Spill | None:
+        """
+        How a reader spills to disk, or the outgoing queue if no URI is given,
+        or `None` if it does not.
+        """
+        spills = self.spill_outgoing if uri is None else uri in self.spill_channels
+        if not spills:
+            return None
+        return rdfc.util.Spill(
+            self.spill_directory, self.spill_segment_size, self.spill_limit
+        )
+
+    def server_options(self) -> List[tuple[str, Any]]:
+        """The channel arguments of the gRPC server."""
+        options: dict[str, Any] = dict()
+
+        if self.max_message_size:
+            options["grpc.max_send_message_length"] = self.max_message_size
+            options["grpc.max_receive_message_length"] = self.max_message_size
+
+        if self.keepalive_time_ms:
+            options["grpc.keepalive_time_ms"] = self.keepalive_time_ms
+            options["grpc.keepalive_timeout_ms"] = self.keepalive_timeout_ms
+            options["grpc.keepalive_permit_without_calls"] = 1
+            options["grpc.http2.min_ping_interval_without_data_ms"] = (
+                self.keepalive_time_ms
+            )
+
+        if not self.http2_bdp_probe:
+            options["grpc.http2.bdp_probe"] = 0
+        if self.http2_lookahead_bytes:
+            options["grpc.http2.lookahead_bytes"] = self.http2_lookahead_bytes
+        if self.http2_write_buffer_size:
+            options["grpc.http2.write_buffer_size"] = self.http2_write_buffer_size
+
+        options.update(self.grpc_options)
+        return list(options.items())
+
+    @staticmethod
+    def from_env(env: Mapping[str, str] = os.environ) -> "Config":
+        channel_capacity = int(env.get("RDFC_CHANNEL_CAPACITY", 0))
+        channel_byte_budget = int(env.get("RDFC_CHANNEL_BYTES", 0))
+
+        # Per channel limits are given as a JSON object, since URIs may contain
+        # any separator we could think of. Omitted limits fall back to the
+        # defaults above.
+        # Example: {"http://example.com/channel": {"capacity": 16, "bytes": 1048576}}
+        channel_limits = dict()
+        for uri, limits in json.loads(env.get("RDFC_CHANNEL_LIMITS", "{}")).items():
+            capacity = int(limits.get("capacity", channel_capacity))
+            byte_budget = int(limits.get("bytes", channel_byte_budget))
+            channel_limits[uri] = (capacity, byte_budget)
+
+        grpc_compression = env.get("RDFC_GRPC_COMPRESSION", "none")
+        if grpc_compression not in GRPC_COMPRESSION:
+            raise CompressionException(
+                f"Unknown gRPC compression algorithm: {grpc_compression}"
+            )
+
+        return Config(
+            channel_capacity=channel_capacity,
+            channel_byte_budget=channel_byte_budget,
+            channel_limits=channel_limits,
+            outgoing_capacity=int(env.get("RDFC_OUTGOING_CAPACITY", 0)),
+            outgoing_byte_budget=int(env.get("RDFC_OUTGOING_BYTES", 0)),
+            batch_max_messages=int(env.get("RDFC_BATCH_MESSAGES", 256)),
+            batch_max_bytes=int(env.get("RDFC_BATCH_BYTES", 4 * 1024 * 1024)),
+            batch_linger=float(env.get("RDFC_BATCH_LINGER_MS", 0)) / 1000,
+            spill_channels=set(json.loads(env.get("RDFC_SPILL_CHANNELS", "[]"))),
+            spill_outgoing=_flag(env.get("RDFC_SPILL_OUTGOING", "false")),
+            spill_directory=env.get("RDFC_SPILL_DIRECTORY"),
+            spill_segment_size=int(
+                env.get("RDFC_SPILL_SEGMENT_SIZE", 64 * 1024 * 1024)
+            ),
+            spill_limit=int(env.get("RDFC_SPILL_LIMIT", 0)),
+            local_routing=_flag(env.get("RDFC_LOCAL_ROUTING", "false")),
+            chunked_channels=set(json.loads(env.get("RDFC_CHUNKED_CHANNELS", "[]"))),
+            chunk_size=int(env.get("RDFC_CHUNK_SIZE", 1024 * 1024)),
+            compressed_channels=set(
+                json.loads(env.get("RDFC_COMPRESSED_CHANNELS", "[]"))
+            ),
+            compression=env.get("RDFC_COMPRESSION", "gzip"),
+            compression_level=int(env.get("RDFC_COMPRESSION_LEVEL", -1)),
+            compression_threshold=int(env.get("RDFC_COMPRESSION_THRESHOLD", 1024)),
+            grpc_compression=grpc_compression,
+            max_message_size=int(env.get("RDFC_MAX_MESSAGE_SIZE", 0)),
+            keepalive_time_ms=int(env.get("RDFC_KEEPALIVE_TIME_MS", 0)),
+            keepalive_timeout_ms=int(env.get("RDFC_KEEPALIVE_TIMEOUT_MS", 20000)),
+            http2_bdp_probe=_flag(env.get("RDFC_HTTP2_BDP_PROBE", "true")),
+            http2_lookahead_bytes=int(env.get("RDFC_HTTP2_LOOKAHEAD_BYTES", 0)),
+            http2_write_buffer_size=int(env.get("RDFC_HTTP2_WRITE_BUFFER_SIZE", 0)),
+            # Example: {"grpc.so_reuseport": 0}
+            grpc_options=json.loads(env.get("RDFC_GRPC_OPTIONS", "{}")),
+            uvloop=_flag(env.get("RDFC_UVLOOP", "false")),
+            threads=int(env["RDFC_THREADS"]) if "RDFC_THREADS" in env else None,
+            wheel_mmap=_flag(env.get("RDFC_WHEEL_MMAP", "false")),
+            parallel_loading=_flag(env.get("RDFC_PARALLEL_LOADING", "false")),
+            metrics_host=env.get("RDFC_METRICS_HOST", "127.0.0.1"),
+            metrics_port=int(env.get("RDFC_METRICS_PORT", 0)),
+            trace_sample=float(env.get("RDFC_TRACE_SAMPLE", 0)),
+            trace_file=env.get("RDFC_TRACE_FILE", "rdfc-traces.jsonl"),
+        )
@@ -0,0 +1,279 @@
+import asyncio
+import os
+import struct
+import subprocess
+import sys
+from typing import BinaryIO
+
+import rdfc
+import rdfc.runtime
+from rdfc.proto.intermediate_pb2 import Stage
+
+# Frames exchanged between the runner and a worker process consist of a kind,
+# the length of the channel URI and the length of the payload, followed by the
+# URI and the payload itself.
+HEADER = struct.Struct("!BII")
+
+# Runner to worker: the serialized stage, and the signal to start executing.
+INIT = 0
+EXEC = 1
+
+# Worker to runner: the channels used by the processor, and its readiness.
+READER = 2
+WRITER = 3
+READY = 4
+
+# Both directions: channel messages.
+DATA = 5
+CLOSE = 6
+
+# Worker to runner: the execution has finished, successfully or not.
+DONE = 7
+ERROR = 8
+
+# Worker to runner: the processor reads the next message of a channel. Workers
+# of parallel stages receive every message upon request, so that messages only
+# go to idle workers, and outputs are attributed to the right message.
+READ = 9
+
+# Seconds a worker is given to exit after it is terminated, before it is killed.
+GRACE_PERIOD = 5
+
+
+class IsolationException(Exception):
+    pass
+
+
+def pulls(stage: Stage) -> bool:
+    """Whether the worker requests messages one by one, see `READ`."""
+    return int(stage.processor.metadata.get("parallelism", default="1")) > 1
+
+
+def prefix(kind: int, uri: str, size: int) -> bytes:
+    """The header and URI of a frame, which are followed by `size` payload bytes."""
+    uri_bytes = uri.encode()
+    return HEADER.pack(kind, len(uri_bytes), size) + uri_bytes
+
+
+def encode(kind: int, uri: str = "", payload: bytes = b"") -> bytes:
+    return prefix(kind, uri, len(payload)) + payload
+
+
+def write_data(writer: asyncio.StreamWriter, uri: str, payload: rdfc.Buffer) -> None:
+    """Write a data frame, passing the payload on to the pipe without copying."""
+    writer.write(prefix(DATA, uri, rdfc.runtime.nbytes(payload)))
+    writer.write(payload)
+
+
+def decode(header: bytes) -> tuple[int, int, int]:
+    return HEADER.unpack(header)
+
+
+def read_exactly(file: BinaryIO, size: int) -> bytes:
+    result = bytearray()
+    while len(result) < size:
+        chunk = file.read(size - len(result))
+        if not chunk:
+            raise IsolationException("Worker process closed its pipe.")
+        result += chunk
+    return bytes(result)
+
+
+def read_frame(file: BinaryIO) -> tuple[int, str, bytes]:
+    kind, uri_length, payload_length = decode(read_exactly(file, HEADER.size))
+    uri = read_exactly(file, uri_length).decode()
+    payload = read_exactly(file, payload_length)
+    return kind, uri, payload
+
+
+async def read_frame_async(reader: asyncio.StreamReader) -> tuple[int, str, bytes]:
+    kind, uri_length, payload_length = decode(await reader.readexactly(HEADER.size))
+    uri = (await reader.readexactly(uri_length)).decode()
+    payload = await reader.readexactly(payload_length)
+    return kind, uri, payload
+
+
+async def connect(
+    read_file: BinaryIO, write_file: BinaryIO
+) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Wrap a pair of pipes into asyncio streams."""
+    loop = asyncio.get_running_loop()
+
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), read_file
+    )
+
+    transport, protocol = await loop.connect_write_pipe(
+        asyncio.streams.FlowControlMixin, write_file
+    )
+    writer = asyncio.StreamWriter(transport, protocol, None, loop)
+    return reader, writer
+
+
+class ProcessStage(rdfc.Processor):
+    """
+    A stage which runs its processor in a dedicated worker process, so that it
+    does not compete with other stages and the gRPC server for the GIL. The
+    readers and writers of the processor are bridged over a pair of pipes.
+    """
+
+    process: subprocess.Popen
+    incoming: BinaryIO
+    outgoing: BinaryIO
+    readers: dict[str, rdfc.Reader]
+    writers: dict[str, rdfc.Writer]
+
+    # Whether messages are only forwarded upon request of the worker.
+    pull: bool
+
+    def __init__(self, stage: Stage):
+        # Pipes from the worker to the runner, and vice versa.
+        runner_read, worker_write = os.pipe()
+        worker_read, runner_write = os.pipe()
+
+        # The worker resolves modules exactly like the runner does.
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(sys.path)
+
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "rdfc.grpc.worker",
+                str(worker_read),
+                str(worker_write),
+            ],
+            pass_fds=(worker_read, worker_write),
+            env=env,
+        )
+        os.close(worker_read)
+        os.close(worker_write)
+
+        self.incoming = os.fdopen(runner_read, "rb", buffering=0)
+        self.outgoing = os.fdopen(runner_write, "wb", buffering=0)
+        self.readers = dict()
+        self.writers = dict()
+        self.pull = pulls(stage)
+
+    @staticmethod
+    async def start(
+        stage: Stage, repository: rdfc.runtime.ChannelRepository
+    ) -> "ProcessStage":
+        """Spawn the worker of a stage, and wait until its processor is ready."""
+        result = ProcessStage(stage)
+        try:
+            await result.handshake(stage, repository)
+        except BaseException:
+            # The worker may still be loading, such as when the load is
+            # cancelled, and is of no use anymore.
+            if result.process.poll() is None:
+                result.process.kill()
+                result.process.wait()
+            result.incoming.close()
+            result.outgoing.close()
+            raise
+        return result
+
+    async def handshake(
+        self, stage: Stage, repository: rdfc.runtime.ChannelRepository
+    ) -> None:
+        """
+        Instantiate the processor, and bind the channels it requests. The pipes
+        are used from another thread, so that the event loop keeps serving
+        other stages while the worker imports the processor.
+        """
+        try:
+            await asyncio.to_thread(
+                self.outgoing.write,
+                encode(INIT, stage.uri, stage.SerializeToString()),
+            )
+
+            while True:
+                kind, uri, payload = await asyncio.to_thread(read_frame, self.incoming)
+
+                if kind == READER and uri not in self.readers:
+                    self.readers[uri] = repository.create_reader(uri)
+                elif kind == WRITER and uri not in self.writers:
+                    self.writers[uri] = repository.create_writer(uri)
+                elif kind == READY or kind == ERROR:
+                    break
+        except (IsolationException, BrokenPipeError):
+            raise await self.exited()
+
+        if kind == ERROR:
+            await asyncio.to_thread(self.process.wait)
+            raise IsolationException(payload.decode())
+
+    async def exited(self) -> IsolationException:
+        """The exception for a worker which exited unexpectedly."""
+        code = await asyncio.to_thread(self.process.wait)
+        return IsolationException(f"Worker process exited with code {code}.")
+
+    async def exec(self):
+        reader, writer = await connect(self.incoming, self.outgoing)
+        writer.write(encode(EXEC))
+
+        # Outstanding requests of the worker per channel, if it pulls.
+        requests = {uri: asyncio.Semaphore(0) for uri in self.readers}
+
+        # Every message which is queued is written to the pipe before waiting
+        # for it to drain, or a single message per request.
+        async def forward(uri: str, channel: rdfc.Reader):
+            while True:
+                if self.pull:
+                    await requests[uri].acquire()
+                batch = await channel.read_batch(1 if self.pull else 0)
+                if not batch:
+                    break
+                for message in batch:
+                    write_data(writer, uri, message)
+                await writer.drain()
+            writer.write(encode(CLOSE, uri))
+            await writer.drain()
+
+        forwarding = [
+            asyncio.create_task(forward(uri, channel))
+            for (uri, channel) in self.readers.items()
+        ]
+
+        finished = False
+        try:
+            while True:
+                try:
+                    kind, uri, payload = await read_frame_async(reader)
+                except asyncio.IncompleteReadError:
+                    raise await self.exited()
+
+                if kind == DATA:
+                    await self.writers[uri].write(payload)
+                elif kind == CLOSE:
+                    await self.writers[uri].close()
+                elif kind == READ:
+                    requests[uri].release()
+                elif kind == DONE:
+                    finished = True
+                    break
+                elif kind == ERROR:
+                    finished = True
+                    raise IsolationException(payload.decode())
+        finally:
+            for task in forwarding:
+                task.cancel()
+            await asyncio.gather(*forwarding, return_exceptions=True)
+            writer.close()
+            # A worker which did not finish, such as when the execution is
+            # cancelled, may still wait for messages.
+            if not finished:
+                await self.stop()
+            await asyncio.to_thread(self.process.wait)
+
+    async def stop(self) -> None:
+        """Terminate the worker, and kill it if it does not exit in time."""
+        if self.process.poll() is not None:
+            return
+        self.process.terminate()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(self.process.wait), GRACE_PERIOD)
+        except TimeoutError:
+            self.process.kill()
@@ -0,0 +1,230 @@
+import asyncio
+import bisect
+import collections
+import time
+from typing import Callable, Coroutine, List, Mapping
+
+import rdfc.util
+from .compression import Compressor
+
+# Upper bounds of the event loop lag histogram, in seconds.
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+# Upper bounds of the stage execution time histogram, in seconds.
+EXEC_BUCKETS = (0.01, 0.1, 1, 10, 60, 300, 900, 3600)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    # Upper bounds of the buckets, the last bucket is unbounded.
+    buckets: tuple[float, ...]
+
+    # Number of observations per bucket, not cumulative.
+    counts: List[int]
+
+    count: int
+    sum: float
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def render(self, name: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum {self.sum}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+class Metrics:
+    """
+    Counters of the traffic through the runner and the execution time of its
+    stages, rendered in the Prometheus text format.
+    """
+
+    # Messages and bytes received from the orchestrator, by channel URI.
+    messages_received: collections.Counter[str]
+    bytes_received: collections.Counter[str]
+
+    # Messages and bytes written by the stages, by channel URI.
+    messages_written: collections.Counter[str]
+    bytes_written: collections.Counter[str]
+
+    # Start and end of the execution of every stage, by stage URI.
+    exec_started: dict[str, float]
+    exec_finished: dict[str, float]
+
+    # Execution time of the stages which finished.
+    exec_duration: Histogram
+
+    # Delay of scheduled callbacks on the event loop.
+    loop_lag: Histogram
+
+    # Fill levels of the queues, see `Server.usage`.
+    usage: Callable[[], Mapping[str, List[rdfc.util.Usage]]]
+
+    # Compressor of the compressed channels, if any.
+    compressor: Compressor | None
+
+    def __init__(self, usage: Callable[[], Mapping[str, List[rdfc.util.Usage]]]):
+        self.messages_received = collections.Counter()
+        self.bytes_received = collections.Counter()
+        self.messages_written = collections.Counter()
+        self.bytes_written = collections.Counter()
+        self.exec_started = dict()
+        self.exec_finished = dict()
+        self.exec_duration = Histogram(EXEC_BUCKETS)
+        self.loop_lag = Histogram(LAG_BUCKETS)
+        self.usage = usage
+        self.compressor = None
+
+    def received(self, uri: str, size: int) -> None:
+        self.messages_received[uri] += 1
+        self.bytes_received[uri] += size
+
+    def written(self, uri: str, size: int) -> None:
+        self.messages_written[uri] += 1
+        self.bytes_written[uri] += size
+
+    async def timed(self, uri: str, coroutine: Coroutine) -> None:
+        """Await the execution of a stage, and record how long it takes."""
+        self.exec_started[uri] = time.monotonic()
+        try:
+            await coroutine
+        finally:
+            self.exec_finished[uri] = time.monotonic()
+            self.exec_duration.observe(self.exec_finished[uri] - self.exec_started[uri])
+
+    async def monitor(self, interval: float = 0.1) -> None:
+        """Measure how late the event loop wakes up a sleeping task, forever."""
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(interval)
+            self.loop_lag.observe(max(0.0, time.monotonic() - start - interval))
+
+    def render(self) -> str:
+        lines = []
+
+        def counter(name: str, values: collections.Counter[str]):
+            lines.append(f"# TYPE {name} counter")
+            for uri, value in values.items():
+                lines.append(f'{name}{{channel="{_escape(uri)}"}} {value}')
+
+        counter("rdfc_channel_received_messages_total", self.messages_received)
+        counter("rdfc_channel_received_bytes_total", self.bytes_received)
+        counter("rdfc_channel_written_messages_total", self.messages_written)
+        counter("rdfc_channel_written_bytes_total", self.bytes_written)
+
+        # Queue depths, summed over the readers and pending deliveries of a
+        # channel.
+        usage = dict(self.usage())
+        outgoing = usage.pop("outgoing", [])
+        lines.append("# TYPE rdfc_channel_queue_messages gauge")
+        for uri, levels in usage.items():
+            items = sum(level.items for level in levels)
+            lines.append(
+                f'rdfc_channel_queue_messages{{channel="{_escape(uri)}"}} {items}'
+            )
+        lines.append("# TYPE rdfc_channel_queue_bytes gauge")
+        for uri, levels in usage.items():
+            size = sum(level.bytes for level in levels)
+            lines.append(f'rdfc_channel_queue_bytes{{channel="{_escape(uri)}"}} {size}')
+
+        lines.append("# TYPE rdfc_outgoing_queue_messages gauge")
+        lines.append(f"rdfc_outgoing_queue_messages {sum(l.items for l in outgoing)}")
+        lines.append("# TYPE rdfc_outgoing_queue_bytes gauge")
+        lines.append(f"rdfc_outgoing_queue_bytes {sum(l.bytes for l in outgoing)}")
+
+        # Messages which overflowed to disk, of queues which spill at all.
+        spilling = dict(usage, outgoing=outgoing)
+        for name, kind, field in (
+            ("rdfc_spill_queue_messages", "gauge", "spilled"),
+            ("rdfc_spill_messages_total", "counter", "spilled_total"),
+            ("rdfc_spill_disk_bytes", "gauge", "disk_bytes"),
+        ):
+            lines.append(f"# TYPE {name} {kind}")
+            for uri, levels in spilling.items():
+                if any(level.spilled_total for level in levels):
+                    value = sum(getattr(level, field) for level in levels)
+                    lines.append(f'{name}{{queue="{_escape(uri)}"}} {value}')
+
+        # Stages which are still running report their time so far.
+        now = time.monotonic()
+        lines.append("# TYPE rdfc_stage_exec_seconds gauge")
+        lines.append("# TYPE rdfc_stage_running gauge")
+        for uri, start in self.exec_started.items():
+            end = self.exec_finished.get(uri)
+            elapsed = (end or now) - start
+            label = _escape(uri)
+            lines.append(f'rdfc_stage_exec_seconds{{stage="{label}"}} {elapsed}')
+            lines.append(f'rdfc_stage_running{{stage="{label}"}} {int(end is None)}')
+
+        lines.append("# TYPE rdfc_stage_exec_duration_seconds histogram")
+        lines.extend(self.exec_duration.render("rdfc_stage_exec_duration_seconds"))
+
+        lines.append("# TYPE rdfc_event_loop_lag_seconds histogram")
+        lines.extend(self.loop_lag.render("rdfc_event_loop_lag_seconds"))
+
+        if self.compressor is not None:
+            compressor = self.compressor
+            lines.append("# TYPE rdfc_compression_raw_bytes_total counter")
+            lines.append(f"rdfc_compression_raw_bytes_total {compressor.raw_bytes}")
+            lines.append("# TYPE rdfc_compression_compressed_bytes_total counter")
+            lines.append(
+                f"rdfc_compression_compressed_bytes_total {compressor.compressed_bytes}"
+            )
+            lines.append("# TYPE rdfc_compression_seconds_total counter")
+            lines.append(
+                f'rdfc_compression_seconds_total{{direction="compress"}} {compressor.compress_seconds}'
+            )
+            lines.append(
+                f'rdfc_compression_seconds_total{{direction="decompress"}} {compressor.decompress_seconds}'
+            )
+
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host: str, port: int) -> asyncio.Server:
+        """Expose the metrics over HTTP, at `/metrics`."""
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            try:
+                request = await reader.readline()
+                while (await reader.readline()).strip():
+                    pass
+
+                parts = request.decode(errors="replace").split()
+                if len(parts) >= 2 and parts[0] == "GET" and parts[1] == "/metrics":
+                    status = "200 OK"
+                    body = self.render().encode()
+                else:
+                    status = "404 Not Found"
+                    body = b""
+
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    "Content-Type: text/plain; version=0.0.4\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, host, port)
+        print(f"Serving metrics on http://{host}:{port}/metrics", flush=True)
+        return server
@@ -1,5 +1,16 @@
 import asyncio
-from typing import Iterator, List, Callable, AsyncGenerator, AsyncIterator, Mapping
+import time
+from typing import (
+    Iterator,
+    List,
+    Callable,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Mapping,
+    Sequence,
+    TypeVar,
+)
 
 from google.protobuf.empty_pb2 import Empty
 import grpc
@@ -14,10 +25,23 @@ from rdfc.proto.channel_pb2 import (
     ChannelMessage,
 )
 from .arguments import Arguments
+from .chunking import Chunker, Reassembler, parse
+from .compression import GRPC_COMPRESSION, Compressor
+from .config import Config
+from .isolation import ProcessStage
+from .metrics import Metrics
+from .tracing import Stamp, Traced, TracedChannel, Tracer
 from ..proto.index_pb2_grpc import RunnerServicer, add_RunnerServicer_to_server
 
 from ..proto.intermediate_pb2 import Stage
 
+T = TypeVar("T")
+
+
+def untraced(entry: ChannelMessage | Traced[ChannelMessage]) -> ChannelMessage:
+    """The message of an outgoing entry, of which the trace ends if it spills."""
+    return entry.value if isinstance(entry, Traced) else entry
+
 
 class Server(RunnerServicer, rdfc.runtime.ChannelRepository):
     # Map of a processor URI to their constructor.
@@ -26,23 +50,82 @@ class Server(RunnerServicer, rdfc.runtime.ChannelRepository):
     # The processor instances by their stage URI.
     stages: dict[str, rdfc.Processor]
 
-    # Messages bound for the orchestrator.
-    outgoing_messages: asyncio.Queue[ChannelMessage]
+    # Messages bound for the orchestrator, terminated by `None` once all stages
+    # are finished. Sampled messages carry their trace along, see `Traced`.
+    outgoing_messages: rdfc.util.BoundedQueue[
+        ChannelMessage | Traced[ChannelMessage] | None
+    ]
 
     # A map of reader URIs to their concrete instances.
-    readers: dict[str, List[rdfc.Writer]]
+    readers: dict[str, List[rdfc.util.Channel | rdfc.util.StreamChannel]]
+
+    # Partially received messages of chunked channels, by channel URI.
+    reassemblers: dict[str, Reassembler]
+
+    # Incoming messages which are not yet delivered to the readers, by URI,
+    # along with their payload and trace stamp. Every access to the payload of
+    # a message copies it, so it is only taken out once and shared by all
+    # readers.
+    deliveries: dict[
+        str, rdfc.util.BoundedQueue[tuple[ChannelMessage, bytes, Stamp | None]]
+    ]
+
+    # Runtime configuration.
+    config: Config
+
+    # Traffic and execution statistics.
+    metrics: Metrics
 
-    def __init__(self):
+    # Compresses the payloads of compressed channels, if any.
+    compressor: Compressor | None
+
+    # Records the hops of sampled messages, if tracing is enabled.
+    tracer: Tracer | None
+
+    def __init__(self, config: Config | None = None):
         print("Starting server.")
         super().__init__()
 
         # Default values for fields.
+        self.config = config or Config()
         self.processors = dict()
         self.stages = dict()
-        self.outgoing_messages = asyncio.Queue()
+        # The size of outgoing messages is passed along when they are queued.
+        spill = self.config.spill()
+        if spill is None:
+            self.outgoing_messages = rdfc.util.BoundedQueue(
+                self.config.outgoing_capacity,
+                self.config.outgoing_byte_budget,
+                lambda _: 0,
+            )
+        else:
+            self.outgoing_messages = rdfc.util.SpillQueue(
+                self.config.outgoing_capacity,
+                self.config.outgoing_byte_budget,
+                lambda _: 0,
+                spill,
+                lambda entry: untraced(entry).SerializeToString(),
+                ChannelMessage.FromString,
+            )
         self.readers = dict()
-
-    def load(self, stage: Stage, context: grpc.ServicerContext):
+        self.reassemblers = dict()
+        self.deliveries = dict()
+        self.metrics = Metrics(self.usage)
+        self.compressor = None
+        if self.config.compressed_channels:
+            self.compressor = Compressor(
+                self.config.compression,
+                self.config.compression_level,
+                self.config.compression_threshold,
+            )
+            self.metrics.compressor = self.compressor
+        self.tracer = None
+        if self.config.trace_sample > 0:
+            self.tracer = Tracer(self.config.trace_sample, self.config.trace_file)
+        rdfc.runtime.ThreadPool.configure(self.config.threads)
+        rdfc.util.Wheel.mapped = self.config.wheel_mmap
+
+    async def load(self, stage: Stage, context: grpc.ServicerContext):
         print(f"Loading stage: {stage.uri}")
 
         # The class name needs to be given, since we don't know what declaration to load from a source file otherwise.
@@ -64,10 +147,37 @@ class Server(RunnerServicer, rdfc.runtime.ChannelRepository):
             )
             return Empty()
 
+        # Seconds spent per phase of the startup of the stage.
+        timings: dict[str, float] = dict()
+
+        # Stages may run in a dedicated worker process instead, which loads
+        # the processor by itself.
+        execution = stage.processor.metadata.get("execution", default="async")
+        if execution == "process":
+            start = time.perf_counter()
+            try:
+                self.stages[stage.uri] = await self.instantiate(
+                    stage,
+                    lambda repository: ProcessStage.start(stage, repository),
+                )
+            except Exception as exception:
+                context.set_code(grpc.StatusCode.INTERNAL)
+                context.set_details(
+                    f"Processor could not be instantiated in a worker process: {exception}"
+                )
+                return Empty()
+            timings["constructor"] = time.perf_counter() - start
+            self.report(stage, timings, context)
+            return Empty()
+
         # Load processor module into the runtime.
         try:
-            constructor = rdfc.util.Wheel.load(
-                stage.processor.entrypoint, module_name, class_name
+            constructor = await self.offload(
+                rdfc.util.Wheel.load,
+                stage.processor.entrypoint,
+                module_name,
+                class_name,
+                timings,
             )
         except Exception as exception:
             context.set_code(grpc.StatusCode.INTERNAL)
@@ -77,26 +187,118 @@ class Server(RunnerServicer, rdfc.runtime.ChannelRepository):
             return Empty()
         self.processors[stage.processor.uri] = constructor
 
-        # Initialize the arguments.
-        args = Arguments(stage.arguments, self)
-
-        # Create the stage.
+        # Create the stage, with arguments of its own for every worker.
+        start = time.perf_counter()
         try:
-            processor = constructor(args)
+            processor = await self.instantiate(
+                stage,
+                lambda repository: self.offload(
+                    constructor, Arguments(stage.arguments, self.bound(repository))
+                ),
+            )
         except Exception as exception:
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(f"Processor could not be instantiated: {exception}")
             return Empty()
+        timings["constructor"] = time.perf_counter() - start
         self.stages[stage.uri] = processor
 
+        self.report(stage, timings, context)
+
         # No return value is used.
         return Empty()
 
+    async def instantiate(
+        self,
+        stage: Stage,
+        create: Callable[[rdfc.runtime.ChannelRepository], Awaitable[rdfc.Processor]],
+    ) -> rdfc.Processor:
+        """
+        Create the processor of a stage, or one per worker if its metadata
+        declares a `parallelism` above one. The outputs of the workers follow
+        the order of the input if `ordered` is `true`.
+        """
+        metadata = stage.processor.metadata
+        workers = int(metadata.get("parallelism", default="1"))
+        if workers <= 1:
+            return await create(self)
+
+        ordered = metadata.get("ordered", default="false") == "true"
+        channels = rdfc.util.SharedChannels(self, workers, ordered)
+        instances = []
+        for _ in range(workers):
+            repository = channels.worker()
+            instances.append((await create(repository), repository))
+        return rdfc.util.Parallel(instances)
+
+    async def offload(self, function: Callable[..., T], *args) -> T:
+        """
+        Call a function which loads a stage, on the thread pool if stages may
+        be loaded in parallel. Imports are serialized by `Wheel.load` itself.
+        """
+        if self.config.parallel_loading:
+            return await rdfc.runtime.ThreadPool.run(function, *args)
+        return function(*args)
+
+    def bound(
+        self, repository: rdfc.runtime.ChannelRepository
+    ) -> rdfc.runtime.ChannelRepository:
+        """
+        The repository of a constructor, which still creates its channels on
+        the event loop if it is offloaded to the thread pool.
+        """
+        if self.config.parallel_loading:
+            return rdfc.runtime.LoopRepository(repository, asyncio.get_running_loop())
+        return repository
+
+    @staticmethod
+    def report(
+        stage: Stage, timings: dict[str, float], context: grpc.ServicerContext
+    ) -> None:
+        """Log the startup time of a stage, and return it as trailing metadata."""
+        milliseconds = {phase: seconds * 1000 for phase, seconds in timings.items()}
+        breakdown = ", ".join(
+            f"{phase} {ms:.1f} ms" for phase, ms in milliseconds.items()
+        )
+        print(
+            f"Stage loaded in {sum(milliseconds.values()):.1f} ms ({breakdown}): {stage.uri}",
+            flush=True,
+        )
+        context.set_trailing_metadata(
+            tuple(
+                (f"rdfc-startup-{phase}-ms", f"{ms:.3f}")
+                for phase, ms in milliseconds.items()
+            )
+        )
+
     async def exec(
         self, incoming: AsyncIterator[ChannelMessage], context
     ) -> AsyncGenerator:
         print("Executing pipeline.", flush=True)
 
+        # The stream to the orchestrator may be compressed as a whole, except
+        # for small messages.
+        grpc_compression = self.config.grpc_compression != "none"
+        if grpc_compression:
+            context.set_compression(GRPC_COMPRESSION[self.config.grpc_compression])
+
+        # Every channel is served by its own delivery task, so that a reader
+        # which does not keep up only holds back the messages of its channel.
+        delivery_tasks: List[asyncio.Task] = []
+
+        # A delivery task which fails ends the execution with its exception,
+        # since its channel, and eventually every other channel, would stall.
+        failures: List[BaseException] = []
+
+        def delivery_done(task: asyncio.Task) -> None:
+            if not task.cancelled() and task.exception() is not None:
+                failures.append(task.exception())
+                self.outgoing_messages.put_nowait(None)
+
+        # Channels without readers in this runner, of which messages are
+        # dropped.
+        ignored: set[str] = set()
+
         async def handle_incoming_messages(
             messages: AsyncIterator[ChannelMessage],
         ):
@@ -104,79 +306,344 @@ class Server(RunnerServicer, rdfc.runtime.ChannelRepository):
 
             async for message in messages:
                 uri = message.channel.uri
-                readers = self.readers[uri]
-
-                for reader in readers:
-                    if message.type == ChannelMessageType.DATA:
-                        await reader.write(message.data.bytes)
-                    elif message.type == ChannelMessageType.CLOSE:
-                        await reader.close()
-                    else:
-                        exit(1)
+                if uri not in self.readers:
+                    if uri not in ignored:
+                        ignored.add(uri)
+                        print(
+                            f"Dropping messages of a channel without readers: {uri}",
+                            file=sys.stderr,
+                            flush=True,
+                        )
+                    continue
+
+                data = message.data.bytes
+                stamp = None
+                if message.type == ChannelMessageType.DATA:
+                    self.metrics.received(uri, len(data))
+                    if self.tracer is not None:
+                        stamp = self.tracer.stamp(uri, data)
+                pending = self.deliveries.get(uri)
+
+                if pending is None:
+                    capacity, byte_budget = self.config.limits(uri)
+                    pending = rdfc.util.BoundedQueue(
+                        capacity, byte_budget, lambda entry: len(entry[1])
+                    )
+                    self.deliveries[uri] = pending
+                    task = asyncio.create_task(self.deliver(uri, pending))
+                    task.add_done_callback(delivery_done)
+                    delivery_tasks.append(task)
+
+                # Only suspends once both the readers and the pending messages
+                # of this channel are at capacity, which in turn stops consuming
+                # the incoming gRPC stream.
+                await pending.put((message, data, stamp), len(data))
 
             print("Stop handling incoming messages.", flush=True)
 
+        # Statistics are scraped over HTTP, if enabled.
+        monitor_task = asyncio.create_task(self.metrics.monitor())
+        metrics_server = None
+        if self.config.metrics_port:
+            metrics_server = await self.metrics.serve(
+                self.config.metrics_host, self.config.metrics_port
+            )
+
         # Handle incoming messages.
         incoming_message_task = asyncio.create_task(handle_incoming_messages(incoming))
 
-        # Start all stages.
+        # Start all stages. Once they are finished, an end-of-stream marker is
+        # placed behind their final messages in the outgoing queue.
         print("Starting executions", flush=True)
         executions_task = asyncio.gather(
-            *[stage.exec() for (uri, stage) in self.stages.items()]
+            *[
+                self.metrics.timed(uri, stage.exec())
+                for (uri, stage) in self.stages.items()
+            ]
+        )
+        executions_task.add_done_callback(
+            lambda _: self.outgoing_messages.put_nowait(None)
         )
 
-        # Loop until the `executions_task` is fulfilled.
-        while True:
-            outgoing_message_task = asyncio.create_task(self.outgoing_messages.get())
-
-            # Await a message, or the fulfillment of the `executions_task`.
-            done, pending = await asyncio.wait(
-                [executions_task, outgoing_message_task],
-                return_when=asyncio.FIRST_COMPLETED,
+        # Push every queued message to the orchestrator in batches, until the
+        # end-of-stream marker is reached.
+        try:
+            finished = False
+            while not finished:
+                batch = await self.outgoing_messages.get_batch(
+                    self.config.batch_max_messages,
+                    self.config.batch_max_bytes,
+                    self.config.batch_linger,
+                )
+
+                for message in batch:
+                    if message is None:
+                        finished = True
+                        break
+                    if isinstance(message, Traced):
+                        stamp, message = message.stamp, message.value
+                        self.tracer.end("outgoing", message.channel.uri, stamp)
+                    if (
+                        grpc_compression
+                        and len(message.data.bytes) < self.config.compression_threshold
+                    ):
+                        context.disable_next_message_compression()
+                    yield message
+
+            if failures:
+                raise failures[0]
+
+            # Propagate exceptions raised by the stages.
+            await executions_task
+            print("Executions finished", flush=True)
+
+        # Signal fulfillment to the orchestrator by returning the procedure call.
+        finally:
+            executions_task.cancel()
+            incoming_message_task.cancel()
+            monitor_task.cancel()
+            for task in delivery_tasks:
+                task.cancel()
+            await asyncio.gather(
+                incoming_message_task,
+                monitor_task,
+                *delivery_tasks,
+                return_exceptions=True,
             )
+            if metrics_server is not None:
+                metrics_server.close()
+            if self.tracer is not None:
+                self.tracer.close()
+            if self.compressor is not None:
+                compressor = self.compressor
+                print(
+                    f"Compression: {compressor.raw_bytes} to {compressor.compressed_bytes} bytes "
+                    f"(ratio {compressor.ratio():.3f}), "
+                    f"{compressor.compress_seconds:.3f} s compressing, "
+                    f"{compressor.decompress_seconds:.3f} s decompressing",
+                    flush=True,
+                )
+            for uri, levels in self.usage().items():
+                spilled = sum(level.spilled_total for level in levels)
+                if spilled:
+                    print(f"Spilled {spilled} messages to disk: {uri}", flush=True)
+
+    async def deliver(
+        self,
+        uri: str,
+        pending: rdfc.util.BoundedQueue[tuple[ChannelMessage, bytes, Stamp | None]],
+    ) -> None:
+        """Pass the incoming messages of a single channel on to its readers."""
+        readers = self.readers[uri]
+        chunked = uri in self.config.chunked_channels
+        compressed = uri in self.config.compressed_channels
+
+        # Consecutive messages which are queued are handed to the readers at
+        # once.
+        values: List[rdfc.Buffer] = []
+
+        async def flush() -> None:
+            if values:
+                for reader in readers:
+                    await reader.write_many(values)
+                values.clear()
 
-            # Push the new message to the orchestrator.
-            if outgoing_message_task in done:
-                print("Pushing new message", flush=True)
-                yield await outgoing_message_task
+        while True:
+            batch = await pending.get_batch(
+                self.config.batch_max_messages, self.config.batch_max_bytes
+            )
 
-            # Signal fulfillment to the orchestrator by returning the procedure call.
-            elif executions_task in done:
-                print("Executions finished", flush=True)
-                incoming_message_task.cancel()
-                return
+            for message, data, _ in batch:
+                if message.type == ChannelMessageType.DATA and not chunked:
+                    if compressed:
+                        data = self.compressor.decompress(data)
+                    values.append(data)
+                    continue
+
+                await flush()
+                if message.type == ChannelMessageType.DATA:
+                    await self.write_chunk(uri, readers, data)
+                elif message.type == ChannelMessageType.CLOSE:
+                    for reader in readers:
+                        await reader.close()
+                else:
+                    exit(1)
+            await flush()
+
+            if self.tracer is not None:
+                for _, _, stamp in batch:
+                    self.tracer.end("deliver", uri, stamp)
+
+    def usage(self) -> Mapping[str, List[rdfc.util.Usage]]:
+        """
+        The fill level of every reader and of the pending incoming messages by
+        channel URI, and of the outgoing queue.
+        """
+        result = {
+            uri: [reader.usage() for reader in readers]
+            for (uri, readers) in self.readers.items()
+        }
+        for uri, pending in self.deliveries.items():
+            result.setdefault(uri, []).append(pending.usage())
+        result["outgoing"] = [self.outgoing_messages.usage()]
+        return result
+
+    async def write_chunk(
+        self,
+        uri: str,
+        readers: List[rdfc.util.Channel | rdfc.util.StreamChannel],
+        frame: bytes,
+    ) -> None:
+        """Pass a chunk on to stream readers, and reassemble it for the others."""
+        message_id, sequence, last, payload = parse(frame)
+        reassembler = self.reassemblers.setdefault(uri, Reassembler())
+
+        # Compressed messages can only be read once they are complete.
+        compressed = uri in self.config.compressed_channels
+        streaming = not compressed
+        keep = compressed or any(
+            not isinstance(r, rdfc.util.StreamChannel) for r in readers
+        )
+        message = reassembler.feed(message_id, sequence, last, payload, keep)
+        if compressed and message is not None:
+            message = self.compressor.decompress(message)
+
+        for reader in readers:
+            if streaming and isinstance(reader, rdfc.util.StreamChannel):
+                await reader.write_chunk(message_id, payload, last)
+            elif message is not None:
+                await reader.write(message)
+
+    def local_readers(
+        self, uri: str
+    ) -> List[rdfc.util.Channel | rdfc.util.StreamChannel] | None:
+        """The readers of a channel in this runner, if messages may short-circuit to them."""
+        if not self.config.local_routing:
+            return None
+        return self.readers.get(uri)
 
     def create_reader(self, uri: str) -> rdfc.util.Channel:
-        channel = rdfc.util.Channel(uri)
+        capacity, byte_budget = self.config.limits(uri)
+        spill = self.config.spill(uri)
+        if self.tracer is not None:
+            channel = TracedChannel(uri, self.tracer, capacity, byte_budget, spill)
+        else:
+            channel = rdfc.util.Channel(uri, capacity, byte_budget, spill)
+        reader_list = self.readers.setdefault(uri, [])
+        reader_list.append(channel)
+        return channel
+
+    def create_stream_reader(self, uri: str) -> rdfc.util.StreamChannel:
+        capacity, byte_budget = self.config.limits(uri)
+        channel = rdfc.util.StreamChannel(uri, capacity, byte_budget)
         reader_list = self.readers.setdefault(uri, [])
         reader_list.append(channel)
         return channel
 
     def create_writer(self, uri: str) -> rdfc.util.CallbackChannel:
-        async def on_write(data: bytes) -> None:
-            msg = ChannelMessage()
-            msg.channel.uri = uri
-            msg.type = ChannelMessageType.DATA
-            msg.data.bytes = data
-            await self.outgoing_messages.put(msg)
+        chunker = None
+        if uri in self.config.chunked_channels:
+            chunker = Chunker(self.config.chunk_size)
+
+        compressor = None
+        if uri in self.config.compressed_channels:
+            compressor = self.compressor
+
+        async def on_write_many(values: Sequence[rdfc.Buffer]) -> None:
+            for data in values:
+                self.metrics.written(uri, rdfc.runtime.nbytes(data))
+
+            trace_ids = None
+            if self.tracer is not None:
+                trace_ids = [self.tracer.trace_id(uri, data) for data in values]
+                start = time.time_ns()
+
+            # Messages for readers in this process are delivered directly,
+            # without a round-trip through the orchestrator, and without
+            # copying the buffer.
+            local_readers = self.local_readers(uri)
+            if local_readers:
+                for reader in local_readers:
+                    await reader.write_many(values)
+            else:
+                for index, data in enumerate(values):
+                    await enqueue(data, None if trace_ids is None else trace_ids[index])
+
+            if trace_ids is not None:
+                end = time.time_ns()
+                for trace_id in trace_ids:
+                    if trace_id is not None:
+                        self.tracer.record(trace_id, "write", uri, start, end)
+
+        async def enqueue(data: rdfc.Buffer, trace_id: str | None) -> None:
+            # Messages are compressed as a whole before they are split up.
+            if compressor is not None:
+                data = compressor.compress(data)
+
+            # Large messages are split up, and only a single chunk at a time
+            # is serialized.
+            frames = [data] if chunker is None else chunker.split(data)
+
+            for frame in frames:
+                # Protobuf only accepts `bytes`, which are copied into the
+                # message either way.
+                if not isinstance(frame, bytes):
+                    frame = bytes(frame)
+                msg = ChannelMessage()
+                msg.channel.uri = uri
+                msg.type = ChannelMessageType.DATA
+                msg.data.bytes = frame
+                entry = msg
+                if trace_id is not None:
+                    entry = Traced(msg, (trace_id, time.time_ns()))
+                # Suspends the writing stage while the outgoing queue is full.
+                await self.outgoing_messages.put(entry, len(frame))
+
+        async def on_write(data: rdfc.Buffer) -> None:
+            await on_write_many((data,))
+
+        # Live objects are only serialized once they leave the process.
+        async def on_write_object(message: rdfc.ObjectMessage) -> None:
+            local_readers = self.local_readers(uri)
+            if not local_readers:
+                await on_write_many((message.data(),))
+                return
 
+            self.metrics.written(uri, message.size)
+            for reader in local_readers:
+                await reader.write_object(message)
+
+        # Closing is always routed through the orchestrator, which keeps track
+        # of the number of writers per channel. Since it is queued after all
+        # local deliveries, the readers still observe it last.
         async def on_close() -> None:
             msg = ChannelMessage()
             msg.channel.uri = uri
             msg.type = ChannelMessageType.CLOSE
             msg.data.bytes = bytes()
-            await self.outgoing_messages.put(msg)
+            self.outgoing_messages.put_nowait(msg, 0)
 
-        return rdfc.util.CallbackChannel(on_write, on_close)
+        return rdfc.util.CallbackChannel(
+            on_write, on_close, on_write_many, on_write_object
+        )
+
+    @staticmethod
+    def address(hostname: str, port: str) -> str:
+        """The address to bind to, where a `unix:` hostname is a socket path."""
+        if hostname.startswith("unix:"):
+            return hostname
+        return f"{hostname}:{port}"
 
     @staticmethod
     async def launch():
         hostname = sys.argv[1]
-        port = sys.argv[2]
-        print(f"Binding to grpc://{hostname}:{port}")
-
-        server = grpc.aio.server()
-        add_RunnerServicer_to_server(Server(), server)
-        server.add_insecure_port(f"{hostname}:{port}")
+        port = sys.argv[2] if len(sys.argv) > 2 else ""
+        address = Server.address(hostname, port)
+        print(f"Binding to grpc://{address}")
+
+        config = Config.from_env()
+        server = grpc.aio.server(options=config.server_options())
+        add_RunnerServicer_to_server(Server(config), server)
+        server.add_insecure_port(address)
         await server.start()
         await server.wait_for_termination()
@@ -0,0 +1,210 @@
+import collections
+import hashlib
+import json
+import os
+import time
+from typing import IO, Any, Generic, Iterable, List, TypeVar
+
+import rdfc.util
+
+T = TypeVar("T")
+
+# Number of spans buffered before they are written to the export file.
+BUFFER_SIZE = 1024
+
+# The trace identifier of a sampled message, and the start of its current hop
+# in nanoseconds since the epoch.
+Stamp = tuple[str, int]
+
+
+class Tracer:
+    """
+    Records the time a sampled message spends in each hop through the runner.
+
+    A channel message has no room for trace context, so the trace of a message
+    is identified by a hash of its channel and contents instead. Every runner
+    derives the same identifier and sampling decision for the same message, so
+    their spans can be joined afterward without coordination. Identical
+    messages on the same channel share a trace.
+    """
+
+    # Fraction of the messages which are traced.
+    rate: float
+
+    # Spans which are not yet exported, as JSON objects.
+    spans: List[dict]
+
+    # Destination of the spans, in JSON lines.
+    path: str
+    file: IO[str] | None
+
+    # The most recently hashed message, since it is typically passed along
+    # multiple hops right after each other.
+    last: tuple[str, bytes, str | None] | None
+
+    def __init__(self, rate: float, path: str):
+        self.rate = rate
+        self.spans = []
+        self.path = path
+        self.file = None
+        self.last = None
+
+    def trace_id(self, uri: str, data: rdfc.Buffer) -> str | None:
+        """The trace identifier of a message, or `None` if it is not sampled."""
+        if self.last is not None and self.last[1] is data and self.last[0] == uri:
+            return self.last[2]
+
+        digest = hashlib.blake2b(uri.encode(), digest_size=16)
+        digest.update(b"\0")
+        digest.update(data)
+        # The first eight bytes determine the sampling decision uniformly.
+        sample = int.from_bytes(digest.digest()[:8]) / 2**64
+        result = digest.hexdigest() if sample < self.rate else None
+
+        self.last = (uri, data, result)
+        return result
+
+    def stamp(self, uri: str, data: rdfc.Buffer) -> Stamp | None:
+        """Start a hop of a message, if it is sampled."""
+        trace_id = self.trace_id(uri, data)
+        return None if trace_id is None else (trace_id, time.time_ns())
+
+    def end(self, name: str, uri: str, stamp: Stamp | None) -> None:
+        """End a hop which was started with `stamp`, if any."""
+        if stamp is not None:
+            trace_id, start = stamp
+            self.record(trace_id, name, uri, start, time.time_ns())
+
+    def record(
+        self, trace_id: str, name: str, uri: str, start: int, end: int, **attributes
+    ) -> None:
+        """Record a span, with start and end in nanoseconds since the epoch."""
+        attributes["rdfc.channel"] = uri
+        self.spans.append(
+            {
+                "traceId": trace_id,
+                "spanId": os.urandom(8).hex(),
+                "name": name,
+                "startTimeUnixNano": start,
+                "endTimeUnixNano": end,
+                "attributes": attributes,
+            }
+        )
+
+        if len(self.spans) >= BUFFER_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.spans:
+            return
+
+        if self.file is None:
+            self.file = open(self.path, "a")
+
+        for span in self.spans:
+            self.file.write(json.dumps(span))
+            self.file.write("\n")
+        self.file.flush()
+        self.spans.clear()
+
+    def close(self) -> None:
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class Traced(Generic[T]):
+    """
+    A sampled message which travels through a queue along with its stamp. The
+    stamp is lost if the message is spilled to disk, which ends its trace.
+    """
+
+    value: T
+    stamp: Stamp
+
+    def __init__(self, value: T, stamp: Stamp):
+        self.value = value
+        self.stamp = stamp
+
+
+class TracedChannel(rdfc.util.Channel):
+    """
+    A reader which records how long sampled messages wait in its queue, and
+    how long the processor takes before it asks for the next message.
+    """
+
+    tracer: Tracer
+
+    # Trace identifiers and enqueue times, in the same order as the queue.
+    stamps: collections.deque[tuple[str | None, int]]
+
+    # The sampled messages which were last handed to the processor.
+    current: List[tuple[str, int]]
+
+    def __init__(
+        self,
+        uri: str,
+        tracer: Tracer,
+        capacity: int = 0,
+        byte_budget: int = 0,
+        spill: rdfc.util.Spill | None = None,
+    ):
+        super().__init__(uri, capacity, byte_budget, spill)
+        self.tracer = tracer
+        self.stamps = collections.deque()
+        self.current = []
+
+    def processed(self) -> None:
+        """Asking for the next message ends the processing of the previous ones."""
+        now = time.time_ns()
+        for trace_id, start in self.current:
+            self.tracer.record(trace_id, "process", self.uri, start, now)
+        self.current.clear()
+
+    def dequeued(self, count: int) -> None:
+        now = time.time_ns()
+        for _ in range(count):
+            trace_id, start = self.stamps.popleft()
+            if trace_id is not None:
+                self.tracer.record(trace_id, "queue", self.uri, start, now)
+                self.current.append((trace_id, now))
+
+    async def __anext__(self) -> rdfc.Buffer:
+        self.processed()
+        value = await super().__anext__()
+        self.dequeued(1)
+        return value
+
+    async def read_object(self) -> Any:
+        self.processed()
+        value = await super().read_object()
+        self.dequeued(1)
+        return value
+
+    async def read_batch(
+        self, max_items: int = 0, max_bytes: int = 0, timeout: float = 0
+    ) -> List[rdfc.Buffer]:
+        self.processed()
+        batch = await super().read_batch(max_items, max_bytes, timeout)
+        self.dequeued(len(batch))
+        return batch
+
+    async def write(self, value: rdfc.Buffer) -> None:
+        trace_id = self.tracer.trace_id(self.uri, value)
+        stamp = (trace_id, time.time_ns())
+
+        # The stamp is added once the value is actually queued, so that the
+        # order of both is the same.
+        await super().write(value)
+        self.stamps.append(stamp)
+
+    async def write_many(self, values: Iterable[rdfc.Buffer]) -> None:
+        for value in values:
+            await self.write(value)
+
+    async def write_object(self, message: rdfc.ObjectMessage) -> None:
+        # Live objects are not serialized just to derive a trace identifier.
+        stamp = (None, time.time_ns())
+        await super().write_object(message)
+        self.stamps.append(stamp)
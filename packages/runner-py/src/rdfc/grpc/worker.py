@@ -0,0 +1,220 @@
+import asyncio
+import os
+import sys
+import traceback
+from typing import Any, Awaitable, BinaryIO, Callable, List, Sequence
+
+import rdfc
+import rdfc.runtime
+import rdfc.util
+from rdfc.proto.intermediate_pb2 import Stage
+from .arguments import Arguments
+from .config import Config
+from .isolation import (
+    CLOSE,
+    DATA,
+    DONE,
+    ERROR,
+    EXEC,
+    INIT,
+    READ,
+    READER,
+    READY,
+    WRITER,
+    IsolationException,
+    connect,
+    encode,
+    pulls,
+    read_frame,
+    read_frame_async,
+    write_data,
+)
+
+Request = Callable[[], Awaitable[None]]
+
+
+class PullChannel(rdfc.util.Channel):
+    """A reader which requests a message from the runner whenever it is read."""
+
+    request: Request
+
+    def __init__(self, uri: str, request: Request, *args):
+        super().__init__(uri, *args)
+        self.request = request
+
+    async def __anext__(self) -> rdfc.Buffer:
+        await self.request()
+        return await super().__anext__()
+
+    async def read_object(self) -> Any:
+        await self.request()
+        return await super().read_object()
+
+    async def read_batch(
+        self, max_items: int = 0, max_bytes: int = 0, timeout: float = 0
+    ) -> List[rdfc.Buffer]:
+        await self.request()
+        return await super().read_batch(max_items, max_bytes, timeout)
+
+
+class PullStreamChannel(rdfc.util.StreamChannel):
+    """A stream reader which requests a message whenever it is read."""
+
+    request: Request
+
+    def __init__(self, uri: str, request: Request, *args):
+        super().__init__(uri, *args)
+        self.request = request
+
+    async def __anext__(self) -> rdfc.util.ChunkStream:
+        await self.request()
+        return await super().__anext__()
+
+
+class Worker(rdfc.runtime.ChannelRepository):
+    """
+    Hosts a single stage in a dedicated process on behalf of the runner. See
+    `ProcessStage` for the runner side of the protocol.
+    """
+
+    # The pipes to and from the runner.
+    incoming: BinaryIO
+    outgoing: BinaryIO
+
+    # Stream wrapper of `outgoing`, available during execution.
+    writer: asyncio.StreamWriter | None
+
+    # Local readers by channel URI.
+    readers: dict[str, List[rdfc.util.Channel | rdfc.util.StreamChannel]]
+
+    config: Config
+
+    # Whether messages are requested one by one, for stages with parallel
+    # workers.
+    pull: bool
+
+    def __init__(self, incoming: BinaryIO, outgoing: BinaryIO):
+        self.incoming = incoming
+        self.outgoing = outgoing
+        self.writer = None
+        self.readers = dict()
+        self.pull = False
+        self.config = Config.from_env()
+        rdfc.util.Wheel.mapped = self.config.wheel_mmap
+
+    def load(self) -> rdfc.Processor:
+        kind, uri, payload = read_frame(self.incoming)
+        if kind != INIT:
+            raise IsolationException(f"Expected initialization, got frame {kind}.")
+
+        stage = Stage()
+        stage.ParseFromString(payload)
+        self.pull = pulls(stage)
+
+        metadata = stage.processor.metadata
+        constructor = rdfc.util.Wheel.load(
+            stage.processor.entrypoint, metadata["module_name"], metadata["class_name"]
+        )
+        return constructor(Arguments(stage.arguments, self))
+
+    async def exec(self, processor: rdfc.Processor) -> None:
+        reader, self.writer = await connect(self.incoming, self.outgoing)
+
+        kind, _, _ = await read_frame_async(reader)
+        if kind != EXEC:
+            raise IsolationException(f"Expected execution, got frame {kind}.")
+
+        async def handle_incoming_messages():
+            while True:
+                try:
+                    kind, uri, payload = await read_frame_async(reader)
+                except asyncio.IncompleteReadError:
+                    # The runner is gone, so the readers will not receive
+                    # anything else.
+                    for channels in self.readers.values():
+                        for channel in channels:
+                            await channel.close()
+                    return
+                for channel in self.readers.get(uri, []):
+                    if kind == DATA:
+                        await channel.write(payload)
+                    elif kind == CLOSE:
+                        await channel.close()
+
+        incoming_message_task = asyncio.create_task(handle_incoming_messages())
+
+        try:
+            await processor.exec()
+            self.writer.write(encode(DONE))
+        except Exception:
+            self.writer.write(encode(ERROR, payload=traceback.format_exc().encode()))
+        finally:
+            await self.writer.drain()
+            incoming_message_task.cancel()
+
+    def _register(self, uri: str, channel):
+        self.readers.setdefault(uri, []).append(channel)
+        self.outgoing.write(encode(READER, uri))
+        return channel
+
+    def request(self, uri: str) -> Request:
+        async def request() -> None:
+            self.writer.write(encode(READ, uri))
+            await self.writer.drain()
+
+        return request
+
+    def create_reader(self, uri: str) -> rdfc.util.Channel:
+        capacity, byte_budget = self.config.limits(uri)
+        spill = self.config.spill(uri)
+        if self.pull:
+            channel = PullChannel(uri, self.request(uri), capacity, byte_budget, spill)
+        else:
+            channel = rdfc.util.Channel(uri, capacity, byte_budget, spill)
+        return self._register(uri, channel)
+
+    def create_stream_reader(self, uri: str) -> rdfc.util.StreamChannel:
+        capacity, byte_budget = self.config.limits(uri)
+        if self.pull:
+            channel = PullStreamChannel(uri, self.request(uri), capacity, byte_budget)
+        else:
+            channel = rdfc.util.StreamChannel(uri, capacity, byte_budget)
+        return self._register(uri, channel)
+
+    def create_writer(self, uri: str) -> rdfc.util.CallbackChannel:
+        self.outgoing.write(encode(WRITER, uri))
+
+        async def on_write(data: rdfc.Buffer) -> None:
+            write_data(self.writer, uri, data)
+            await self.writer.drain()
+
+        async def on_write_many(values: Sequence[rdfc.Buffer]) -> None:
+            for data in values:
+                write_data(self.writer, uri, data)
+            await self.writer.drain()
+
+        async def on_close() -> None:
+            self.writer.write(encode(CLOSE, uri))
+            await self.writer.drain()
+
+        return rdfc.util.CallbackChannel(on_write, on_close, on_write_many)
+
+
+def main() -> int:
+    incoming = os.fdopen(int(sys.argv[1]), "rb", buffering=0)
+    outgoing = os.fdopen(int(sys.argv[2]), "wb", buffering=0)
+    worker = Worker(incoming, outgoing)
+
+    try:
+        processor = worker.load()
+    except Exception:
+        outgoing.write(encode(ERROR, payload=traceback.format_exc().encode()))
+        return 1
+
+    outgoing.write(encode(READY))
+    asyncio.run(worker.exec(processor))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+Load generator for the runner, which takes the place of the orchestrator.
+
+    python -m rdfc.loadgen [--stages 3] [--rate 5000] [--duration 10] [--size 1024]
+
+A runner is started in a separate process and loaded with a chain of stages,
+of which the messages are routed by this process just like the orchestrator
+would. Synthetic messages are pushed into the first channel at the target rate,
+and timed until they leave the last one. Runner settings are taken from the
+`RDFC_*` environment variables as usual.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+import rdfc
+
+# Messages start with the time at which they were sent, in nanoseconds.
+STAMP = struct.Struct("!Q")
+
+
+class Forward(rdfc.Processor):
+    """Passes messages on unchanged, which is the default stage under load."""
+
+    incoming: rdfc.Reader
+    outgoing: rdfc.Writer
+
+    def __init__(self, args: rdfc.Arguments):
+        self.incoming = args.reader("incoming")
+        self.outgoing = args.writer("outgoing")
+
+    async def exec(self):
+        async for message in self.incoming:
+            await self.outgoing.write(message)
+        await self.outgoing.close()
+
+
+def rss(pid: int) -> int:
+    """The resident set size of a process in bytes, or zero if unknown."""
+    try:
+        with open(f"/proc/{pid}/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def percentile(values: List[int], fraction: float) -> float:
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def channel(index: int) -> str:
+    return f"http://example.com/loadgen/channel/{index}"
+
+
+async def generate(args: argparse.Namespace, target: str, pid: int) -> dict:
+    import grpc
+    from rdfc.proto.channel_pb2 import ChannelMessage, ChannelMessageType
+    from rdfc.proto.index_pb2_grpc import RunnerStub
+    from rdfc.proto.intermediate_pb2 import Stage
+
+    first, last = channel(0), channel(args.stages)
+
+    async with grpc.aio.insecure_channel(target) as connection:
+        await asyncio.wait_for(connection.channel_ready(), timeout=30)
+        stub = RunnerStub(connection)
+
+        # Load a chain of stages, of which each reads the output of the previous.
+        loads = []
+        for index in range(args.stages):
+            stage = Stage(uri=f"http://example.com/loadgen/stage/{index}")
+            stage.processor.uri = "http://example.com/loadgen/processor"
+            stage.processor.entrypoint = args.entrypoint
+            stage.processor.metadata["module_name"] = args.module
+            stage.processor.metadata["class_name"] = args.cls
+            for key, value in args.metadata:
+                stage.processor.metadata[key] = value
+            stage.arguments["incoming"].literal.reader.uri = channel(index)
+            stage.arguments["outgoing"].literal.writer.uri = channel(index + 1)
+            loads.append(stub.load(stage))
+        await asyncio.gather(*loads)
+
+        call = stub.exec()
+
+        # Writes to the call may not overlap, so they all go through one task.
+        outbox: asyncio.Queue[ChannelMessage | None] = asyncio.Queue()
+
+        async def write():
+            while (message := await outbox.get()) is not None:
+                await call.write(message)
+            await call.done_writing()
+
+        def data(uri: str, payload: bytes) -> ChannelMessage:
+            message = ChannelMessage(type=ChannelMessageType.DATA)
+            message.channel.uri = uri
+            message.data.bytes = payload
+            return message
+
+        def close(uri: str) -> ChannelMessage:
+            message = ChannelMessage(type=ChannelMessageType.CLOSE)
+            message.channel.uri = uri
+            return message
+
+        # Send messages at the target rate, catching up in bursts if the event
+        # loop falls behind. At most `window` messages are in the pipeline at
+        # once, so that an unlimited rate measures the capacity of the runner
+        # rather than the size of the queues.
+        padding = bytes(max(0, args.size - STAMP.size))
+        window = asyncio.Semaphore(args.window)
+        sent = 0
+
+        async def send():
+            nonlocal sent
+            start = time.perf_counter()
+            while (elapsed := time.perf_counter() - start) < args.duration:
+                due = int(elapsed * args.rate) + 1 if args.rate else sent + 1
+                while sent < due:
+                    await window.acquire()
+                    stamp = STAMP.pack(time.perf_counter_ns())
+                    await outbox.put(data(first, stamp + padding))
+                    sent += 1
+                if args.rate:
+                    await asyncio.sleep(max(0.0, sent / args.rate - elapsed))
+            await outbox.put(close(first))
+
+        # Sample the memory usage of the runner.
+        memory: List[int] = []
+
+        async def sample():
+            while True:
+                memory.append(rss(pid))
+                await asyncio.sleep(0.1)
+
+        writer = asyncio.create_task(write())
+        sender = asyncio.create_task(send())
+        sampler = asyncio.create_task(sample())
+
+        latencies: List[int] = []
+        received = 0
+        start = time.perf_counter()
+
+        # Route messages between the stages, and time those leaving the chain.
+        while (message := await call.read()) != grpc.aio.EOF:
+            uri = message.channel.uri
+            if uri != last:
+                await outbox.put(message)
+            elif message.type == ChannelMessageType.DATA:
+                stamp = STAMP.unpack_from(message.data.bytes)[0]
+                latencies.append(time.perf_counter_ns() - stamp)
+                received += 1
+                window.release()
+
+        elapsed = time.perf_counter() - start
+        await sender
+        await outbox.put(None)
+        await writer
+        sampler.cancel()
+        memory.append(rss(pid))
+
+    latencies.sort()
+    return {
+        "stages": args.stages,
+        "size": args.size,
+        "rate": args.rate,
+        "transport": "unix" if args.unix else "tcp",
+        "sent": sent,
+        "received": received,
+        "seconds": elapsed,
+        "throughput": received / elapsed,
+        "megabytes_per_second": received * args.size / elapsed / 1e6,
+        "latency_p50_ms": percentile(latencies, 0.50) / 1e6,
+        "latency_p99_ms": percentile(latencies, 0.99) / 1e6,
+        "latency_p999_ms": percentile(latencies, 0.999) / 1e6,
+        "latency_max_ms": (latencies[-1] if latencies else 0) / 1e6,
+        "rss_start_mb": memory[0] / 1e6 if memory else 0,
+        "rss_peak_mb": max(memory) / 1e6 if memory else 0,
+        "rss_end_mb": memory[-1] / 1e6 if memory else 0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m rdfc.loadgen")
+    parser.add_argument("--stages", type=int, default=1, help="length of the chain")
+    parser.add_argument(
+        "--rate", type=float, default=0, help="messages per second, zero for unlimited"
+    )
+    parser.add_argument("--duration", type=float, default=10, help="seconds of load")
+    parser.add_argument("--size", type=int, default=1024, help="message size in bytes")
+    parser.add_argument(
+        "--window", type=int, default=1024, help="maximum number of messages in flight"
+    )
+    parser.add_argument(
+        "--entrypoint",
+        default=str(pathlib.Path(__file__).resolve().parent.parent),
+        help="directory or wheel of the processor",
+    )
+    parser.add_argument("--module", default="rdfc.loadgen", help="processor module")
+    parser.add_argument(
+        "--class", dest="cls", default="Forward", help="processor class"
+    )
+    parser.add_argument(
+        "--metadata",
+        action="append",
+        default=[],
+        type=lambda value: tuple(value.split("=", 1)),
+        metavar="KEY=VALUE",
+        help="additional processor metadata, such as execution=process",
+    )
+    parser.add_argument(
+        "--unix", action="store_true", help="connect over a Unix domain socket"
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.unix:
+            target = f"unix://{directory}/runner.sock"
+            address = [target]
+        else:
+            port = free_port()
+            target = f"127.0.0.1:{port}"
+            address = ["127.0.0.1", str(port)]
+
+        runner = subprocess.Popen(
+            [sys.executable, "-m", "rdfc", *address], stdout=subprocess.DEVNULL
+        )
+
+        try:
+            report = asyncio.run(generate(args, target, runner.pid))
+        finally:
+            runner.terminate()
+            runner.wait()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print(
+                f"{key:<24} {value:.3f}"
+                if isinstance(value, float)
+                else f"{key:<24} {value}"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    # The generated modules import each other by their bare names.
+    sys.path.append(os.path.join(os.path.dirname(__file__), "proto"))
+    sys.exit(main())
@@ -1,13 +1,27 @@
+from .buffer import Buffer, nbytes
+from .object_message import ObjectMessage
 from .reader import Reader
+from .stream_reader import MessageStream, StreamReader
 from .writer import Writer
 from .arguments import Arguments
 from .repository import ChannelRepository
 from .processor import Processor
+from .sync import LoopRepository, SyncProcessor, SyncReader, SyncWriter, ThreadPool
 
 __all__ = [
     "Arguments",
+    "Buffer",
     "ChannelRepository",
+    "LoopRepository",
+    "MessageStream",
+    "ObjectMessage",
     "Processor",
     "Reader",
+    "StreamReader",
+    "SyncProcessor",
+    "SyncReader",
+    "SyncWriter",
+    "ThreadPool",
     "Writer",
+    "nbytes",
 ]
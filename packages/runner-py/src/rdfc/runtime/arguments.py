@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 from typing import Any
 from .writer import Writer
 from .reader import Reader
+from .stream_reader import StreamReader
 
 
 class Arguments(ABC):
@@ -28,3 +29,8 @@ class Arguments(ABC):
     @abstractmethod
     def reader(self, key: str) -> Reader:
         raise NotImplementedError()
+
+    def stream_reader(self, key: str) -> StreamReader:
+        raise NotImplementedError(
+            f"{type(self).__name__} does not provide stream readers: {key}"
+        )
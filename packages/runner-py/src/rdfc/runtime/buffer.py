@@ -0,0 +1,9 @@
+# Messages may be passed as any of these buffer types. Buffers are shared with
+# every reader of a channel as is, so a writer must not modify a buffer after
+# it has been written.
+Buffer = bytes | bytearray | memoryview
+
+
+def nbytes(value: Buffer) -> int:
+    """The size of a buffer in bytes, which is not the length of every view."""
+    return value.nbytes if isinstance(value, memoryview) else len(value)
@@ -0,0 +1,31 @@
+from typing import Any, Callable
+
+from .buffer import Buffer
+
+
+class ObjectMessage:
+    """
+    A message which is passed between stages in the same process as a live
+    object, such as an `rdflib.Graph`. It is only serialized once a reader asks
+    for bytes, or once it leaves the process, and at most once.
+    """
+
+    value: Any
+    serialize: Callable[[Any], Buffer]
+
+    # Size by which the message counts against the byte budget of a channel.
+    size: int
+
+    # The serialized form, once it was needed.
+    serialized: Buffer | None
+
+    def __init__(self, value: Any, serialize: Callable[[Any], Buffer], size: int = 0):
+        self.value = value
+        self.serialize = serialize
+        self.size = size
+        self.serialized = None
+
+    def data(self) -> Buffer:
+        if self.serialized is None:
+            self.serialized = self.serialize(self.value)
+        return self.serialized
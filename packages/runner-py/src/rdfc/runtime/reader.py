@@ -1,16 +1,53 @@
 from abc import ABC, abstractmethod
-from typing import AsyncIterator
+from typing import Any, AsyncIterator, List
+
+from .buffer import Buffer
 
 
 class Reader(ABC):
     @abstractmethod
-    def __aiter__(self) -> AsyncIterator[bytes]:
+    def __aiter__(self) -> AsyncIterator[Buffer]:
         raise NotImplementedError()
 
     @abstractmethod
-    async def __anext__(self) -> bytes:
+    async def __anext__(self) -> Buffer:
         raise NotImplementedError()
 
     @abstractmethod
     def is_closed(self) -> bool:
         raise NotImplementedError()
+
+    async def read_batch(
+        self, max_items: int = 0, max_bytes: int = 0, timeout: float = 0
+    ) -> List[Buffer]:
+        """
+        Wait for at least one message, and return it along with the messages
+        which are available by then, up to `max_items` messages and
+        `max_bytes` bytes. A positive `timeout` waits up to that many seconds
+        for an incomplete batch to fill up. An empty batch marks the end of the
+        channel.
+
+        This default implementation returns a single message at a time.
+        """
+        try:
+            return [await self.__anext__()]
+        except StopAsyncIteration:
+            return []
+
+    async def read_object(self) -> Any:
+        """
+        Read the next message like `__anext__`, but as the live object if a
+        writer in the same process passed an `ObjectMessage`. Otherwise, the
+        serialized message is returned, so callers must handle both.
+
+        This default implementation always returns the serialized message.
+        """
+        return await self.__anext__()
+
+    async def objects(self) -> AsyncIterator[Any]:
+        """Iterate over the messages as given by `read_object`."""
+        while True:
+            try:
+                yield await self.read_object()
+            except StopAsyncIteration:
+                return
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from .reader import Reader
+from .stream_reader import StreamReader
 from .writer import Writer
 
 
@@ -11,3 +12,8 @@ class ChannelRepository(ABC):
     @abstractmethod
     def create_writer(self, uri: str) -> Writer:
         raise NotImplementedError()
+
+    def create_stream_reader(self, uri: str) -> StreamReader:
+        raise NotImplementedError(
+            f"{type(self).__name__} does not provide stream readers: {uri}"
+        )
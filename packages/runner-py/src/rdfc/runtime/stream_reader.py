@@ -0,0 +1,35 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+
+class MessageStream(ABC):
+    """A single message, of which the contents are received in chunks."""
+
+    @abstractmethod
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def __anext__(self) -> bytes:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def read(self) -> bytes:
+        """Wait for all remaining chunks and return them as a whole."""
+        raise NotImplementedError()
+
+
+class StreamReader(ABC):
+    """A reader which yields messages before they are received entirely."""
+
+    @abstractmethod
+    def __aiter__(self) -> AsyncIterator[MessageStream]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def __anext__(self) -> MessageStream:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def is_closed(self) -> bool:
+        raise NotImplementedError()
@@ -0,0 +1,194 @@
+import asyncio
+import functools
+import threading
+from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Iterable, Iterator, List, TypeVar
+
+from .buffer import Buffer
+from .processor import Processor
+from .reader import Reader
+from .repository import ChannelRepository
+from .stream_reader import StreamReader
+from .writer import Writer
+
+T = TypeVar("T")
+
+
+class ThreadPool:
+    """A shared thread pool on which blocking processor code is executed."""
+
+    executor: ThreadPoolExecutor | None = None
+    max_workers: int | None = None
+
+    @staticmethod
+    def configure(max_workers: int | None) -> None:
+        """Set the size of the pool, `None` uses the default of the standard library."""
+        if ThreadPool.executor is not None:
+            ThreadPool.executor.shutdown(wait=False)
+            ThreadPool.executor = None
+        ThreadPool.max_workers = max_workers
+
+    @staticmethod
+    def get() -> ThreadPoolExecutor:
+        if ThreadPool.executor is None:
+            ThreadPool.executor = ThreadPoolExecutor(
+                max_workers=ThreadPool.max_workers, thread_name_prefix="rdfc"
+            )
+        return ThreadPool.executor
+
+    @staticmethod
+    async def run(function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking function on the pool without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(function, *args, **kwargs)
+        return await loop.run_in_executor(ThreadPool.get(), call)
+
+    @staticmethod
+    async def dedicated(function: Callable[..., T], *args: Any) -> T:
+        """
+        Run a blocking function on a thread of its own, for functions which
+        block for the lifetime of a stage and would otherwise hold on to a
+        thread of the pool.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[T] = loop.create_future()
+
+        def settle(exception: BaseException | None, result: Any) -> None:
+            if future.done():
+                return
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+
+        def target() -> None:
+            try:
+                result = function(*args)
+            except BaseException as exception:
+                loop.call_soon_threadsafe(settle, exception, None)
+            else:
+                loop.call_soon_threadsafe(settle, None, result)
+
+        threading.Thread(target=target, name="rdfc-stage", daemon=True).start()
+        return await future
+
+
+class _Bridge:
+    """Runs coroutines on the event loop from a worker thread, and waits for them."""
+
+    loop: asyncio.AbstractEventLoop
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+
+    def call(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        # Waiting on the event loop from within itself would never return.
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+        coroutine.close()
+        raise RuntimeError("Blocking channel used from within an event loop.")
+
+
+class SyncReader(_Bridge):
+    """A blocking view of a reader, which may be used from any thread except the event loop."""
+
+    reader: Reader
+
+    def __init__(self, reader: Reader, loop: asyncio.AbstractEventLoop):
+        super().__init__(loop)
+        self.reader = reader
+
+    def __iter__(self) -> Iterator[Buffer]:
+        return self
+
+    def __next__(self) -> Buffer:
+        try:
+            return self.call(self.reader.__anext__())
+        except StopAsyncIteration:
+            raise StopIteration
+
+    def read_batch(
+        self, max_items: int = 0, max_bytes: int = 0, timeout: float = 0
+    ) -> List[Buffer]:
+        """See `Reader.read_batch`, which saves a round-trip to the event loop per message."""
+        return self.call(self.reader.read_batch(max_items, max_bytes, timeout))
+
+    def is_closed(self) -> bool:
+        return self.reader.is_closed()
+
+
+class SyncWriter(_Bridge):
+    """A blocking view of a writer, which may be used from any thread except the event loop."""
+
+    writer: Writer
+
+    def __init__(self, writer: Writer, loop: asyncio.AbstractEventLoop):
+        super().__init__(loop)
+        self.writer = writer
+
+    def write(self, value: Buffer) -> None:
+        self.call(self.writer.write(value))
+
+    def write_many(self, values: Iterable[Buffer]) -> None:
+        self.call(self.writer.write_many(list(values)))
+
+    def close(self) -> None:
+        self.call(self.writer.close())
+
+    def is_closed(self) -> bool:
+        return self.writer.is_closed()
+
+
+async def _create(create: Callable[[str], T], uri: str) -> T:
+    return create(uri)
+
+
+class LoopRepository(_Bridge, ChannelRepository):
+    """
+    A view of a repository for code on a worker thread, such as constructors
+    which are loaded in parallel, which creates the channels on the event loop.
+    """
+
+    repository: ChannelRepository
+
+    def __init__(self, repository: ChannelRepository, loop: asyncio.AbstractEventLoop):
+        super().__init__(loop)
+        self.repository = repository
+
+    def create_reader(self, uri: str) -> Reader:
+        return self.call(_create(self.repository.create_reader, uri))
+
+    def create_writer(self, uri: str) -> Writer:
+        return self.call(_create(self.repository.create_writer, uri))
+
+    def create_stream_reader(self, uri: str) -> StreamReader:
+        return self.call(_create(self.repository.create_stream_reader, uri))
+
+
+class SyncProcessor(Processor):
+    """
+    A processor for synchronous code, such as wrappers around blocking
+    libraries. Its `run` method is executed on a thread of its own, so that
+    chained stages never wait for each other to release a thread of the
+    pool, and may use `sync_reader` and `sync_writer` to access its channels.
+    """
+
+    loop: asyncio.AbstractEventLoop
+
+    @abstractmethod
+    def run(self):
+        raise NotImplementedError()
+
+    async def exec(self):
+        self.loop = asyncio.get_running_loop()
+        await ThreadPool.dedicated(self.run)
+
+    def sync_reader(self, reader: Reader) -> SyncReader:
+        return SyncReader(reader, self.loop)
+
+    def sync_writer(self, writer: Writer) -> SyncWriter:
+        return SyncWriter(writer, self.loop)
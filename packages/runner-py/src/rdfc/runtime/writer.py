@@ -1,11 +1,30 @@
 from abc import ABC, abstractmethod
+from typing import Iterable
+
+from .buffer import Buffer
+from .object_message import ObjectMessage
 
 
 class Writer(ABC):
     @abstractmethod
-    async def write(self, value: bytes) -> None:
+    async def write(self, value: Buffer) -> None:
         raise NotImplementedError()
 
+    async def write_many(self, values: Iterable[Buffer]) -> None:
+        """
+        Write multiple messages in order, which implementations may hand on in
+        a single step.
+        """
+        for value in values:
+            await self.write(value)
+
+    async def write_object(self, message: ObjectMessage) -> None:
+        """
+        Write a live object, which local readers may take as is. This default
+        implementation writes its serialized form.
+        """
+        await self.write(message.data())
+
     @abstractmethod
     async def close(self) -> None:
         raise NotImplementedError()
@@ -1,6 +1,43 @@
+from .bounded_queue import BoundedQueue, Usage
 from .callback_channel import CallbackChannel
 from .channel import Channel
+from .codec import (
+    BinaryCodec,
+    Codec,
+    CodecException,
+    RdflibCodec,
+    decode_graph,
+    encode_graph,
+    find_codec,
+    register_codec,
+)
+from .parallel import Parallel, Sequencer, SharedChannels, WorkerChannels
+from .spill import Spill, SpillQueue
+from .stream_channel import ChunkStream, StreamChannel
 from .wheel import Wheel
 from .dictionary_arguments import DictionaryArguments
 
-__all__ = ["CallbackChannel", "Channel", "Wheel", "DictionaryArguments"]
+__all__ = [
+    "BoundedQueue",
+    "CallbackChannel",
+    "Channel",
+    "BinaryCodec",
+    "Codec",
+    "CodecException",
+    "RdflibCodec",
+    "decode_graph",
+    "encode_graph",
+    "find_codec",
+    "register_codec",
+    "ChunkStream",
+    "Parallel",
+    "Sequencer",
+    "SharedChannels",
+    "Spill",
+    "SpillQueue",
+    "StreamChannel",
+    "Wheel",
+    "DictionaryArguments",
+    "Usage",
+    "WorkerChannels",
+]
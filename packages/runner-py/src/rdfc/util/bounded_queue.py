@@ -0,0 +1,208 @@
+import asyncio
+import collections
+import typing
+
+T = typing.TypeVar("T")
+
+
+class Usage(typing.NamedTuple):
+    # Number of items currently buffered.
+    items: int
+    # Total size in bytes of the buffered items.
+    bytes: int
+    # Maximum number of items, or zero if unbounded.
+    capacity: int
+    # Maximum number of bytes, or zero if unbounded.
+    byte_budget: int
+    # Number of items spilled to disk which are still queued, and in total.
+    spilled: int = 0
+    spilled_total: int = 0
+    # Size of the files on disk which hold the spilled items.
+    disk_bytes: int = 0
+
+    @property
+    def fill(self) -> float:
+        """The highest relative fill level of both limits, in [0, 1]."""
+        ratios = [0.0]
+        if self.capacity > 0:
+            ratios.append(self.items / self.capacity)
+        if self.byte_budget > 0:
+            ratios.append(self.bytes / self.byte_budget)
+        return min(max(ratios), 1.0)
+
+
+class BoundedQueue(typing.Generic[T]):
+    """
+    A FIFO queue which is bounded both by the number of items and by the total
+    size of the items in bytes. Calls to `put` suspend while either limit is
+    reached, which propagates backpressure to the producer. A limit of zero
+    disables that bound.
+
+    An item which is larger than the byte budget on its own is still accepted
+    when the queue is empty, otherwise it would never be delivered.
+    """
+
+    items: collections.deque[tuple[T, int]]
+    bytes: int
+    capacity: int
+    byte_budget: int
+    size_of: typing.Callable[[T], int]
+
+    def __init__(
+        self,
+        capacity: int = 0,
+        byte_budget: int = 0,
+        size_of: typing.Callable[[T], int] = len,
+    ):
+        self.items = collections.deque()
+        self.bytes = 0
+        self.capacity = capacity
+        self.byte_budget = byte_budget
+        self.size_of = size_of
+
+        # Futures of suspended consumers and producers respectively.
+        self.getters: collections.deque[asyncio.Future] = collections.deque()
+        self.putters: collections.deque[asyncio.Future] = collections.deque()
+
+    def _is_full(self, size: int) -> bool:
+        if self.capacity > 0 and len(self.items) >= self.capacity:
+            return True
+
+        if self.byte_budget > 0 and self.bytes > 0:
+            return self.bytes + size > self.byte_budget
+
+        return False
+
+    @staticmethod
+    def _wakeup_next(waiters: collections.deque[asyncio.Future]) -> None:
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    @staticmethod
+    async def _wait(waiters: collections.deque[asyncio.Future]) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        waiters.append(waiter)
+
+        try:
+            await waiter
+        except BaseException:
+            waiter.cancel()
+            try:
+                waiters.remove(waiter)
+            except ValueError:
+                pass
+            raise
+
+    async def put(self, item: T, size: int | None = None) -> None:
+        """Enqueue an item, of which the size may be given if already known."""
+        if size is None:
+            size = self.size_of(item)
+
+        while self._is_full(size):
+            try:
+                await self._wait(self.putters)
+            except BaseException:
+                # Pass on the wakeup we might have consumed.
+                if not self._is_full(size):
+                    self._wakeup_next(self.putters)
+                raise
+
+        self._append(item, size)
+
+        # Freed space may allow more than a single producer to continue.
+        if self.putters and not self._is_full(0):
+            self._wakeup_next(self.putters)
+
+    def put_nowait(self, item: T, size: int | None = None) -> None:
+        """Enqueue an item regardless of the configured limits."""
+        self._append(item, self.size_of(item) if size is None else size)
+
+    def _append(self, item: T, size: int) -> None:
+        self.items.append((item, size))
+        self.bytes += size
+        self._wakeup_next(self.getters)
+
+    async def get(self) -> T:
+        await self._wait_for_items()
+        return self.get_nowait()
+
+    def get_nowait(self) -> T:
+        item, size = self.items.popleft()
+        self.bytes -= size
+        self._wakeup_next(self.putters)
+        return item
+
+    async def get_batch(
+        self, max_items: int = 0, max_bytes: int = 0, linger: float = 0
+    ) -> list[T]:
+        """
+        Wait for at least one item, and drain every item that is queued at that
+        point in a single step. At most `max_items` items and `max_bytes` bytes
+        are returned, but the first item is always included. If `linger` is
+        positive, the call waits up to that many seconds for an incomplete batch
+        to fill up.
+        """
+        while True:
+            await self._wait_for_items()
+
+            if linger > 0 and not self._batch_full(max_items, max_bytes):
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + linger
+                while not self._batch_full(max_items, max_bytes):
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        await asyncio.wait_for(self._wait(self.getters), timeout)
+                    except TimeoutError:
+                        break
+
+            # Another consumer may have taken every item in the meantime.
+            if self.items:
+                break
+
+        batch: list[T] = []
+        size = 0
+        while self.items:
+            _, next_size = self.items[0]
+            if batch and max_items > 0 and len(batch) >= max_items:
+                break
+            if batch and max_bytes > 0 and size + next_size > max_bytes:
+                break
+            batch.append(self.get_nowait())
+            size += next_size
+
+        # Lingering may have consumed the wakeup of another consumer.
+        if self.items:
+            self._wakeup_next(self.getters)
+
+        return batch
+
+    def _batch_full(self, max_items: int, max_bytes: int) -> bool:
+        if max_items > 0 and len(self.items) >= max_items:
+            return True
+        if max_bytes > 0 and self.bytes >= max_bytes:
+            return True
+        # Producers cannot add anything while the queue itself is full.
+        return self._is_full(0)
+
+    async def _wait_for_items(self) -> None:
+        while not self.items:
+            try:
+                await self._wait(self.getters)
+            except BaseException:
+                if self.items:
+                    self._wakeup_next(self.getters)
+                raise
+
+    def qsize(self) -> int:
+        return len(self.items)
+
+    def empty(self) -> bool:
+        return len(self.items) == 0
+
+    def usage(self) -> Usage:
+        return Usage(len(self.items), self.bytes, self.capacity, self.byte_budget)
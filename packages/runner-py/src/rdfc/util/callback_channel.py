@@ -1,7 +1,15 @@
 import rdfc
 import typing
 
-OnWrite = typing.Callable[[bytes], typing.Coroutine[typing.Any, typing.Any, None]]
+OnWrite = typing.Callable[
+    [rdfc.Buffer], typing.Coroutine[typing.Any, typing.Any, None]
+]
+OnWriteMany = typing.Callable[
+    [typing.Sequence[rdfc.Buffer]], typing.Coroutine[typing.Any, typing.Any, None]
+]
+OnWriteObject = typing.Callable[
+    [rdfc.ObjectMessage], typing.Coroutine[typing.Any, typing.Any, None]
+]
 OnClose = typing.Callable[[], typing.Coroutine[typing.Any, typing.Any, None]]
 
 
@@ -10,17 +18,42 @@ class CallbackChannel(rdfc.Writer):
     on_write: OnWrite
     on_close: OnClose
 
+    # Handles multiple messages at once, if given. Otherwise `on_write` is
+    # called for each of them.
+    on_write_many: OnWriteMany | None
+
+    # Handles live objects, if given. Otherwise they are serialized and passed
+    # to `on_write`.
+    on_write_object: OnWriteObject | None
+
     def __init__(
         self,
         on_write: OnWrite,
         on_close: OnClose,
+        on_write_many: OnWriteMany | None = None,
+        on_write_object: OnWriteObject | None = None,
     ):
         self.on_write = on_write
         self.on_close = on_close
+        self.on_write_many = on_write_many
+        self.on_write_object = on_write_object
 
-    async def write(self, value: bytes) -> None:
+    async def write(self, value: rdfc.Buffer) -> None:
         await self.on_write(value)
 
+    async def write_many(self, values: typing.Iterable[rdfc.Buffer]) -> None:
+        if self.on_write_many is None:
+            for value in values:
+                await self.on_write(value)
+        else:
+            await self.on_write_many(list(values))
+
+    async def write_object(self, message: rdfc.ObjectMessage) -> None:
+        if self.on_write_object is None:
+            await self.on_write(message.data())
+        else:
+            await self.on_write_object(message)
+
     async def close(self) -> None:
         if self.closed is False:
             self.closed = True
@@ -1,40 +1,119 @@
-import asyncio
 import rdfc
 import typing
+from rdfc.runtime import ObjectMessage, nbytes
+
+from .bounded_queue import BoundedQueue, Usage
+from .spill import Spill, SpillQueue
+
+
+Message = rdfc.Buffer | ObjectMessage
+
+
+def _size_of(value: Message | None) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, ObjectMessage):
+        return value.size
+    return nbytes(value)
+
+
+def _data(value: Message) -> rdfc.Buffer:
+    return value.data() if isinstance(value, ObjectMessage) else value
 
 
 class Channel(rdfc.Reader, rdfc.Writer):
-    queue: asyncio.Queue
+    """
+    A queue of messages between a writer and a reader. Messages are passed on
+    as the very same object that was written, without copying.
+
+    Live objects are kept as such, and only serialized when they are read as
+    bytes or spilled to disk.
+    """
+
+    queue: BoundedQueue[Message | None]
     closed: bool
     uri: str
 
-    def __init__(self, uri: str):
-        self.queue = asyncio.Queue()
+    def __init__(
+        self,
+        uri: str,
+        capacity: int = 0,
+        byte_budget: int = 0,
+        spill: Spill | None = None,
+    ):
+        # With `spill`, messages beyond the limits are written to disk instead
+        # of suspending the writer.
+        if spill is None:
+            self.queue = BoundedQueue(capacity, byte_budget, _size_of)
+        else:
+            self.queue = SpillQueue(capacity, byte_budget, _size_of, spill, _data)
         self.closed = False
         self.uri = uri
 
-    def __aiter__(self) -> typing.AsyncIterator[bytes]:
+    def __aiter__(self) -> typing.AsyncIterator[rdfc.Buffer]:
         return self
 
-    async def __anext__(self) -> bytes:
-        while True:
-            value = await self.queue.get()
+    async def __anext__(self) -> rdfc.Buffer:
+        value = await self.queue.get()
+
+        if value is None:
+            # Keep the end marker in place for subsequent reads.
+            self.queue.put_nowait(None)
+            raise StopAsyncIteration
+
+        return _data(value)
+
+    async def read_object(self) -> typing.Any:
+        value = await self.queue.get()
 
-            if value is None:
-                raise StopAsyncIteration
+        if value is None:
+            # Keep the end marker in place for subsequent reads.
+            self.queue.put_nowait(None)
+            raise StopAsyncIteration
 
-            return value
+        return value.value if isinstance(value, ObjectMessage) else value
 
-    async def write(self, value: bytes) -> None:
+    async def read_batch(
+        self, max_items: int = 0, max_bytes: int = 0, timeout: float = 0
+    ) -> typing.List[rdfc.Buffer]:
+        batch = await self.queue.get_batch(max_items, max_bytes, timeout)
+
+        # The end-of-stream marker is always last, and kept in place for
+        # subsequent reads.
+        if batch[-1] is None:
+            batch.pop()
+            self.queue.put_nowait(None)
+
+        return [_data(value) for value in batch]
+
+    async def write(self, value: rdfc.Buffer) -> None:
         if self.closed:
             exit(1)
 
+        # Suspends while the channel is at capacity.
         await self.queue.put(value)
 
+    async def write_many(self, values: typing.Iterable[rdfc.Buffer]) -> None:
+        if self.closed:
+            exit(1)
+
+        for value in values:
+            await self.queue.put(value)
+
+    async def write_object(self, message: ObjectMessage) -> None:
+        if self.closed:
+            exit(1)
+
+        await self.queue.put(message)
+
     async def close(self) -> None:
         if self.closed is False:
             self.closed = True
-            await self.queue.put(None)
+            # The end-of-stream marker must never wait for capacity.
+            self.queue.put_nowait(None)
 
     def is_closed(self) -> bool:
         return self.closed
+
+    def usage(self) -> Usage:
+        return self.queue.usage()
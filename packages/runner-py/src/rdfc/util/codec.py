@@ -0,0 +1,257 @@
+import struct
+import sys
+from abc import ABC, abstractmethod
+from array import array
+from typing import TYPE_CHECKING, Any, Iterator
+
+import rdfc
+
+if TYPE_CHECKING:
+    import rdflib
+
+# Tagged payloads start with a byte which never starts UTF-8 text, followed by
+# the length of the content type and the content type itself. Payloads without
+# a tag are left to the reader, which usually assumes Turtle.
+TAG = 0xFF
+
+TURTLE = "text/turtle"
+NTRIPLES = "application/n-triples"
+BINARY = "application/x-rdfc-binary"
+
+
+class CodecException(Exception):
+    pass
+
+
+def _rdflib():
+    try:
+        import rdflib
+    except ImportError:
+        raise CodecException("RDF codecs require the `rdflib` package.")
+    return rdflib
+
+
+class Codec(ABC):
+    """Converts RDF graphs to and from the payload of a message."""
+
+    content_type: str
+
+    @abstractmethod
+    def encode(self, graph: "rdflib.Graph") -> bytes:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def decode(self, data: rdfc.Buffer) -> "rdflib.Graph":
+        raise NotImplementedError()
+
+
+class RdflibCodec(Codec):
+    """Any of the text formats which rdflib parses and serializes itself."""
+
+    # Name of the format according to rdflib.
+    format: str
+
+    def __init__(self, content_type: str, format: str):
+        self.content_type = content_type
+        self.format = format
+
+    def encode(self, graph: "rdflib.Graph") -> bytes:
+        return graph.serialize(format=self.format, encoding="utf-8")
+
+    def decode(self, data: rdfc.Buffer) -> "rdflib.Graph":
+        graph = _rdflib().Graph()
+        graph.parse(data=bytes(data), format=self.format)
+        return graph
+
+
+# The binary encoding starts with a magic number and a version, followed by
+# frames of at most `FRAME_TRIPLES` triples. Every frame first defines the terms
+# which were not used before, each of which is identified by its position in
+# the order of definition, and then lists the triples as identifiers. Frames
+# can therefore be decoded one after the other, while the terms which occur in
+# many triples are only stored once.
+MAGIC = b"RDFB\x01"
+FRAME = struct.Struct("<II")  # Number of new terms and of triples.
+TERM = struct.Struct("<BI")  # Kind and length of the lexical form.
+IDENTIFIER = struct.Struct("<I")
+FRAME_TRIPLES = 4096
+
+# Kinds of terms. Typed literals are followed by the identifier of their
+# datatype, literals with a language by its length in a byte and the tag.
+IRI = 0
+BLANK = 1
+LITERAL = 2
+TYPED_LITERAL = 3
+LANGUAGE_LITERAL = 4
+
+
+class BinaryCodec(Codec):
+    """A compact binary encoding with dictionary encoded terms."""
+
+    content_type = BINARY
+
+    def encode(self, graph: "rdflib.Graph") -> bytes:
+        rdflib = _rdflib()
+        Literal, BNode = rdflib.Literal, rdflib.BNode
+
+        identifiers: dict[Any, int] = dict()
+        chunks = [MAGIC]
+        terms: list[bytes] = []
+        triples = array("I")
+
+        def identify(term) -> int:
+            identifier = identifiers.get(term)
+            if identifier is not None:
+                return identifier
+
+            text = str(term).encode()
+            if isinstance(term, Literal):
+                if term.language:
+                    language = term.language.encode()
+                    extra = bytes([len(language)]) + language
+                    kind = LANGUAGE_LITERAL
+                elif term.datatype is not None:
+                    # The datatype is defined before the literal itself.
+                    extra = IDENTIFIER.pack(identify(term.datatype))
+                    kind = TYPED_LITERAL
+                else:
+                    extra = b""
+                    kind = LITERAL
+                terms.append(TERM.pack(kind, len(text)) + text + extra)
+            else:
+                kind = BLANK if isinstance(term, BNode) else IRI
+                terms.append(TERM.pack(kind, len(text)) + text)
+
+            identifier = identifiers[term] = len(identifiers)
+            return identifier
+
+        def flush():
+            if sys.byteorder != "little":
+                triples.byteswap()
+            chunks.append(FRAME.pack(len(terms), len(triples) // 3))
+            chunks.extend(terms)
+            chunks.append(triples.tobytes())
+            terms.clear()
+            del triples[:]
+
+        for subject, predicate, object in graph:
+            triples.append(identify(subject))
+            triples.append(identify(predicate))
+            triples.append(identify(object))
+            if len(triples) >= 3 * FRAME_TRIPLES:
+                flush()
+
+        if triples or terms:
+            flush()
+
+        return b"".join(chunks)
+
+    def triples(self, data: rdfc.Buffer) -> Iterator[tuple[Any, Any, Any]]:
+        """Decode the triples of a payload one frame at a time."""
+        rdflib = _rdflib()
+        URIRef, BNode, Literal = rdflib.URIRef, rdflib.BNode, rdflib.Literal
+
+        view = memoryview(data)
+        if view[: len(MAGIC)] != MAGIC:
+            raise CodecException("Payload is not in the binary RDF encoding.")
+
+        terms: list[Any] = []
+        offset = len(MAGIC)
+        try:
+            while offset < len(view):
+                defined, count = FRAME.unpack_from(view, offset)
+                offset += FRAME.size
+
+                for _ in range(defined):
+                    kind, length = TERM.unpack_from(view, offset)
+                    offset += TERM.size
+                    text = str(view[offset : offset + length], "utf-8")
+                    offset += length
+
+                    if kind == IRI:
+                        term = URIRef(text)
+                    elif kind == BLANK:
+                        term = BNode(text)
+                    elif kind == LITERAL:
+                        term = Literal(text)
+                    elif kind == TYPED_LITERAL:
+                        (datatype,) = IDENTIFIER.unpack_from(view, offset)
+                        offset += IDENTIFIER.size
+                        term = Literal(text, datatype=terms[datatype])
+                    elif kind == LANGUAGE_LITERAL:
+                        size = view[offset]
+                        language = str(view[offset + 1 : offset + 1 + size], "ascii")
+                        offset += 1 + size
+                        term = Literal(text, lang=language)
+                    else:
+                        raise CodecException(f"Unknown kind of term: {kind}")
+                    terms.append(term)
+
+                identifiers = array("I")
+                identifiers.frombytes(view[offset : offset + 12 * count])
+                if sys.byteorder != "little":
+                    identifiers.byteswap()
+                offset += 12 * count
+
+                for index in range(0, len(identifiers), 3):
+                    yield (
+                        terms[identifiers[index]],
+                        terms[identifiers[index + 1]],
+                        terms[identifiers[index + 2]],
+                    )
+        except (struct.error, IndexError, ValueError) as exception:
+            raise CodecException(f"Malformed binary RDF payload: {exception}")
+
+    def decode(self, data: rdfc.Buffer) -> "rdflib.Graph":
+        graph = _rdflib().Graph()
+        graph.addN((s, p, o, graph) for s, p, o in self.triples(data))
+        return graph
+
+
+# Codecs by content type.
+CODECS: dict[str, Codec] = dict()
+
+
+def register_codec(codec: Codec) -> None:
+    CODECS[codec.content_type] = codec
+
+
+def find_codec(content_type: str) -> Codec:
+    codec = CODECS.get(content_type)
+    if codec is None:
+        raise CodecException(f"No codec for content type: {content_type}")
+    return codec
+
+
+register_codec(RdflibCodec(TURTLE, "turtle"))
+register_codec(RdflibCodec(NTRIPLES, "nt"))
+register_codec(BinaryCodec())
+
+
+def tag(content_type: str, body: rdfc.Buffer) -> bytes:
+    """Prefix a payload with its content type."""
+    name = content_type.encode()
+    if len(name) > 255:
+        raise CodecException(f"Content type is too long: {content_type}")
+    return bytes([TAG, len(name)]) + name + body
+
+
+def untag(message: rdfc.Buffer) -> tuple[str | None, memoryview]:
+    """The content type of a payload, if it is tagged, and the payload itself."""
+    view = memoryview(message).cast("B")
+    if len(view) < 2 or view[0] != TAG:
+        return None, view
+
+    end = 2 + view[1]
+    return str(view[2:end], "ascii"), view[end:]
+
+
+def encode_graph(graph: "rdflib.Graph", content_type: str = BINARY) -> bytes:
+    """Serialize a graph as a tagged payload."""
+    return tag(content_type, find_codec(content_type).encode(graph))
+
+
+def decode_graph(message: rdfc.Buffer, default: str = TURTLE) -> "rdflib.Graph":
+    """Parse a payload with the codec of its tag, or `default` if it has none."""
+    content_type, body = untag(message)
+    return find_codec(content_type or default).decode(body)
@@ -3,6 +3,7 @@ from typing import Mapping, Any
 
 import rdfc
 from rdfc import Reader, Writer
+from rdfc.runtime import StreamReader
 
 
 class DictionaryArguments(rdfc.Arguments):
@@ -66,3 +67,11 @@ class DictionaryArguments(rdfc.Arguments):
             raise Exception(f"Argument '{key}' is not an instance of 'Reader'")
 
         return result
+
+    def stream_reader(self, key: str) -> StreamReader:
+        result = self._get(key)
+
+        if not isinstance(result, StreamReader):
+            raise Exception(f"Argument '{key}' is not an instance of 'StreamReader'")
+
+        return result
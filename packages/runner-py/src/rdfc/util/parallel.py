@@ -0,0 +1,297 @@
+import asyncio
+import typing
+
+import rdfc
+import rdfc.runtime
+
+Action = typing.Callable[[], typing.Awaitable[None]]
+
+
+class Sequencer:
+    """
+    Releases the outputs of parallel workers in the order of the messages they
+    were written for. Every message which a worker reads is numbered, and the
+    outputs of the worker are held back until those of all earlier messages
+    are released. A message is complete once its worker asks for the next one,
+    closes a writer or finishes.
+    """
+
+    # Number of the oldest message which is not released, and of the next
+    # message to be read.
+    head: int
+    tail: int
+
+    # Maximum number of messages which may be read before the oldest one is
+    # released, which bounds the outputs that are held back.
+    window: int
+
+    # Complete messages which wait for earlier ones.
+    completed: set[int]
+
+    # Outputs of messages which are not at the head yet.
+    held: dict[int, typing.List[Action]]
+
+    # Serializes writes and releases, and wakes up readers waiting for room.
+    condition: asyncio.Condition
+
+    def __init__(self, window: int):
+        self.head = 0
+        self.tail = 0
+        self.window = window
+        self.completed = set()
+        self.held = dict()
+        self.condition = asyncio.Condition()
+
+    def number(self) -> int:
+        number = self.tail
+        self.tail += 1
+        return number
+
+    async def admit(self) -> None:
+        """Wait until there is room in the window for another message."""
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.tail - self.head < self.window)
+
+    async def write(self, number: int | None, action: Action) -> None:
+        """Perform an output for a message, or hold it back until its turn."""
+        async with self.condition:
+            # Outputs before the first read of a worker are not ordered.
+            if number is None or number == self.head:
+                await action()
+            else:
+                self.held.setdefault(number, []).append(action)
+
+    async def complete(self, number: int | None) -> None:
+        if number is None:
+            return
+
+        async with self.condition:
+            self.completed.add(number)
+            while self.head in self.completed:
+                self.completed.remove(self.head)
+                self.head += 1
+                for action in self.held.pop(self.head, []):
+                    await action()
+            self.condition.notify_all()
+
+
+class SharedChannels:
+    """
+    The channels of a stage with parallel workers. Every reader and writer is
+    created once, and shared by the workers through views of their own.
+    """
+
+    repository: rdfc.runtime.ChannelRepository
+
+    # Orders the outputs by the order of the input, if requested.
+    sequencer: Sequencer | None
+
+    readers: dict[str, rdfc.Reader]
+    stream_readers: dict[str, rdfc.runtime.StreamReader]
+    writers: dict[str, rdfc.Writer]
+
+    # Number of views of every writer which are not closed yet. The writer
+    # itself is closed along with its last view.
+    views: dict[str, int]
+
+    def __init__(
+        self, repository: rdfc.runtime.ChannelRepository, workers: int, ordered: bool
+    ):
+        self.repository = repository
+        # Workers may run a few messages ahead of the slowest one.
+        self.sequencer = Sequencer(4 * workers) if ordered else None
+        self.readers = dict()
+        self.stream_readers = dict()
+        self.writers = dict()
+        self.views = dict()
+
+    def worker(self) -> "WorkerChannels":
+        return WorkerChannels(self)
+
+    async def close(self, uri: str) -> None:
+        self.views[uri] -= 1
+        if self.views[uri] == 0:
+            await self.writers[uri].close()
+
+
+class WorkerChannels(rdfc.runtime.ChannelRepository):
+    """The views of a single worker on the channels of a parallel stage."""
+
+    channels: SharedChannels
+
+    # Number of the message which the worker is processing, if ordered.
+    current: int | None
+
+    def __init__(self, channels: SharedChannels):
+        self.channels = channels
+        self.current = None
+
+    def create_reader(self, uri: str) -> rdfc.Reader:
+        reader = self.channels.readers.get(uri)
+        if reader is None:
+            reader = self.channels.repository.create_reader(uri)
+            self.channels.readers[uri] = reader
+        return SharedReader(self, reader)
+
+    def create_stream_reader(self, uri: str) -> rdfc.runtime.StreamReader:
+        reader = self.channels.stream_readers.get(uri)
+        if reader is None:
+            reader = self.channels.repository.create_stream_reader(uri)
+            self.channels.stream_readers[uri] = reader
+        return SharedStreamReader(self, reader)
+
+    def create_writer(self, uri: str) -> rdfc.Writer:
+        writer = self.channels.writers.get(uri)
+        if writer is None:
+            writer = self.channels.repository.create_writer(uri)
+            self.channels.writers[uri] = writer
+        self.channels.views[uri] = self.channels.views.get(uri, 0) + 1
+        return SharedWriter(self, uri, writer)
+
+    async def complete(self) -> None:
+        """The worker is done with its current message."""
+        if self.channels.sequencer is not None:
+            number, self.current = self.current, None
+            # Held outputs which are released must not be lost if the worker
+            # is cancelled meanwhile.
+            await asyncio.shield(self.channels.sequencer.complete(number))
+
+    async def advance(self) -> None:
+        """The worker is about to read the next message."""
+        await self.complete()
+        if self.channels.sequencer is not None:
+            await self.channels.sequencer.admit()
+
+    def read(self) -> None:
+        # Numbers are handed out right after a message is taken from the
+        # queue, without suspending in between, so they follow the input.
+        if self.channels.sequencer is not None:
+            self.current = self.channels.sequencer.number()
+
+    async def write(self, action: Action) -> None:
+        if self.channels.sequencer is None:
+            await action()
+        else:
+            await self.channels.sequencer.write(self.current, action)
+
+
+class SharedReader(rdfc.Reader):
+    """A view of a worker on a reader, of which every message goes to one worker."""
+
+    worker: WorkerChannels
+    reader: rdfc.Reader
+
+    def __init__(self, worker: WorkerChannels, reader: rdfc.Reader):
+        self.worker = worker
+        self.reader = reader
+
+    def __aiter__(self) -> typing.AsyncIterator[rdfc.Buffer]:
+        return self
+
+    async def __anext__(self) -> rdfc.Buffer:
+        await self.worker.advance()
+        value = await self.reader.__anext__()
+        self.worker.read()
+        return value
+
+    async def read_object(self) -> typing.Any:
+        await self.worker.advance()
+        value = await self.reader.read_object()
+        self.worker.read()
+        return value
+
+    async def read_batch(
+        self, max_items: int = 0, max_bytes: int = 0, timeout: float = 0
+    ) -> typing.List[rdfc.Buffer]:
+        # The outputs of a batch are ordered as a whole.
+        await self.worker.advance()
+        batch = await self.reader.read_batch(max_items, max_bytes, timeout)
+        if batch:
+            self.worker.read()
+        return batch
+
+    def is_closed(self) -> bool:
+        return self.reader.is_closed()
+
+
+class SharedStreamReader(rdfc.runtime.StreamReader):
+    """A view of a worker on a stream reader, see `SharedReader`."""
+
+    worker: WorkerChannels
+    reader: rdfc.runtime.StreamReader
+
+    def __init__(self, worker: WorkerChannels, reader: rdfc.runtime.StreamReader):
+        self.worker = worker
+        self.reader = reader
+
+    def __aiter__(self) -> typing.AsyncIterator[rdfc.runtime.MessageStream]:
+        return self
+
+    async def __anext__(self) -> rdfc.runtime.MessageStream:
+        await self.worker.advance()
+        stream = await self.reader.__anext__()
+        self.worker.read()
+        return stream
+
+    def is_closed(self) -> bool:
+        return self.reader.is_closed()
+
+
+class SharedWriter(rdfc.Writer):
+    """A view of a worker on a writer, which orders its writes if requested."""
+
+    worker: WorkerChannels
+    uri: str
+    writer: rdfc.Writer
+    closed: bool
+
+    def __init__(self, worker: WorkerChannels, uri: str, writer: rdfc.Writer):
+        self.worker = worker
+        self.uri = uri
+        self.writer = writer
+        self.closed = False
+
+    async def write(self, value: rdfc.Buffer) -> None:
+        await self.worker.write(lambda: self.writer.write(value))
+
+    async def write_many(self, values: typing.Iterable[rdfc.Buffer]) -> None:
+        values = list(values)
+        await self.worker.write(lambda: self.writer.write_many(values))
+
+    async def write_object(self, message: rdfc.ObjectMessage) -> None:
+        await self.worker.write(lambda: self.writer.write_object(message))
+
+    async def close(self) -> None:
+        if self.closed is False:
+            self.closed = True
+            await self.worker.complete()
+            await self.worker.channels.close(self.uri)
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+
+class Parallel(rdfc.Processor):
+    """
+    Runs multiple instances of a processor as the workers of a single stage.
+    Every worker reads the next message of the shared readers once it is done
+    with the previous one, so that independent messages are processed
+    concurrently. The writers are closed once every worker closed them.
+    """
+
+    workers: typing.List[tuple[rdfc.Processor, WorkerChannels]]
+
+    def __init__(self, workers: typing.List[tuple[rdfc.Processor, WorkerChannels]]):
+        self.workers = workers
+
+    async def exec(self):
+        async def run(processor: rdfc.Processor, channels: WorkerChannels):
+            try:
+                await processor.exec()
+            finally:
+                # Release the outputs of the last message of the worker.
+                await channels.complete()
+
+        await asyncio.gather(
+            *[run(processor, channels) for processor, channels in self.workers]
+        )
@@ -0,0 +1,211 @@
+import collections
+import mmap
+import struct
+import tempfile
+import typing
+
+import rdfc
+from rdfc.runtime import nbytes
+
+from .bounded_queue import BoundedQueue, Usage
+
+T = typing.TypeVar("T")
+
+# Every record starts with a flag which marks the end-of-stream marker `None`,
+# the size by which the item counts against the limits of the queue, and the
+# length of the encoded item which follows.
+RECORD = struct.Struct("!BQQ")
+
+
+class Spill(typing.NamedTuple):
+    # Directory of the segment files, `None` for the default temporary directory.
+    directory: str | None = None
+    # Size in bytes after which a new segment file is started.
+    segment_size: int = 64 * 1024 * 1024
+    # Maximum number of bytes on disk, zero for unbounded. Producers are
+    # suspended once it is reached, as if the queue was not spilling at all.
+    limit: int = 0
+
+
+class Segment:
+    """
+    An append-only file of records, which is read back through a memory
+    mapping. The file is unlinked from the start, so that the disk space is
+    released once it is closed, even if the runner crashes.
+    """
+
+    file: typing.BinaryIO
+
+    # Number of bytes appended, and the offset of the next record to read.
+    written: int
+    offset: int
+
+    # Read-only mapping of the first `len(mapping)` bytes of the file.
+    mapping: mmap.mmap | None
+
+    def __init__(self, directory: str | None):
+        self.file = tempfile.TemporaryFile(
+            prefix="rdfc-spill-", suffix=".seg", dir=directory
+        )
+        self.written = 0
+        self.offset = 0
+        self.mapping = None
+
+    def append(self, marker: bool, size: int, payload: rdfc.Buffer) -> None:
+        length = nbytes(payload)
+        self.file.write(RECORD.pack(marker, size, length))
+        self.file.write(payload)
+        self.written += RECORD.size + length
+
+    def exhausted(self) -> bool:
+        return self.offset >= self.written
+
+    def _mapped(self) -> mmap.mmap:
+        # The mapping only grows when the reader caught up with the writer.
+        if self.mapping is None or len(self.mapping) < self.written:
+            self.file.flush()
+            if self.mapping is not None:
+                self.mapping.close()
+            self.mapping = mmap.mmap(
+                self.file.fileno(), self.written, access=mmap.ACCESS_READ
+            )
+        return self.mapping
+
+    def peek(self) -> int:
+        """The size of the next record against the limits of the queue."""
+        _, size, _ = RECORD.unpack_from(self._mapped(), self.offset)
+        return size
+
+    def read(self) -> tuple[bool, int, bytes]:
+        mapping = self._mapped()
+        marker, size, length = RECORD.unpack_from(mapping, self.offset)
+        start = self.offset + RECORD.size
+        self.offset = start + length
+        return bool(marker), size, mapping[start : self.offset]
+
+    def close(self) -> None:
+        if self.mapping is not None:
+            self.mapping.close()
+        self.file.close()
+
+
+class SpillQueue(BoundedQueue[T]):
+    """
+    A bounded queue which writes items that do not fit in memory to segment
+    files on disk, instead of suspending the producer. Items are read back in
+    order once there is room again, and every segment is deleted as soon as it
+    is consumed.
+
+    The items in memory are always older than those on disk, since items are
+    only put in memory while nothing is spilled.
+    """
+
+    spill: Spill
+
+    # Conversion of items to and from their representation on disk.
+    encode: typing.Callable[[T], rdfc.Buffer]
+    decode: typing.Callable[[bytes], T]
+
+    # Segment files, of which the first is read and the last is appended to.
+    segments: collections.deque[Segment]
+
+    # Number of items on disk, and in total since the queue was created.
+    spilled: int
+    spilled_total: int
+
+    def __init__(
+        self,
+        capacity: int,
+        byte_budget: int,
+        size_of: typing.Callable[[T], int],
+        spill: Spill,
+        encode: typing.Callable[[T], rdfc.Buffer] = lambda item: item,
+        decode: typing.Callable[[bytes], T] = lambda data: data,
+    ):
+        super().__init__(capacity, byte_budget, size_of)
+        self.spill = spill
+        self.encode = encode
+        self.decode = decode
+        self.segments = collections.deque()
+        self.spilled = 0
+        self.spilled_total = 0
+
+    def disk_bytes(self) -> int:
+        """Size of the segment files which are still in use."""
+        return sum(segment.written for segment in self.segments)
+
+    async def put(self, item: T, size: int | None = None) -> None:
+        if size is None:
+            size = self.size_of(item)
+
+        while self.segments or self._is_full(size):
+            if not self.spill.limit or self.disk_bytes() < self.spill.limit:
+                self._write(item, size)
+                return
+
+            try:
+                await self._wait(self.putters)
+            except BaseException:
+                self._wakeup_next(self.putters)
+                raise
+
+        self._append(item, size)
+
+    def put_nowait(self, item: T, size: int | None = None) -> None:
+        if size is None:
+            size = self.size_of(item)
+
+        if self.segments:
+            self._write(item, size)
+        else:
+            self._append(item, size)
+
+    def get_nowait(self) -> T:
+        item = super().get_nowait()
+        self._read()
+        return item
+
+    def _write(self, item: T, size: int) -> None:
+        if not self.segments or self.segments[-1].written >= self.spill.segment_size:
+            self.segments.append(Segment(self.spill.directory))
+
+        payload = b"" if item is None else self.encode(item)
+        self.segments[-1].append(item is None, size, payload)
+        self.spilled += 1
+        self.spilled_total += 1
+
+    def _read(self) -> None:
+        """Move items from disk to memory, as far as the limits allow."""
+        while self.segments and not self._is_full(self.segments[0].peek()):
+            segment = self.segments[0]
+            marker, size, payload = segment.read()
+            if segment.exhausted():
+                segment.close()
+                self.segments.popleft()
+
+            self.spilled -= 1
+            self._append(None if marker else self.decode(payload), size)
+
+    def qsize(self) -> int:
+        return len(self.items) + self.spilled
+
+    def empty(self) -> bool:
+        return not self.items and not self.spilled
+
+    def usage(self) -> Usage:
+        return Usage(
+            len(self.items),
+            self.bytes,
+            self.capacity,
+            self.byte_budget,
+            self.spilled,
+            self.spilled_total,
+            self.disk_bytes(),
+        )
+
+    def close(self) -> None:
+        """Delete the segment files, discarding the items which are left."""
+        for segment in self.segments:
+            segment.close()
+        self.segments.clear()
+        self.spilled = 0
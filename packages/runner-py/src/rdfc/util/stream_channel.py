@@ -0,0 +1,128 @@
+import rdfc
+import rdfc.runtime
+import typing
+
+from .bounded_queue import BoundedQueue, Usage
+
+
+def _size_of(value: rdfc.Buffer | None) -> int:
+    return 0 if value is None else rdfc.runtime.nbytes(value)
+
+
+class ChunkStream(rdfc.runtime.MessageStream):
+    """The chunks of a single message, terminated by `None`."""
+
+    queue: BoundedQueue[rdfc.Buffer | None]
+
+    def __init__(self, capacity: int = 0, byte_budget: int = 0):
+        self.queue = BoundedQueue(capacity, byte_budget, _size_of)
+
+    def __aiter__(self) -> typing.AsyncIterator[rdfc.Buffer]:
+        return self
+
+    async def __anext__(self) -> rdfc.Buffer:
+        chunk = await self.queue.get()
+
+        if chunk is None:
+            # Keep the end marker in place for subsequent reads.
+            self.queue.put_nowait(None)
+            raise StopAsyncIteration
+
+        return chunk
+
+    async def read(self) -> bytes:
+        return b"".join([chunk async for chunk in self])
+
+
+class StreamChannel(rdfc.runtime.StreamReader, rdfc.Writer):
+    """
+    A channel which delivers messages as streams of chunks, so that consumers
+    can start processing before a large message is received entirely. Both the
+    number of pending messages and the chunks buffered per message are bounded
+    by `capacity` and `byte_budget`.
+
+    Only the oldest incomplete message is held to these bounds. The consumer
+    may still wait for its chunks, which would never arrive if the delivery of
+    a later message suspended in front of them. The chunks of later messages
+    are therefore only buffered beyond the bounds while those of concurrent
+    writers are interleaved.
+
+    The chunks of messages from concurrent writers may be interleaved, so the
+    streams should be consumed in the order in which they are yielded.
+    """
+
+    queue: BoundedQueue[ChunkStream | None]
+
+    # Messages of which not every chunk was written yet, oldest first.
+    streams: dict[int, ChunkStream]
+
+    capacity: int
+    byte_budget: int
+    closed: bool
+    uri: str
+
+    def __init__(self, uri: str, capacity: int = 0, byte_budget: int = 0):
+        self.queue = BoundedQueue(capacity, 0, lambda _: 0)
+        self.streams = dict()
+        self.capacity = capacity
+        self.byte_budget = byte_budget
+        self.closed = False
+        self.uri = uri
+
+    def __aiter__(self) -> typing.AsyncIterator[ChunkStream]:
+        return self
+
+    async def __anext__(self) -> ChunkStream:
+        stream = await self.queue.get()
+
+        if stream is None:
+            # Keep the end marker in place for subsequent reads.
+            self.queue.put_nowait(None)
+            raise StopAsyncIteration
+
+        return stream
+
+    async def write(self, value: rdfc.Buffer) -> None:
+        """Deliver a message which is available in full as a single chunk."""
+        stream = ChunkStream()
+        stream.queue.put_nowait(value)
+        stream.queue.put_nowait(None)
+        if self.streams:
+            self.queue.put_nowait(stream)
+        else:
+            await self.queue.put(stream)
+
+    async def write_chunk(self, message_id: int, chunk: bytes, last: bool) -> None:
+        stream = self.streams.get(message_id)
+
+        # The first chunk of a message makes it available to the consumer.
+        if stream is None:
+            stream = ChunkStream(self.capacity, self.byte_budget)
+            oldest = not self.streams
+            self.streams[message_id] = stream
+            if oldest:
+                await self.queue.put(stream)
+            else:
+                self.queue.put_nowait(stream)
+        else:
+            oldest = next(iter(self.streams)) == message_id
+
+        if oldest:
+            await stream.queue.put(chunk)
+        else:
+            stream.queue.put_nowait(chunk)
+
+        if last:
+            del self.streams[message_id]
+            stream.queue.put_nowait(None)
+
+    async def close(self) -> None:
+        if self.closed is False:
+            self.closed = True
+            self.queue.put_nowait(None)
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    def usage(self) -> Usage:
+        return self.queue.usage()
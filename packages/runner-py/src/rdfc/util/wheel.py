@@ -6,16 +6,170 @@ import rdfc
 import importlib
 import zipfile
 import shutil
+import threading
+import time
+import hashlib
+import compileall
+import io
+import mmap
+import importlib.abc
+import importlib.machinery
+
+# Name of the file which records the digest of an extracted wheel.
+DIGEST_FILE = ".rdfc-digest"
+
+# Files which cannot be imported from an archive.
+NATIVE_SUFFIXES = (".so", ".pyd", ".dylib")
+
+
+class _MappedFile(io.RawIOBase):
+    """A read-only file interface on a memory mapping, as `zipfile` expects."""
+
+    def __init__(self, mapping: mmap.mmap):
+        self.mapping = mapping
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.mapping.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self.mapping.seek(offset, whence)
+        return self.mapping.tell()
+
+    def tell(self):
+        return self.mapping.tell()
+
+
+class MappedWheel(importlib.abc.MetaPathFinder, importlib.abc.SourceLoader):
+    """
+    Imports modules from a wheel which is memory mapped as a whole, rather than
+    read through a file handle as `zipimport` does.
+    """
+
+    # Path of the wheel, which prefixes the file names of its modules.
+    path: str
+
+    # Kept open for as long as the modules are in use.
+    mapping: mmap.mmap
+    archive: zipfile.ZipFile
+    names: set[str]
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self.mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.archive = zipfile.ZipFile(_MappedFile(self.mapping))
+        self.names = set(self.archive.namelist())
+
+    def find_spec(self, fullname, path=None, target=None):
+        name = fullname.replace(".", "/")
+
+        if f"{name}/__init__.py" in self.names:
+            spec = importlib.machinery.ModuleSpec(
+                fullname,
+                self,
+                origin=f"{self.path}/{name}/__init__.py",
+                is_package=True,
+            )
+            spec.submodule_search_locations = [f"{self.path}/{name}"]
+        elif f"{name}.py" in self.names:
+            spec = importlib.machinery.ModuleSpec(
+                fullname, self, origin=f"{self.path}/{name}.py"
+            )
+        else:
+            return None
+
+        spec.has_location = True
+        return spec
+
+    def get_filename(self, fullname):
+        name = fullname.replace(".", "/")
+        if f"{name}/__init__.py" in self.names:
+            return f"{self.path}/{name}/__init__.py"
+        return f"{self.path}/{name}.py"
+
+    def get_data(self, path):
+        name = path.removeprefix(f"{self.path}/")
+        try:
+            return self.archive.read(name)
+        except KeyError:
+            raise OSError(f"No such file in wheel: {path}")
 
 
 class Wheel:
+    # Whether wheels are imported from a memory mapping instead of `zipimport`.
+    mapped: bool = False
+
+    # Constructors which have been loaded, by entrypoint, module and class.
+    constructors: dict[
+        tuple[str, str, str], typing.Callable[[rdfc.Arguments], rdfc.Processor]
+    ] = dict()
+
+    # Entrypoints of which the directories have been added to the path.
+    included: set[str] = set()
+
+    # Serializes changes to the path and imports.
+    lock: threading.Lock = threading.Lock()
+
     @staticmethod
-    def extract(wheel_path) -> str:
-        print(f"Extracting wheel: {wheel_path}", flush=True)
+    def digest(path: str) -> str:
+        result = hashlib.sha256()
+        with open(path, "rb") as file:
+            while chunk := file.read(1 << 20):
+                result.update(chunk)
+        return result.hexdigest()
+
+    @staticmethod
+    def native(wheel_path: str) -> bool:
+        """Whether a wheel contains files which must be on the file system."""
+        with zipfile.ZipFile(wheel_path, "r") as zip_ref:
+            for name in zip_ref.namelist():
+                if name.endswith(NATIVE_SUFFIXES) or ".so." in name:
+                    return True
+                if name.split("/")[0].endswith(".data"):
+                    return True
+        return False
+
+    @staticmethod
+    def mount(wheel_path: str) -> None:
+        """
+        Make the modules of a wheel importable, straight from the archive if
+        possible, or from an extraction otherwise.
+        """
+        if Wheel.native(wheel_path):
+            destination = Wheel.extract(wheel_path)
+            sys.path.append(destination)
+            print(f"Including extracted wheel: {destination}")
+        elif Wheel.mapped:
+            sys.meta_path.append(MappedWheel(wheel_path))
+            print(f"Including memory mapped wheel: {wheel_path}")
+        else:
+            sys.path.append(wheel_path)
+            print(f"Including wheel: {wheel_path}")
 
+    @staticmethod
+    def extract(wheel_path) -> str:
         destination_directory = os.path.dirname(wheel_path)
         wheel_filename: str = os.path.basename(wheel_path)
         destination = f"{destination_directory}/{wheel_filename.removesuffix(".whl")}"
+        digest_path = os.path.join(destination, DIGEST_FILE)
+
+        # Reuse a previous extraction of the same wheel.
+        digest = Wheel.digest(wheel_path)
+        if os.path.exists(digest_path):
+            with open(digest_path) as file:
+                if file.read() == digest:
+                    print(f"Wheel unchanged, reusing: {destination}", flush=True)
+                    return destination
+
+        print(f"Extracting wheel: {wheel_path}", flush=True)
 
         # Remove the directory if it exists.
         if os.path.exists(destination):
@@ -24,25 +178,76 @@ class Wheel:
             print(f"Directory removed: {destination}", flush=True)
 
         with zipfile.ZipFile(wheel_path, "r") as zip_ref:
-            print(f"Extracting wheel: ${destination}", flush=True)
+            print(f"Extracting wheel: {destination}", flush=True)
             zip_ref.extractall(destination)
 
+        # Compile ahead of time, so that the first import does not have to.
+        compileall.compile_dir(destination, quiet=1, workers=0)
+
+        # The digest is written last, so an interrupted extraction is redone.
+        with open(digest_path, "w") as file:
+            file.write(digest)
+
         print("Wheel extraction: done", flush=True)
         return destination
 
     @staticmethod
     def load(
-        entrypoint: str, module_name: str, class_name: str
+        entrypoint: str,
+        module_name: str,
+        class_name: str,
+        timings: dict[str, float] | None = None,
     ) -> typing.Callable[[rdfc.Arguments], rdfc.Processor]:
+        """
+        Import a processor class. If given, `timings` receives the seconds
+        spent on setting up the path and on importing the module.
+        """
         entrypoint = entrypoint.removeprefix("file://").removesuffix("/")
+        timings = timings if timings is not None else dict()
+
+        # Stages may be loaded from multiple threads at once.
+        with Wheel.lock:
+            key = (entrypoint, module_name, class_name)
+            if key in Wheel.constructors:
+                return Wheel.constructors[key]
+
+            start = time.perf_counter()
+            if entrypoint not in Wheel.included:
+                if entrypoint.endswith(".whl"):
+                    Wheel.mount(entrypoint)
+                else:
+                    Wheel.include(entrypoint)
+                Wheel.included.add(entrypoint)
+            timings["path"] = time.perf_counter() - start
+
+            # Dynamically import.
+            start = time.perf_counter()
+            print(f"Loading module: {module_name}", flush=True)
+            module = importlib.import_module(module_name)
+            print(f"Module loaded successfully: {module_name}")
+
+            # Retrieve the class.
+            print(f"Extracting processor: {class_name}")
+            clazz = getattr(module, class_name)
+            print(f"Processor extracted: {class_name}")
+            timings["import"] = time.perf_counter() - start
 
+            Wheel.constructors[key] = clazz
+            return clazz
+
+    @staticmethod
+    def include(entrypoint: str) -> None:
         # Add module to path using `src`
         src_dir = f"{entrypoint}/src/"
         sys.path.append(src_dir)
         print(f"Including source directory: {src_dir}")
 
-        # Add dependencies to path using `.venv`.
+        # Add dependencies to path using `.venv`, if the processor has its own
+        # environment.
         lib_dir = f"{entrypoint}/.venv/lib/"
+        if not os.path.isdir(lib_dir):
+            return
+
         python_versions = [
             _dir
             for _dir in os.listdir(lib_dir)
@@ -53,14 +258,3 @@ class Wheel:
         packages_dir = f"{entrypoint}/.venv/lib/{python_version}/site-packages"
         print(f"Including packages directory: {packages_dir}")
         sys.path.append(packages_dir)
-
-        # Dynamically import.
-        print(f"Loading module: {module_name}", flush=True)
-        module = importlib.import_module(module_name)
-        print(f"Module loaded successfully: {module_name}")
-
-        # Retrieve the class.
-        print(f"Extracting processor: {class_name}")
-        clazz = getattr(module, class_name)
-        print(f"Processor extracted: {class_name}")
-        return clazz
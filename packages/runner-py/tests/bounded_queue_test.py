@@ -0,0 +1,35 @@
+import asyncio
+import unittest
+
+import rdfc.util
+
+
+class BoundedQueueTest(unittest.IsolatedAsyncioTestCase):
+    async def test_get_batch(self):
+        queue = rdfc.util.BoundedQueue()
+        for value in [b"a", b"bb", b"ccc", b"dddd"]:
+            await queue.put(value)
+
+        # Bounded by the number of items.
+        self.assertEqual([b"a", b"bb"], await queue.get_batch(max_items=2))
+
+        # Bounded by size, but the first item is always returned.
+        self.assertEqual([b"ccc"], await queue.get_batch(max_bytes=2))
+
+        # Drains everything that is left.
+        self.assertEqual([b"dddd"], await queue.get_batch())
+        self.assertTrue(queue.empty())
+
+    async def test_get_batch_linger(self):
+        queue = rdfc.util.BoundedQueue()
+
+        async def produce():
+            for value in [b"a", b"b", b"c"]:
+                await queue.put(value)
+                await asyncio.sleep(0.001)
+
+        producer = asyncio.create_task(produce())
+        batch = await queue.get_batch(max_items=3, linger=1)
+        await producer
+
+        self.assertEqual([b"a", b"b", b"c"], batch)
@@ -0,0 +1,226 @@
+import asyncio
+import unittest
+
+import rdfc
+import rdfc.util
+
+
+class ChannelTest(unittest.IsolatedAsyncioTestCase):
+    async def test_unbounded(self):
+        channel = rdfc.util.Channel("channel")
+
+        for i in range(100):
+            await channel.write(bytes([i]))
+        await channel.close()
+
+        data = [message async for message in channel]
+        self.assertEqual(100, len(data))
+
+    async def test_capacity(self):
+        channel = rdfc.util.Channel("channel", capacity=2)
+        await channel.write(b"a")
+        await channel.write(b"b")
+
+        # The third write must suspend until a message is consumed.
+        write = asyncio.create_task(channel.write(b"c"))
+        await asyncio.sleep(0)
+        self.assertFalse(write.done())
+        self.assertEqual(1.0, channel.usage().fill)
+
+        self.assertEqual(b"a", await anext(channel))
+        await write
+        self.assertEqual(2, channel.usage().items)
+
+        # Closing never blocks, even when the channel is full.
+        await channel.close()
+        data = [message async for message in channel]
+        self.assertEqual([b"b", b"c"], data)
+
+    async def test_byte_budget(self):
+        channel = rdfc.util.Channel("channel", byte_budget=4)
+        await channel.write(b"abc")
+
+        write = asyncio.create_task(channel.write(b"de"))
+        await asyncio.sleep(0)
+        self.assertFalse(write.done())
+        self.assertEqual(3, channel.usage().bytes)
+
+        self.assertEqual(b"abc", await anext(channel))
+        await write
+
+        # Messages larger than the budget are accepted into an empty channel.
+        self.assertEqual(b"de", await anext(channel))
+        await channel.write(b"too large")
+        self.assertEqual(b"too large", await anext(channel))
+
+    async def test_buffers(self):
+        channel = rdfc.util.Channel("channel", byte_budget=8)
+
+        # Buffers are passed on as is, and counted by their size in bytes.
+        view = memoryview(bytes(8)).cast("I")
+        await channel.write(view)
+        self.assertEqual(8, channel.usage().bytes)
+        self.assertIs(view, await anext(channel))
+
+        data = bytearray(b"abc")
+        await channel.write(data)
+        self.assertIs(data, await anext(channel))
+
+    async def test_batches(self):
+        channel = rdfc.util.Channel("channel")
+        await channel.write_many([b"a", b"b", b"c", b"d", b"e"])
+        await channel.close()
+
+        self.assertEqual([b"a", b"b"], await channel.read_batch(max_items=2))
+        self.assertEqual([b"c", b"d"], await channel.read_batch(max_bytes=2))
+
+        # The end of the channel is an empty batch, which is sticky.
+        self.assertEqual([b"e"], await channel.read_batch())
+        self.assertEqual([], await channel.read_batch())
+        self.assertEqual([], await channel.read_batch())
+
+    async def test_batch_timeout(self):
+        channel = rdfc.util.Channel("channel")
+        await channel.write(b"a")
+
+        # An incomplete batch waits for more messages until the timeout.
+        read = asyncio.create_task(channel.read_batch(max_items=2, timeout=10))
+        await asyncio.sleep(0.01)
+        self.assertFalse(read.done())
+        await channel.write(b"b")
+        self.assertEqual([b"a", b"b"], await read)
+
+        await channel.write(b"c")
+        self.assertEqual([b"c"], await channel.read_batch(max_items=2, timeout=0.01))
+
+    async def test_concurrent_batches(self):
+        channel = rdfc.util.Channel("channel")
+        readers = [
+            asyncio.create_task(channel.read_batch(max_items=10, timeout=0.02))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+
+        # Both readers linger, and one of them takes every message.
+        await channel.write(b"a")
+        await asyncio.sleep(0)
+        await channel.write(b"b")
+        done, pending = await asyncio.wait(readers, timeout=0.2)
+        self.assertEqual(1, len(done))
+        self.assertEqual([b"a", b"b"], done.pop().result())
+
+        # The other one keeps waiting rather than returning an empty batch.
+        await channel.write(b"c")
+        await channel.close()
+        self.assertEqual([b"c"], await pending.pop())
+        self.assertEqual([], await channel.read_batch(timeout=0.02))
+
+    async def test_objects(self):
+        channel = rdfc.util.Channel("channel")
+        serialized = []
+
+        def serialize(value: str) -> bytes:
+            serialized.append(value)
+            return value.encode()
+
+        await channel.write_object(rdfc.ObjectMessage("a", serialize))
+        await channel.write_object(rdfc.ObjectMessage("b", serialize))
+        await channel.close()
+
+        # Objects are only serialized for readers which ask for bytes.
+        self.assertEqual("a", await channel.read_object())
+        self.assertEqual(b"b", await anext(channel))
+        self.assertEqual(["b"], serialized)
+
+
+class RepositoryTest(unittest.TestCase):
+    def test_stream_readers(self):
+        # Repositories without stream readers are still complete.
+        class Repository(rdfc.runtime.ChannelRepository):
+            def create_reader(self, uri: str) -> rdfc.util.Channel:
+                return rdfc.util.Channel(uri)
+
+            def create_writer(self, uri: str) -> rdfc.util.Channel:
+                return rdfc.util.Channel(uri)
+
+        with self.assertRaisesRegex(NotImplementedError, "stream readers"):
+            Repository().create_stream_reader("channel")
+
+
+class CallbackChannelTest(unittest.IsolatedAsyncioTestCase):
+    async def test_write_many(self):
+        calls = []
+
+        async def on_write(value):
+            calls.append([value])
+
+        async def on_write_many(values):
+            calls.append(values)
+
+        async def on_close():
+            pass
+
+        single = rdfc.util.CallbackChannel(on_write, on_close)
+        await single.write_many([b"a", b"b"])
+        self.assertEqual([[b"a"], [b"b"]], calls)
+
+        calls.clear()
+        batched = rdfc.util.CallbackChannel(on_write, on_close, on_write_many)
+        await batched.write_many([b"a", b"b"])
+        self.assertEqual([[b"a", b"b"]], calls)
+
+
+class StreamChannelTest(unittest.IsolatedAsyncioTestCase):
+    async def test_chunks(self):
+        channel = rdfc.util.StreamChannel("channel")
+
+        # Interleaved chunks of two messages, and a message written at once.
+        await channel.write_chunk(1, b"ab", False)
+        await channel.write_chunk(2, b"xy", False)
+        await channel.write_chunk(1, b"cd", True)
+        await channel.write(b"full")
+        await channel.write_chunk(2, b"z", True)
+        await channel.close()
+
+        first = await anext(channel)
+        self.assertEqual(b"ab", await anext(first))
+        self.assertEqual(b"cd", await first.read())
+
+        data = [await message.read() async for message in channel]
+        self.assertEqual([b"xyz", b"full"], data)
+
+    async def test_window(self):
+        channel = rdfc.util.StreamChannel("channel", capacity=2)
+
+        async def produce():
+            for i in range(10):
+                await channel.write_chunk(1, b"a", i == 9)
+            await channel.close()
+
+        # Only a window of chunks is buffered while the consumer is idle.
+        producer = asyncio.create_task(produce())
+        await asyncio.sleep(0.01)
+        self.assertFalse(producer.done())
+        stream = await anext(channel)
+        self.assertEqual(2, stream.queue.qsize())
+
+        self.assertEqual(b"a" * 10, await asyncio.wait_for(stream.read(), 1))
+        await producer
+
+    async def test_interleaved(self):
+        channel = rdfc.util.StreamChannel("channel", capacity=2)
+
+        async def produce():
+            for i in range(10):
+                await channel.write_chunk(1, b"a", i == 9)
+                await channel.write_chunk(2, b"b", i == 9)
+            await channel.close()
+
+        # The chunks of the second message never hold back the first one,
+        # which is consumed entirely before the second.
+        producer = asyncio.create_task(produce())
+        first = await anext(channel)
+        self.assertEqual(b"a" * 10, await asyncio.wait_for(first.read(), 1))
+        second = await anext(channel)
+        self.assertEqual(b"b" * 10, await asyncio.wait_for(second.read(), 1))
+        await producer
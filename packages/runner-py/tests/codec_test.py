@@ -0,0 +1,56 @@
+import importlib.util
+import unittest
+
+import rdfc.util
+
+
+@unittest.skipUnless(importlib.util.find_spec("rdflib"), "requires rdflib")
+class CodecTest(unittest.TestCase):
+    def graph(self):
+        import rdflib
+
+        ex = rdflib.Namespace("https://example.org/")
+        graph = rdflib.Graph()
+        node = rdflib.BNode()
+        graph.add((ex.city, rdflib.RDF.type, ex.City))
+        graph.add((ex.city, ex.label, rdflib.Literal("Gent", lang="nl")))
+        graph.add((ex.city, ex.label, rdflib.Literal("plain")))
+        graph.add((ex.city, ex.population, rdflib.Literal(265086)))
+        graph.add((ex.city, ex.location, node))
+        graph.add((node, ex.latitude, rdflib.Literal(51.05)))
+        return graph
+
+    def test_round_trip(self):
+        from rdflib.compare import isomorphic
+
+        graph = self.graph()
+
+        for content_type in [
+            "text/turtle",
+            "application/n-triples",
+            "application/x-rdfc-binary",
+        ]:
+            message = rdfc.util.encode_graph(graph, content_type)
+            decoded = rdfc.util.decode_graph(message)
+            self.assertTrue(isomorphic(graph, decoded), content_type)
+
+    def test_frames(self):
+        import rdflib
+
+        ex = rdflib.Namespace("https://example.org/")
+        graph = rdflib.Graph()
+        for i in range(10000):
+            graph.add((ex[f"s{i % 7}"], ex.value, rdflib.Literal(i)))
+
+        # Terms are only defined once, across frames.
+        codec = rdfc.util.BinaryCodec()
+        data = codec.encode(graph)
+        self.assertEqual(set(graph), set(codec.triples(memoryview(data))))
+
+    def test_untagged(self):
+        # Payloads without a tag are parsed with the default codec.
+        graph = rdfc.util.decode_graph(b"<https://a> <https://b> <https://c> .")
+        self.assertEqual(1, len(graph))
+
+        with self.assertRaises(rdfc.util.CodecException):
+            rdfc.util.decode_graph(rdfc.util.encode_graph(graph)[:-4])
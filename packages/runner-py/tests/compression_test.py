@@ -0,0 +1,49 @@
+import gzip
+import unittest
+import zlib
+
+from rdfc.grpc.compression import CompressionException, Compressor
+
+
+class CompressionTest(unittest.TestCase):
+    def test_round_trip(self):
+        message = (
+            b"<http://example.com/s> <http://example.com/p> <http://example.com/o> .\n"
+        )
+        message = message * 100
+
+        for algorithm in ("deflate", "gzip"):
+            compressor = Compressor(algorithm, level=6, threshold=1024)
+            frame = compressor.compress(message)
+
+            self.assertLess(len(frame), len(message))
+            self.assertEqual(compressor.decompress(frame), message)
+            self.assertLess(compressor.ratio(), 0.1)
+
+    def test_default_level(self):
+        message = bytes(range(256)) * 64
+
+        # Deflate and gzip compress at the same level unless told otherwise.
+        deflate = Compressor("deflate", threshold=0)
+        gzipped = Compressor("gzip", threshold=0)
+        self.assertEqual(6, deflate.level)
+        self.assertEqual(6, gzipped.level)
+        self.assertEqual(zlib.compress(message, 6), deflate.compress(message)[1:])
+        self.assertEqual(
+            gzip.compress(message, 6, mtime=0), gzipped.compress(message)[1:]
+        )
+        self.assertEqual(9, Compressor("gzip", level=9).level)
+
+    def test_threshold(self):
+        compressor = Compressor("gzip", threshold=1024)
+        frame = compressor.compress(b"small")
+
+        self.assertEqual(frame, b"\x00small")
+        self.assertEqual(compressor.decompress(frame), b"small")
+        self.assertEqual(compressor.raw_bytes, 0)
+
+    def test_unknown(self):
+        with self.assertRaises(CompressionException):
+            Compressor("lzma")
+        with self.assertRaises(CompressionException):
+            Compressor("gzip").decompress(b"\xffpayload")
@@ -0,0 +1,40 @@
+import unittest
+
+from rdfc.grpc import Config, Server
+from rdfc.grpc.compression import CompressionException
+
+
+class ConfigTest(unittest.TestCase):
+    def test_server_options(self):
+        config = Config.from_env(
+            {
+                "RDFC_MAX_MESSAGE_SIZE": "67108864",
+                "RDFC_KEEPALIVE_TIME_MS": "10000",
+                "RDFC_HTTP2_BDP_PROBE": "false",
+                "RDFC_GRPC_OPTIONS": '{"grpc.so_reuseport": 0}',
+            }
+        )
+        options = dict(config.server_options())
+
+        self.assertEqual(options["grpc.max_send_message_length"], 67108864)
+        self.assertEqual(options["grpc.max_receive_message_length"], 67108864)
+        self.assertEqual(options["grpc.keepalive_time_ms"], 10000)
+        self.assertEqual(options["grpc.http2.bdp_probe"], 0)
+        self.assertEqual(options["grpc.so_reuseport"], 0)
+
+    def test_defaults(self):
+        self.assertEqual(Config.from_env({}).server_options(), [])
+
+    def test_grpc_compression(self):
+        self.assertEqual(
+            Config.from_env({"RDFC_GRPC_COMPRESSION": "gzip"}).grpc_compression,
+            "gzip",
+        )
+        with self.assertRaisesRegex(CompressionException, "brotli"):
+            Config.from_env({"RDFC_GRPC_COMPRESSION": "brotli"})
+
+    def test_address(self):
+        self.assertEqual(Server.address("localhost", "5000"), "localhost:5000")
+        self.assertEqual(
+            Server.address("unix:///tmp/runner.sock", ""), "unix:///tmp/runner.sock"
+        )
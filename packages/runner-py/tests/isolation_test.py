@@ -0,0 +1,147 @@
+import asyncio
+import pathlib
+import tempfile
+import textwrap
+import unittest
+
+import rdfc
+import rdfc.util
+from rdfc.grpc.isolation import IsolationException, ProcessStage
+from rdfc.proto.intermediate_pb2 import Stage
+
+PROCESSORS = """
+import os
+
+import rdfc
+
+
+class Echo(rdfc.Processor):
+    def __init__(self, args):
+        self.incoming = args.reader("incoming")
+        self.outgoing = args.writer("outgoing")
+
+    async def exec(self):
+        async for message in self.incoming:
+            await self.outgoing.write(bytes(message).upper())
+        await self.outgoing.close()
+
+
+class Failing(Echo):
+    async def exec(self):
+        raise ValueError("processor failed")
+
+
+class Exiting(Echo):
+    async def exec(self):
+        os._exit(3)
+
+
+class Broken(Echo):
+    def __init__(self, args):
+        raise ValueError("constructor failed")
+"""
+
+
+class Repository(rdfc.runtime.ChannelRepository):
+    """Channels which are read and written within the test itself."""
+
+    def __init__(self):
+        self.channels = dict()
+
+    def create_reader(self, uri: str) -> rdfc.util.Channel:
+        return self.channels.setdefault(uri, rdfc.util.Channel(uri))
+
+    def create_writer(self, uri: str) -> rdfc.util.Channel:
+        return self.channels.setdefault(uri, rdfc.util.Channel(uri))
+
+
+class IsolationTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.entrypoint = pathlib.Path(directory.name)
+        (self.entrypoint / "src").mkdir()
+        (self.entrypoint / "src" / "isolated.py").write_text(
+            textwrap.dedent(PROCESSORS)
+        )
+
+    def stage(self, class_name: str) -> Stage:
+        stage = Stage()
+        stage.uri = f"stage:{class_name}"
+        stage.processor.entrypoint = f"file://{self.entrypoint}"
+        stage.processor.metadata["module_name"] = "isolated"
+        stage.processor.metadata["class_name"] = class_name
+        stage.arguments["incoming"].literal.reader.uri = "in"
+        stage.arguments["outgoing"].literal.writer.uri = "out"
+        return stage
+
+    async def start(self, class_name: str) -> tuple[ProcessStage, Repository]:
+        repository = Repository()
+        stage = await ProcessStage.start(self.stage(class_name), repository)
+        return stage, repository
+
+    async def test_round_trip(self):
+        stage, repository = await self.start("Echo")
+
+        # The channels which the processor requested are bound in the runner.
+        self.assertEqual({"in", "out"}, set(repository.channels))
+
+        incoming = repository.channels["in"]
+        await incoming.write_many([b"a", b"b", b"c"])
+        await incoming.close()
+
+        await asyncio.wait_for(stage.exec(), 30)
+        output = [bytes(message) async for message in repository.channels["out"]]
+        self.assertEqual([b"A", b"B", b"C"], output)
+
+    async def test_handshake(self):
+        # The event loop keeps running while the worker starts.
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        stage, repository = await self.start("Echo")
+        ticker.cancel()
+        self.assertGreater(ticks, 1)
+
+        await repository.channels["in"].close()
+        await asyncio.wait_for(stage.exec(), 30)
+
+    async def test_cancel(self):
+        stage, repository = await self.start("Echo")
+        await repository.channels["in"].write(b"a")
+
+        # The worker waits for more messages, which never arrive.
+        execution = asyncio.create_task(stage.exec())
+        output = repository.channels["out"]
+        self.assertEqual(b"A", bytes(await asyncio.wait_for(anext(output), 30)))
+
+        execution.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await asyncio.wait_for(execution, 10)
+        self.assertIsNotNone(stage.process.poll())
+
+    async def test_constructor_error(self):
+        with self.assertRaises(IsolationException) as context:
+            await self.start("Broken")
+        self.assertIn("ValueError: constructor failed", str(context.exception))
+
+    async def test_processor_error(self):
+        stage, repository = await self.start("Failing")
+        with self.assertRaises(IsolationException) as context:
+            await asyncio.wait_for(stage.exec(), 30)
+
+        # The traceback of the worker crosses the process boundary.
+        self.assertIn("ValueError: processor failed", str(context.exception))
+        self.assertIn("Traceback", str(context.exception))
+
+    async def test_worker_exit(self):
+        stage, repository = await self.start("Exiting")
+        with self.assertRaises(IsolationException) as context:
+            await asyncio.wait_for(stage.exec(), 30)
+        self.assertIn("exited with code 3", str(context.exception))
@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+import rdfc.util
+from rdfc import loadgen
+
+
+class LoadgenTest(unittest.IsolatedAsyncioTestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(51, loadgen.percentile(values, 0.5))
+        self.assertEqual(100, loadgen.percentile(values, 0.99))
+        self.assertEqual(100, loadgen.percentile(values, 1))
+        self.assertEqual(0, loadgen.percentile([], 0.5))
+
+    @unittest.skipUnless(os.path.exists("/proc/self/status"), "requires /proc")
+    def test_rss(self):
+        self.assertGreater(loadgen.rss(os.getpid()), 0)
+
+        # Processes which do not exist have no memory usage.
+        self.assertEqual(0, loadgen.rss(-1))
+
+    async def test_forward(self):
+        incoming = rdfc.util.Channel("incoming")
+        outgoing = rdfc.util.Channel("outgoing")
+        args = {"incoming": incoming, "outgoing": outgoing}
+        processor = loadgen.Forward(rdfc.util.DictionaryArguments(args))
+
+        await incoming.write_many([b"a", b"b"])
+        await incoming.close()
+        await processor.exec()
+        self.assertEqual([b"a", b"b"], [message async for message in outgoing])
+
+    def test_report(self):
+        # A short run against a real runner, through a chain of two stages.
+        command = [sys.executable, "-m", "rdfc.loadgen", "--json"]
+        command += ["--stages", "2", "--rate", "200", "--duration", "1"]
+        command += ["--size", "64"]
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(sys.path)
+        result = subprocess.run(
+            command, env=env, capture_output=True, text=True, timeout=60
+        )
+        self.assertEqual(0, result.returncode, result.stderr)
+
+        report = json.loads(result.stdout)
+        self.assertEqual(2, report["stages"])
+        self.assertEqual("tcp", report["transport"])
+
+        # Every message which was sent made it through the chain, in time.
+        self.assertGreater(report["sent"], 0)
+        self.assertEqual(report["sent"], report["received"])
+        self.assertGreater(report["throughput"], 0)
+        self.assertLessEqual(report["latency_p50_ms"], report["latency_max_ms"])
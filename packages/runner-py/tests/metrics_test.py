@@ -0,0 +1,31 @@
+import asyncio
+import unittest
+
+import rdfc.util
+from rdfc.grpc.metrics import Metrics
+
+
+class MetricsTest(unittest.IsolatedAsyncioTestCase):
+    async def test_render(self):
+        channel = rdfc.util.Channel("http://example.com/channel")
+        await channel.write(b"hello")
+
+        metrics = Metrics(lambda: {channel.uri: [channel.usage()], "outgoing": []})
+        metrics.received(channel.uri, 5)
+        metrics.written("http://example.com/other", 3)
+        await metrics.timed("http://example.com/stage", asyncio.sleep(0))
+        metrics.loop_lag.observe(0.002)
+
+        text = metrics.render()
+        lines = text.splitlines()
+
+        label = 'channel="http://example.com/channel"'
+        self.assertIn(f"rdfc_channel_received_messages_total{{{label}}} 1", lines)
+        self.assertIn(f"rdfc_channel_received_bytes_total{{{label}}} 5", lines)
+        self.assertIn(f"rdfc_channel_queue_messages{{{label}}} 1", lines)
+        self.assertIn('rdfc_stage_running{stage="http://example.com/stage"} 0', lines)
+        self.assertIn('rdfc_stage_exec_duration_seconds_bucket{le="0.01"} 1', lines)
+        self.assertIn("rdfc_stage_exec_duration_seconds_count 1", lines)
+        self.assertIn('rdfc_event_loop_lag_seconds_bucket{le="0.001"} 0', lines)
+        self.assertIn('rdfc_event_loop_lag_seconds_bucket{le="0.005"} 1', lines)
+        self.assertIn("rdfc_outgoing_queue_messages 0", lines)
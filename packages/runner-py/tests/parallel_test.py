@@ -0,0 +1,122 @@
+import asyncio
+import time
+import unittest
+
+import rdfc
+import rdfc.util
+
+
+class Repository(rdfc.runtime.ChannelRepository):
+    """Channels which are read and written within the test itself."""
+
+    def __init__(self):
+        self.channels = dict()
+
+    def create_reader(self, uri: str) -> rdfc.util.Channel:
+        return self.channels.setdefault(uri, rdfc.util.Channel(uri))
+
+    def create_writer(self, uri: str) -> rdfc.util.Channel:
+        return self.channels.setdefault(uri, rdfc.util.Channel(uri))
+
+
+# Every fourth message takes longer than the others.
+def delay(message: bytes) -> float:
+    return 0.02 if int(message) % 4 == 0 else 0
+
+
+class Slow(rdfc.Processor):
+    active = 0
+    peak = 0
+
+    def __init__(self, args: rdfc.Arguments):
+        self.incoming = args.reader("incoming")
+        self.outgoing = args.writer("outgoing")
+
+    async def exec(self):
+        async for message in self.incoming:
+            Slow.active += 1
+            Slow.peak = max(Slow.peak, Slow.active)
+            await asyncio.sleep(delay(message))
+            Slow.active -= 1
+            await self.outgoing.write(message)
+        await self.outgoing.close()
+
+
+class SlowSync(rdfc.SyncProcessor):
+    def __init__(self, args: rdfc.Arguments):
+        self.incoming = args.reader("incoming")
+        self.outgoing = args.writer("outgoing")
+
+    def run(self):
+        outgoing = self.sync_writer(self.outgoing)
+        for message in self.sync_reader(self.incoming):
+            time.sleep(delay(message))
+            outgoing.write(message)
+        outgoing.close()
+
+
+async def run(processor, workers: int, ordered: bool) -> list[bytes]:
+    repository = Repository()
+    channels = rdfc.util.SharedChannels(repository, workers, ordered)
+    instances = []
+    for _ in range(workers):
+        worker = channels.worker()
+        args = {
+            "incoming": worker.create_reader("in"),
+            "outgoing": worker.create_writer("out"),
+        }
+        instances.append((processor(rdfc.util.DictionaryArguments(args)), worker))
+
+    messages = [b"%d" % i for i in range(32)]
+    incoming = repository.channels["in"]
+    await incoming.write_many(messages)
+    await incoming.close()
+
+    await rdfc.util.Parallel(instances).exec()
+    return [message async for message in repository.channels["out"]]
+
+
+class ParallelTest(unittest.IsolatedAsyncioTestCase):
+    async def test_ordered(self):
+        Slow.peak = 0
+        output = await run(Slow, 4, ordered=True)
+
+        # Messages are processed concurrently, but written in order.
+        self.assertEqual(4, Slow.peak)
+        self.assertEqual([b"%d" % i for i in range(32)], output)
+
+    async def test_unordered(self):
+        output = await run(Slow, 4, ordered=False)
+
+        # Slow messages are overtaken by the others.
+        self.assertNotEqual([b"%d" % i for i in range(32)], output)
+        self.assertEqual(sorted(output), sorted(b"%d" % i for i in range(32)))
+
+    async def test_threads(self):
+        output = await run(SlowSync, 4, ordered=True)
+        self.assertEqual([b"%d" % i for i in range(32)], output)
+
+    async def test_window(self):
+        sequencer = rdfc.util.Sequencer(2)
+        written = []
+
+        def write(value):
+            async def action():
+                written.append(value)
+
+            return action
+
+        first, second = sequencer.number(), sequencer.number()
+        await sequencer.write(second, write("second"))
+        await sequencer.write(first, write("first"))
+
+        # No more messages may be read until the first one is released.
+        admit = asyncio.create_task(sequencer.admit())
+        await asyncio.sleep(0)
+        self.assertFalse(admit.done())
+
+        await sequencer.complete(second)
+        self.assertEqual(["first"], written)
+        await sequencer.complete(first)
+        await admit
+        self.assertEqual(["first", "second"], written)
@@ -0,0 +1,307 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+import grpc
+
+import rdfc
+import rdfc.util
+from rdfc.grpc import Config, Server
+from rdfc.grpc.compression import CompressionException
+from rdfc.proto.channel_pb2 import ChannelMessage, ChannelMessageType
+from rdfc.proto.intermediate_pb2 import Stage
+
+# A processor of which the constructor blocks for a while.
+SLOW_CONSTRUCTOR = """
+import time
+
+import rdfc
+
+
+class Slow(rdfc.Processor):
+    def __init__(self, args):
+        self.incoming = args.reader("incoming")
+        time.sleep(0.3)
+
+    async def exec(self):
+        pass
+"""
+
+
+class Context:
+    """Stands in for the gRPC context of a call."""
+
+    def __init__(self):
+        self.code = None
+        self.details = None
+        self.trailing_metadata = ()
+
+    def set_code(self, code) -> None:
+        self.code = code
+
+    def set_details(self, details: str) -> None:
+        self.details = details
+
+    def set_trailing_metadata(self, metadata) -> None:
+        self.trailing_metadata = metadata
+
+    def set_compression(self, compression) -> None:
+        pass
+
+    def disable_next_message_compression(self) -> None:
+        pass
+
+
+def message(uri: str, data: bytes | None = None) -> ChannelMessage:
+    """A data message, or a close message without `data`."""
+    result = ChannelMessage()
+    result.channel.uri = uri
+    if data is None:
+        result.type = ChannelMessageType.CLOSE
+    else:
+        result.type = ChannelMessageType.DATA
+        result.data.bytes = data
+    return result
+
+
+async def orchestrate(
+    server: Server, messages: list[ChannelMessage] | None = None
+) -> list[ChannelMessage]:
+    """
+    Execute the stages of a server, routing every message it sends back to it
+    like the orchestrator would, after the given `messages`. Returns the
+    messages which were sent.
+    """
+    queue: asyncio.Queue[ChannelMessage | None] = asyncio.Queue()
+    for entry in messages or []:
+        queue.put_nowait(entry)
+
+    async def incoming():
+        while (message := await queue.get()) is not None:
+            yield message
+
+    sent = []
+    async for message in server.exec(incoming(), Context()):
+        sent.append(message)
+        await queue.put(message)
+    await queue.put(None)
+    return sent
+
+
+class Producer(rdfc.Processor):
+    def __init__(self, writer: rdfc.Writer, messages: list[bytes]):
+        self.writer = writer
+        self.messages = messages
+
+    async def exec(self):
+        for message in self.messages:
+            await self.writer.write(message)
+        await self.writer.close()
+
+
+class Consumer(rdfc.Processor):
+    def __init__(self, reader: rdfc.Reader, start: asyncio.Event | None = None):
+        self.reader = reader
+        self.start = start
+        self.received = []
+        self.finished = asyncio.Event()
+
+    async def exec(self):
+        if self.start is not None:
+            await self.start.wait()
+        async for message in self.reader:
+            self.received.append(bytes(message))
+        self.finished.set()
+
+
+class ServerTest(unittest.IsolatedAsyncioTestCase):
+    async def route(self, local_routing: bool) -> tuple[list[bytes], list[int]]:
+        config = Config.from_env({"RDFC_LOCAL_ROUTING": str(local_routing).lower()})
+        server = Server(config)
+
+        consumer = Consumer(server.create_reader("channel"))
+        producer = Producer(server.create_writer("channel"), [b"a", b"b", b"c"])
+        server.stages = {"producer": producer, "consumer": consumer}
+
+        sent = await orchestrate(server)
+        return consumer.received, [message.type for message in sent]
+
+    async def test_local_routing(self):
+        # Messages reach the local reader directly, and only the close, which
+        # arrives after them, takes the round-trip through the orchestrator.
+        received, sent = await self.route(local_routing=True)
+        self.assertEqual([b"a", b"b", b"c"], received)
+        self.assertEqual([ChannelMessageType.CLOSE], sent)
+
+    async def test_remote_routing(self):
+        received, sent = await self.route(local_routing=False)
+        self.assertEqual([b"a", b"b", b"c"], received)
+        self.assertEqual(
+            [ChannelMessageType.DATA] * 3 + [ChannelMessageType.CLOSE], sent
+        )
+
+    async def test_tracing(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces.jsonl")
+            env = {
+                "RDFC_LOCAL_ROUTING": "false",
+                "RDFC_TRACE_SAMPLE": "1",
+                "RDFC_TRACE_FILE": path,
+                # Only the first message fits in memory, the others spill.
+                "RDFC_OUTGOING_CAPACITY": "1",
+                "RDFC_SPILL_OUTGOING": "true",
+                "RDFC_SPILL_DIRECTORY": directory,
+            }
+            server = Server(Config.from_env(env))
+
+            consumer = Consumer(server.create_reader("channel"))
+            producer = Producer(server.create_writer("channel"), [b"a", b"b", b"c"])
+            server.stages = {"producer": producer, "consumer": consumer}
+            await asyncio.wait_for(orchestrate(server), 5)
+            self.assertEqual([b"a", b"b", b"c"], consumer.received)
+
+            with open(path) as file:
+                spans = [json.loads(line) for line in file]
+
+        names = [span["name"] for span in spans]
+        self.assertEqual(3, names.count("write"))
+        self.assertEqual(3, names.count("deliver"))
+
+        # Spilled messages lose their trace on the way out.
+        outgoing = [span for span in spans if span["name"] == "outgoing"]
+        self.assertEqual(1, len(outgoing))
+        self.assertEqual(spans[names.index("write")]["traceId"], outgoing[0]["traceId"])
+
+    async def test_delivery_per_channel(self):
+        server = Server(Config.from_env({"RDFC_CHANNEL_CAPACITY": "1"}))
+
+        # The slow consumer only starts once the fast one has finished, which
+        # requires its messages to overtake those of the slow channel.
+        fast = Consumer(server.create_reader("fast"))
+        slow = Consumer(server.create_reader("slow"), fast.finished)
+        server.stages = {"fast": fast, "slow": slow}
+
+        messages = [message("slow", b"1"), message("slow", b"2")]
+        messages += [message("fast", b"a"), message("fast", b"b"), message("fast")]
+        messages += [message("slow")]
+        await asyncio.wait_for(orchestrate(server, messages), 5)
+
+        self.assertEqual([b"a", b"b"], fast.received)
+        self.assertEqual([b"1", b"2"], slow.received)
+
+    async def test_unknown_channel(self):
+        server = Server(Config.from_env({"RDFC_CHANNEL_CAPACITY": "1"}))
+        consumer = Consumer(server.create_reader("channel"))
+        server.stages = {"consumer": consumer}
+
+        # Messages of channels without readers are dropped, and do not hold
+        # back the others.
+        messages = [message("unknown", b"x") for _ in range(100)]
+        messages += [message("channel", b"a"), message("channel")]
+        await asyncio.wait_for(orchestrate(server, messages), 5)
+        self.assertEqual([b"a"], consumer.received)
+
+    async def test_delivery_failure(self):
+        config = Config.from_env({"RDFC_COMPRESSED_CHANNELS": '["channel"]'})
+        server = Server(config)
+        consumer = Consumer(server.create_reader("channel"))
+        server.stages = {"consumer": consumer}
+
+        # A payload with an unknown compression header ends the execution,
+        # even though the consumer still waits for messages.
+        messages = [message("channel", b"\xfegarbage")]
+        with self.assertRaises(CompressionException):
+            await asyncio.wait_for(orchestrate(server, messages), 5)
+
+
+class LoadTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(setattr, sys, "path", list(sys.path))
+        self.entrypoint = directory.name
+        os.mkdir(os.path.join(self.entrypoint, "src"))
+
+    def stage(self, module_name: str, index: int = 0) -> Stage:
+        """A stage of the slow processor, in a module of the given name."""
+        path = os.path.join(self.entrypoint, "src", f"{module_name}.py")
+        with open(path, "w") as file:
+            file.write(SLOW_CONSTRUCTOR)
+
+        stage = Stage()
+        stage.uri = f"stage:{module_name}:{index}"
+        stage.processor.uri = f"processor:{module_name}"
+        stage.processor.entrypoint = f"file://{self.entrypoint}"
+        stage.processor.metadata["module_name"] = module_name
+        stage.processor.metadata["class_name"] = "Slow"
+        stage.arguments["incoming"].literal.reader.uri = f"channel:{index}"
+        return stage
+
+    async def load(self, parallel_loading: bool, module_name: str) -> float:
+        """Load two stages at once, and return the seconds it took."""
+        env = {"RDFC_PARALLEL_LOADING": str(parallel_loading).lower()}
+        server = Server(Config.from_env(env))
+        stages = [self.stage(module_name, index) for index in range(2)]
+
+        start = time.perf_counter()
+        await asyncio.gather(*[server.load(stage, Context()) for stage in stages])
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual({stage.uri for stage in stages}, set(server.stages))
+        return elapsed
+
+    async def test_sequential_loading(self):
+        self.assertGreaterEqual(await self.load(False, "slow_sequential"), 0.6)
+
+    async def test_parallel_loading(self):
+        # The constructors overlap on the thread pool.
+        self.assertLess(await self.load(True, "slow_parallel"), 0.55)
+
+    async def test_parallel_channels(self):
+        env = {"RDFC_PARALLEL_LOADING": "true"}
+        server = Server(Config.from_env(env))
+        threads = []
+        create_reader = server.create_reader
+
+        def record(uri: str) -> rdfc.Reader:
+            threads.append(threading.current_thread())
+            return create_reader(uri)
+
+        # Constructors on the thread pool create their channels on the event loop.
+        server.create_reader = record
+        await server.load(self.stage("slow_channels"), Context())
+        self.assertEqual([threading.current_thread()], threads)
+        self.assertIn("channel:0", server.readers)
+
+    async def test_startup_timings(self):
+        server = Server(Config.from_env({}))
+        context = Context()
+        await server.load(self.stage("slow_timings"), context)
+
+        # Every phase of the startup is returned as trailing metadata.
+        timings = dict(context.trailing_metadata)
+        self.assertEqual(
+            {
+                "rdfc-startup-path-ms",
+                "rdfc-startup-import-ms",
+                "rdfc-startup-constructor-ms",
+            },
+            set(timings),
+        )
+        self.assertGreaterEqual(float(timings["rdfc-startup-constructor-ms"]), 300)
+        self.assertIsNone(context.code)
+
+    async def test_missing_class_name(self):
+        server = Server(Config.from_env({}))
+        stage = self.stage("slow_missing")
+        del stage.processor.metadata["class_name"]
+
+        context = Context()
+        await server.load(stage, context)
+        self.assertEqual(grpc.StatusCode.INVALID_ARGUMENT, context.code)
+        self.assertEqual(dict(), server.stages)
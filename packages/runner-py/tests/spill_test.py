@@ -0,0 +1,49 @@
+import asyncio
+import tempfile
+import unittest
+
+import rdfc.util
+
+
+class SpillTest(unittest.IsolatedAsyncioTestCase):
+    async def test_order(self):
+        with tempfile.TemporaryDirectory() as directory:
+            spill = rdfc.util.Spill(directory, segment_size=64)
+            channel = rdfc.util.Channel("channel", capacity=2, spill=spill)
+
+            # Writes beyond the capacity never suspend, but go to disk.
+            messages = [b"message %d" % i for i in range(20)]
+            for message in messages:
+                await asyncio.wait_for(channel.write(message), 1)
+            await channel.close()
+
+            usage = channel.usage()
+            self.assertEqual(2, usage.items)
+            self.assertEqual(19, usage.spilled)
+            self.assertGreater(usage.disk_bytes, 0)
+            self.assertGreater(len(channel.queue.segments), 1)
+
+            self.assertEqual(messages, [message async for message in channel])
+
+            # Every segment is removed once it is consumed.
+            usage = channel.usage()
+            self.assertEqual(
+                (0, 0, 19), (usage.spilled, usage.disk_bytes, usage.spilled_total)
+            )
+            self.assertEqual(0, len(channel.queue.segments))
+
+    async def test_limit(self):
+        spill = rdfc.util.Spill(segment_size=1024, limit=1)
+        queue = rdfc.util.SpillQueue(1, 0, len, spill)
+        await queue.put(b"a")
+        await queue.put(b"b")
+
+        # Producers are suspended once the limit on disk is reached.
+        write = asyncio.create_task(queue.put(b"c"))
+        await asyncio.sleep(0)
+        self.assertFalse(write.done())
+
+        self.assertEqual(b"a", await queue.get())
+        await write
+        self.assertEqual([b"b", b"c"], [await queue.get(), await queue.get()])
+        self.assertTrue(queue.empty())
@@ -0,0 +1,74 @@
+import asyncio
+import unittest
+
+import rdfc
+import rdfc.util
+
+
+class Uppercase(rdfc.SyncProcessor):
+    def __init__(self, args: rdfc.Arguments):
+        self.incoming = args.reader("incoming")
+        self.outgoing = args.writer("outgoing")
+
+    def run(self):
+        outgoing = self.sync_writer(self.outgoing)
+
+        for message in self.sync_reader(self.incoming):
+            outgoing.write(message.upper())
+
+        outgoing.close()
+
+
+class SyncProcessorTest(unittest.IsolatedAsyncioTestCase):
+    async def test_success(self):
+        incoming = rdfc.util.Channel("incoming")
+        outgoing = rdfc.util.Channel("outgoing")
+        args = {"incoming": incoming, "outgoing": outgoing}
+
+        processor = Uppercase(rdfc.util.DictionaryArguments(args))
+
+        await incoming.write(b"hello")
+        await incoming.write(b"world")
+        await incoming.close()
+        await processor.exec()
+
+        data = [message async for message in outgoing]
+        self.assertEqual([b"HELLO", b"WORLD"], data)
+
+    async def test_chained(self):
+        # Both stages block for their lifetime, and the second one has to read
+        # before the first one may write again.
+        rdfc.runtime.ThreadPool.configure(1)
+        self.addCleanup(rdfc.runtime.ThreadPool.configure, None)
+
+        incoming = rdfc.util.Channel("incoming", 1)
+        middle = rdfc.util.Channel("middle", 1)
+        outgoing = rdfc.util.Channel("outgoing")
+        first = Uppercase(
+            rdfc.util.DictionaryArguments({"incoming": incoming, "outgoing": middle})
+        )
+        second = Uppercase(
+            rdfc.util.DictionaryArguments({"incoming": middle, "outgoing": outgoing})
+        )
+
+        async def produce():
+            for message in [b"a", b"b", b"c", b"d"]:
+                await incoming.write(message)
+            await incoming.close()
+
+        await asyncio.wait_for(
+            asyncio.gather(produce(), first.exec(), second.exec()), 5
+        )
+        data = [message async for message in outgoing]
+        self.assertEqual([b"A", b"B", b"C", b"D"], data)
+
+    async def test_offload(self):
+        result = await rdfc.runtime.ThreadPool.run(sum, [1, 2, 3])
+        self.assertEqual(6, result)
+
+    async def test_event_loop(self):
+        channel = rdfc.util.Channel("channel")
+        reader = rdfc.runtime.SyncReader(channel, None)
+
+        with self.assertRaises(RuntimeError):
+            next(reader)
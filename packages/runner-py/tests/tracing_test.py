@@ -0,0 +1,42 @@
+import json
+import os
+import tempfile
+import unittest
+
+from rdfc.grpc.tracing import TracedChannel, Tracer
+
+
+class TracingTest(unittest.IsolatedAsyncioTestCase):
+    def test_sampling(self):
+        never = Tracer(0, os.devnull)
+        always = Tracer(1, os.devnull)
+
+        self.assertIsNone(never.trace_id("channel", b"hello"))
+        self.assertIsNotNone(always.trace_id("channel", b"hello"))
+
+        # The identifier is derived from the channel and the contents.
+        trace_id = always.trace_id("channel", b"hello")
+        self.assertEqual(Tracer(1, os.devnull).trace_id("channel", b"hello"), trace_id)
+        self.assertNotEqual(always.trace_id("other", b"hello"), trace_id)
+
+    async def test_channel(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces.jsonl")
+            tracer = Tracer(1, path)
+            channel = TracedChannel("channel", tracer)
+
+            await channel.write(b"hello")
+            await channel.write(b"world")
+            await channel.close()
+            self.assertEqual(
+                [message async for message in channel], [b"hello", b"world"]
+            )
+            tracer.close()
+
+            with open(path) as file:
+                spans = [json.loads(line) for line in file]
+
+        names = [span["name"] for span in spans]
+        self.assertEqual(names, ["queue", "process", "queue", "process"])
+        self.assertEqual(spans[0]["traceId"], spans[1]["traceId"])
+        self.assertNotEqual(spans[0]["traceId"], spans[2]["traceId"])
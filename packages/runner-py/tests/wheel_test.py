@@ -0,0 +1,144 @@
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+
+import rdfc.util
+
+PROCESSOR = b"""
+import rdfc
+from .util import shout
+
+
+class Shout(rdfc.Processor):
+    def __init__(self, args):
+        self.incoming = args.reader("incoming")
+        self.outgoing = args.writer("outgoing")
+
+    async def exec(self):
+        async for message in self.incoming:
+            await self.outgoing.write(shout(message))
+        await self.outgoing.close()
+"""
+
+UTIL = b"""
+def shout(message):
+    return message.upper()
+"""
+
+
+class WheelTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(rdfc.util.Wheel.constructors.clear)
+        self.addCleanup(setattr, rdfc.util.Wheel, "mapped", False)
+        self.addCleanup(setattr, sys, "path", list(sys.path))
+        self.addCleanup(setattr, sys, "meta_path", list(sys.meta_path))
+
+    def build(self, package: str) -> str:
+        path = os.path.join(self.directory.name, f"{package}-0.1.0-py3-none-any.whl")
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr(f"{package}/__init__.py", PROCESSOR)
+            archive.writestr(f"{package}/util.py", UTIL)
+        return path
+
+    async def run_processor(self, constructor):
+        incoming = rdfc.util.Channel("incoming")
+        outgoing = rdfc.util.Channel("outgoing")
+        args = {"incoming": incoming, "outgoing": outgoing}
+
+        processor = constructor(rdfc.util.DictionaryArguments(args))
+        await incoming.write(b"hello")
+        await incoming.close()
+        await processor.exec()
+
+        self.assertEqual(await anext(outgoing), b"HELLO")
+
+    async def test_zipimport(self):
+        path = self.build("shout_zip")
+        constructor = rdfc.util.Wheel.load(path, "shout_zip", "Shout")
+
+        self.assertIn(path, sys.path)
+        self.assertTrue(sys.modules["shout_zip"].__file__.startswith(path))
+        self.assertIs(rdfc.util.Wheel.load(path, "shout_zip", "Shout"), constructor)
+        await self.run_processor(constructor)
+
+    async def test_mapped(self):
+        rdfc.util.Wheel.mapped = True
+        path = self.build("shout_mapped")
+        constructor = rdfc.util.Wheel.load(path, "shout_mapped", "Shout")
+
+        self.assertNotIn(path, sys.path)
+        self.assertTrue(sys.modules["shout_mapped"].__file__.startswith(path))
+        await self.run_processor(constructor)
+
+    def test_extract(self):
+        path = self.build("shout_extract")
+        destination = rdfc.util.Wheel.extract(path)
+        marker = os.path.join(destination, "shout_extract", "marker")
+        open(marker, "w").close()
+
+        # An unchanged wheel is not extracted again.
+        self.assertEqual(rdfc.util.Wheel.extract(path), destination)
+        self.assertTrue(os.path.exists(marker))
+
+        # A changed wheel is.
+        with zipfile.ZipFile(path, "a") as archive:
+            archive.writestr("shout_extract/extra.py", b"")
+        rdfc.util.Wheel.extract(path)
+        self.assertFalse(os.path.exists(marker))
+        self.assertFalse(rdfc.util.Wheel.native(path))
+
+    def test_extract_interrupted(self):
+        path = self.build("shout_interrupted")
+        destination = rdfc.util.Wheel.extract(path)
+
+        # Modules are compiled ahead of the first import.
+        cache = os.path.join(destination, "shout_interrupted", "__pycache__")
+        self.assertTrue(any(name.startswith("util.") for name in os.listdir(cache)))
+
+        # An extraction without its digest did not finish, and is redone.
+        marker = os.path.join(destination, "shout_interrupted", "marker")
+        open(marker, "w").close()
+        os.remove(os.path.join(destination, rdfc.util.wheel.DIGEST_FILE))
+        self.assertEqual(rdfc.util.Wheel.extract(path), destination)
+        self.assertFalse(os.path.exists(marker))
+
+    def test_native(self):
+        path = self.build("shout_native")
+        with zipfile.ZipFile(path, "a") as archive:
+            archive.writestr("shout_native/native.so", b"")
+        self.assertTrue(rdfc.util.Wheel.native(path))
+
+        # Wheels with native files are imported from an extraction.
+        rdfc.util.Wheel.load(path, "shout_native", "Shout")
+        self.assertNotIn(path, sys.path)
+        self.assertIn(path.removesuffix(".whl"), sys.path)
+
+    async def test_memoized(self):
+        entrypoint = os.path.join(self.directory.name, "processor")
+        os.makedirs(os.path.join(entrypoint, "src", "shout_source"))
+        for name, source in [("__init__.py", PROCESSOR), ("util.py", UTIL)]:
+            with open(
+                os.path.join(entrypoint, "src", "shout_source", name), "wb"
+            ) as file:
+                file.write(source)
+
+        timings = dict()
+        constructor = rdfc.util.Wheel.load(
+            f"file://{entrypoint}", "shout_source", "Shout", timings
+        )
+        self.assertEqual({"path", "import"}, set(timings))
+
+        # Later stages of the same processor neither touch the path nor import.
+        path = list(sys.path)
+        timings = dict()
+        again = rdfc.util.Wheel.load(
+            f"file://{entrypoint}/", "shout_source", "Shout", timings
+        )
+        self.assertIs(constructor, again)
+        self.assertEqual(dict(), timings)
+        self.assertEqual(path, sys.path)
+        await self.run_processor(constructor)
@@ -0,0 +1,52 @@
+import rdflib
+from rdflib.namespace import SH
+
+
+def nodes(graph: rdflib.Graph) -> set[rdflib.term.Node]:
+    """All subjects and objects of a graph, including literals, which may be focus nodes too."""
+    result = set(graph.subjects())
+    result.update(graph.objects())
+    return result
+
+
+# Shapes which reach nodes over triples of which they are the object, or which
+# query the data graph as a whole. The focus or value nodes of these shapes
+# depend on triples of other messages which merely mention the same node, such
+# as a shared object or literal.
+GLOBAL_PREDICATES = [SH.inversePath, SH.targetObjectsOf, SH.target, SH.sparql]
+
+
+def batchable(shapes: rdflib.Graph) -> bool:
+    """Whether messages may be validated as a union against the given shapes."""
+    return not any((None, p, None) in shapes for p in GLOBAL_PREDICATES)
+
+
+def independent(graphs: list[rdflib.Graph]) -> list[bool]:
+    """
+    Whether each graph can be validated as part of a union with the others,
+    which is the case if none of its nodes are described by another graph.
+    Otherwise, the triples of the other graph may influence its results.
+    """
+    node_sets = [nodes(graph) for graph in graphs]
+    subjects = set()
+    for graph in graphs:
+        subjects.update(graph.subjects())
+
+    # Graphs in which each subject node occurs.
+    occurrences: dict[rdflib.term.Node, list[int]] = dict()
+    for index, node_set in enumerate(node_sets):
+        for node in node_set & subjects:
+            occurrences.setdefault(node, []).append(index)
+
+    result = [True] * len(graphs)
+    for indices in occurrences.values():
+        if len(indices) > 1:
+            for index in indices:
+                result[index] = False
+
+    return result
+
+
+def focus_nodes(report: rdflib.Graph) -> set[rdflib.term.Node]:
+    """The focus nodes of all results in a validation report."""
+    return set(report.objects(None, SH.focusNode))
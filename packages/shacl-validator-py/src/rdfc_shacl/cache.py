@@ -0,0 +1,59 @@
+import collections
+import hashlib
+import time
+
+import rdfc
+
+
+class ResultCache:
+    """
+    A bounded LRU cache of validation results, keyed by a hash of the message
+    contents. Entries optionally expire after `ttl` seconds.
+    """
+
+    # Cached verdicts and report texts, with their time of insertion.
+    entries: collections.OrderedDict[bytes, tuple[bool, str, float]]
+
+    # Maximum number of entries.
+    capacity: int
+
+    # Lifetime of an entry in seconds, zero if entries never expire.
+    ttl: float
+
+    # Lookup statistics.
+    hits: int
+    misses: int
+
+    def __init__(self, capacity: int, ttl: float = 0):
+        self.entries = collections.OrderedDict()
+        self.capacity = capacity
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(message: rdfc.Buffer) -> bytes:
+        return hashlib.blake2b(message, digest_size=16).digest()
+
+    def get(self, key: bytes) -> tuple[bool, str] | None:
+        entry = self.entries.get(key)
+
+        if entry is not None and self.ttl > 0:
+            if time.monotonic() - entry[2] > self.ttl:
+                del self.entries[key]
+                entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0], entry[1]
+
+    def put(self, key: bytes, conforms: bool, text: str) -> None:
+        self.entries[key] = (conforms, text, time.monotonic())
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
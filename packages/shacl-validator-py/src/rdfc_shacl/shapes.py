@@ -0,0 +1,71 @@
+from typing import Any
+
+import pyshacl
+import rdflib
+from pyshacl.shapes_graph import ShapesGraph
+
+# Recent versions of pyshacl wrap data graphs in their own abstraction.
+try:
+    from pyshacl.graph_abstraction import DataGraph
+
+    def data_graph(graph: rdflib.Graph) -> Any:
+        return DataGraph.from_rdflib(graph)
+
+except ImportError:
+
+    def data_graph(graph: rdflib.Graph) -> Any:
+        return graph
+
+
+class CompiledShapes:
+    """
+    A SHACL shapes graph of which the shapes are harvested only once, and then
+    applied to any number of data graphs. Calling `pyshacl.validate` would
+    rebuild the internal shape structures for every data graph instead.
+    """
+
+    # The wrapped shapes graph, including its cache of harvested shapes.
+    shapes_graph: ShapesGraph
+
+    # Validator options, see `pyshacl.Validator`.
+    options: dict[str, Any]
+
+    def __init__(
+        self,
+        graph: rdflib.Graph,
+        inference: str = "none",
+        use_shapes: list[str] | None = None,
+        max_validation_depth: int = 15,
+    ):
+        self.shapes_graph = ShapesGraph(graph)
+        self.options = {
+            "inference": inference,
+            "use_shapes": use_shapes or None,
+            "max_validation_depth": max_validation_depth,
+            # Every data graph is parsed for a single validation, so there is
+            # no need to keep it intact.
+            "inplace": True,
+        }
+
+        # Harvest the shapes up front, rather than during the first validation.
+        if use_shapes:
+            uris = [rdflib.URIRef(uri) for uri in use_shapes]
+            self.shapes_graph.shapes_from_uris(uris)
+        else:
+            _ = self.shapes_graph.shapes
+
+    def validate(
+        self, data: rdflib.Graph, shared: bool = False
+    ) -> tuple[bool, rdflib.Graph, str]:
+        """
+        Validate a data graph. Inference adds to the data graph, so a graph
+        which is `shared` with other stages is copied first in that case.
+        """
+        options = dict(self.options)
+        if shared and options["inference"] != "none":
+            options["inplace"] = False
+        validator = pyshacl.Validator(
+            data_graph(data), shacl_graph=self.shapes_graph.graph, options=options
+        )
+        validator.shacl_graph = self.shapes_graph
+        return validator.run()
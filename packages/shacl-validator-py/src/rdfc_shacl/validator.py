@@ -1,6 +1,38 @@
-import pyshacl
+import asyncio
 import rdfc
+import rdfc.util
 import rdflib
+import typing
+
+from . import batch
+from .cache import ResultCache
+from .shapes import CompiledShapes
+
+T = typing.TypeVar("T")
+
+
+def optional(getter: typing.Callable[[str], T], key: str, default: T) -> T:
+    """Retrieve an argument which may be omitted."""
+    try:
+        return getter(key)
+    except Exception:
+        return default
+
+
+# Messages are either serialized, as Turtle unless tagged with another content
+# type, or graphs of stages in the same runner which are passed on as is.
+Message = rdfc.Buffer | rdflib.Graph
+
+
+def parse(message: Message) -> rdflib.Graph:
+    """Parse a message with the codec of its content type."""
+    if isinstance(message, rdflib.Graph):
+        return message
+    return rdfc.util.decode_graph(message)
+
+
+def turtle(graph: rdflib.Graph) -> bytes:
+    return graph.serialize(format="turtle", encoding="utf-8")
 
 
 class SHACLValidator(rdfc.Processor):
@@ -9,8 +41,20 @@ class SHACLValidator(rdfc.Processor):
     report: rdfc.Writer
     outgoing: rdfc.Writer
 
-    # RDF graph containing the SHACL shapes.
-    shapes: rdflib.Graph
+    # The SHACL shapes, compiled for repeated validation.
+    shapes: CompiledShapes
+
+    # Whether the shapes allow messages to be validated as a union, see
+    # `batch.batchable`.
+    batchable: bool
+
+    # Results of previously validated messages, if enabled.
+    cache: ResultCache | None
+
+    # Maximum number of messages validated at once, and the time in
+    # milliseconds to wait for a batch to fill up.
+    batch_size: int
+    batch_timeout: int
 
     def __init__(self, args: rdfc.Arguments):
         # Assign arguments.
@@ -20,31 +64,159 @@ class SHACLValidator(rdfc.Processor):
 
         # Create new graph.
         shapes = args.string("shapes")
-        self.shapes = rdflib.Graph()
-        self.shapes.parse(shapes, format="text/turtle")
+        graph = rdflib.Graph()
+        graph.parse(shapes, format="text/turtle")
 
-    async def exec(self):
-        print("SHACLValidator: Starting execution", flush=True)
+        # Compile the shapes once, with an optional inference mode and subset
+        # of shapes given as whitespace separated URIs.
+        use_shapes = optional(args.string, "use_shapes", "").split()
+        self.shapes = CompiledShapes(
+            graph,
+            inference=optional(args.string, "inference", "none"),
+            use_shapes=use_shapes,
+            max_validation_depth=optional(args.int, "max_validation_depth", 15),
+        )
+        self.batchable = batch.batchable(graph)
 
-        async for message in self.incoming:
-            # Create an RDF graph for the incoming data.
-            graph = rdflib.Graph()
-            graph.parse(data=message, format="text/turtle")
+        # Byte-identical messages are only validated once if a cache size is given.
+        cache_size = optional(args.int, "cache_size", 0)
+        cache_ttl = optional(args.double, "cache_ttl", 0.0)
+        self.cache = ResultCache(cache_size, cache_ttl) if cache_size > 0 else None
 
-            # Parse using the SHACL validator.
-            report: tuple[bool, rdflib.Graph, str] = pyshacl.validate(
-                graph, shacl_graph=self.shapes
-            )
-            conforms, results_graph, results_text = report
+        # Small messages may be validated in batches.
+        self.batch_size = optional(args.int, "batch_size", 1)
+        self.batch_timeout = optional(args.int, "batch_timeout", 10)
+
+    def validate_graph(
+        self, graph: rdflib.Graph, shared: bool = False
+    ) -> tuple[bool, str]:
+        # Parse using the SHACL validator.
+        report: tuple[bool, rdflib.Graph, str] = self.shapes.validate(graph, shared)
+        conforms, results_graph, results_text = report
+        return conforms, results_text
+
+    def validate(self, message: Message) -> tuple[bool, str]:
+        # Create an RDF graph for the incoming data.
+        return self.validate_graph(parse(message), isinstance(message, rdflib.Graph))
+
+    def validate_many(self, messages: list[Message]) -> list[tuple[bool, str]]:
+        """
+        Validate multiple messages as a single union graph. Messages which
+        describe nodes of other messages, or which are (possibly) involved in a
+        violation, are validated separately, such that each message receives
+        exactly the verdict and report of an individual validation. If a
+        violation cannot be attributed to any message, such as one of a target
+        node which none of them contain, every message is validated separately,
+        as are all messages if the shapes are not `batchable`.
+        """
+        if len(messages) == 1 or not self.batchable:
+            return [self.validate(message) for message in messages]
 
-            # Pipe into `outgoing` if it conforms, otherwise, write the report to the `report` channel.
-            if conforms:
-                await self.outgoing.write(message)
+        graphs = [parse(message) for message in messages]
+
+        flags = batch.independent(graphs)
+        node_sets = [batch.nodes(graph) for graph in graphs]
+        union = rdflib.Graph()
+        covered = set()
+        for graph, node_set, flag in zip(graphs, node_sets, flags):
+            if flag:
+                union += graph
+                covered |= node_set
+
+        conforms, report, _ = self.shapes.validate(union)
+        focus = set() if conforms else batch.focus_nodes(report)
+        if not focus <= covered:
+            flags = [False] * len(graphs)
+
+        results = []
+        for message, graph, node_set, flag in zip(messages, graphs, node_sets, flags):
+            if flag and focus.isdisjoint(node_set):
+                results.append((True, ""))
             else:
-                await self.report.write(results_text.encode())
+                shared = isinstance(message, rdflib.Graph)
+                results.append(self.validate_graph(graph, shared))
+
+        return results
+
+    def validate_cached(self, messages: list[Message]) -> list[tuple[bool, str]]:
+        if self.cache is None:
+            return self.validate_many(messages)
+
+        # Graphs are not serialized just to look them up.
+        keys = [
+            None if isinstance(message, rdflib.Graph) else ResultCache.key(message)
+            for message in messages
+        ]
+        results = [None if key is None else self.cache.get(key) for key in keys]
+
+        # Only validate the messages which were not seen before.
+        missing = [i for (i, result) in enumerate(results) if result is None]
+        if missing:
+            validated = self.validate_many([messages[i] for i in missing])
+            for i, result in zip(missing, validated):
+                if keys[i] is not None:
+                    self.cache.put(keys[i], *result)
+                results[i] = result
+
+        return results
+
+    async def batches(self) -> typing.AsyncIterator[list[Message]]:
+        """Group incoming messages by at most `batch_size` or `batch_timeout` milliseconds."""
+        if self.batch_size <= 1:
+            async for message in self.incoming.objects():
+                yield [message]
+            return
+
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                messages = [await self.incoming.read_object()]
+            except StopAsyncIteration:
+                return
+
+            deadline = loop.time() + self.batch_timeout / 1000
+            while len(messages) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    messages.append(
+                        await asyncio.wait_for(self.incoming.read_object(), timeout)
+                    )
+                except TimeoutError:
+                    break
+                except StopAsyncIteration:
+                    yield messages
+                    return
+
+            yield messages
+
+    async def exec(self):
+        print("SHACLValidator: Starting execution", flush=True)
+
+        async for messages in self.batches():
+            results = self.validate_cached(messages)
+
+            for message, (conforms, results_text) in zip(messages, results):
+                # Pipe into `outgoing` if it conforms, otherwise, write the report to the `report` channel.
+                if conforms:
+                    if isinstance(message, rdflib.Graph):
+                        await self.outgoing.write_object(
+                            rdfc.ObjectMessage(message, turtle)
+                        )
+                    else:
+                        await self.outgoing.write(message)
+                else:
+                    await self.report.write(results_text.encode())
 
         # Close outgoing channels after incoming closes.
         await self.outgoing.close()
         await self.report.close()
 
+        if self.cache is not None:
+            print(
+                f"SHACLValidator: Cache hits: {self.cache.hits}, misses: {self.cache.misses}",
+                flush=True,
+            )
+
         print("SHACLValidator: Execution finished", flush=True)
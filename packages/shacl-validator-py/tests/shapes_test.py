@@ -0,0 +1,88 @@
+import os
+import unittest
+from unittest import mock
+
+import pyshacl
+import rdflib
+from pyshacl.shapes_graph import ShapesGraph
+
+from src.rdfc_shacl.shapes import CompiledShapes
+
+SHAPES = """
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix ex: <http://example.org/> .
+
+ex:NameShape a sh:NodeShape ;
+  sh:targetClass ex:Person ;
+  sh:property [ sh:path ex:name ; sh:minCount 1 ] .
+
+ex:AgeShape a sh:NodeShape ;
+  sh:targetClass ex:Person ;
+  sh:property [ sh:path ex:age ; sh:minCount 1 ] .
+"""
+
+# A person with a name, but without an age.
+DATA = """
+@prefix ex: <http://example.org/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+
+ex:Student rdfs:subClassOf ex:Person .
+ex:alice a ex:Person ; ex:name "Alice" .
+"""
+
+
+def resource(name: str) -> rdflib.Graph:
+    path = os.path.join(os.path.dirname(__file__), "resources", name)
+    return rdflib.Graph().parse(path, format="text/turtle")
+
+
+class CompiledShapesTest(unittest.IsolatedAsyncioTestCase):
+    async def test_reuse(self):
+        harvest = mock.patch.object(
+            ShapesGraph,
+            "_build_node_shape_cache",
+            autospec=True,
+            side_effect=ShapesGraph._build_node_shape_cache,
+        )
+        with harvest as build:
+            shapes = CompiledShapes(resource("shapes.ttl"))
+            results = [
+                shapes.validate(resource(name))[0]
+                for name in ["valid.ttl", "invalid.ttl", "valid.ttl"]
+            ]
+
+        # The shapes are harvested once, up front, for every validation.
+        self.assertEqual(1, build.call_count)
+
+        # The verdicts are those of a regular validation.
+        expected = [
+            pyshacl.validate(resource(name), shacl_graph=resource("shapes.ttl"))[0]
+            for name in ["valid.ttl", "invalid.ttl", "valid.ttl"]
+        ]
+        self.assertEqual(expected, results)
+        self.assertEqual([True, False, True], results)
+
+    async def test_use_shapes(self):
+        graph = rdflib.Graph().parse(data=SHAPES, format="turtle")
+        data = rdflib.Graph().parse(data=DATA, format="turtle")
+
+        # Only the selected shapes apply.
+        names = CompiledShapes(graph, use_shapes=["http://example.org/NameShape"])
+        ages = CompiledShapes(graph, use_shapes=["http://example.org/AgeShape"])
+        self.assertTrue(names.validate(data)[0])
+        self.assertFalse(ages.validate(data)[0])
+
+    async def test_shared(self):
+        shapes = CompiledShapes(
+            rdflib.Graph().parse(data=SHAPES, format="turtle"), inference="rdfs"
+        )
+        data = rdflib.Graph().parse(data=DATA, format="turtle")
+        size = len(data)
+
+        # Inferred triples are not added to graphs which other stages share.
+        shapes.validate(data, shared=True)
+        self.assertEqual(size, len(data))
+
+        # Other graphs are validated in place.
+        shapes.validate(data)
+        self.assertGreater(len(data), size)
@@ -1,9 +1,39 @@
 import os
+import tempfile
 import unittest
 import rdfc
 import rdfc.util
+import rdflib
 
 from src.rdfc_shacl import SHACLValidator
+from src.rdfc_shacl.validator import turtle
+
+
+async def validate(
+    shapes: str, messages: list[bytes], **options
+) -> tuple[list[bytes], list[bytes]]:
+    """Validate messages against the shapes at a path, see `SHACLValidator`."""
+    incoming = rdfc.util.Channel("incoming")
+    report = rdfc.util.Channel("report")
+    outgoing = rdfc.util.Channel("outgoing")
+
+    args = {
+        "incoming": incoming,
+        "report": report,
+        "outgoing": outgoing,
+        "shapes": shapes,
+        **options,
+    }
+    processor = SHACLValidator(rdfc.util.DictionaryArguments(args))
+
+    for message in messages:
+        await incoming.write(message)
+    await incoming.close()
+    await processor.exec()
+
+    valid = [message async for message in outgoing]
+    invalid = [message async for message in report]
+    return valid, invalid
 
 
 class ValidatorTest(unittest.IsolatedAsyncioTestCase):
@@ -57,3 +87,210 @@ class ValidatorTest(unittest.IsolatedAsyncioTestCase):
 
         # Check contents.
         self.assertTrue(b"Conforms: False" in data[0])
+
+    async def test_cache(self):
+        # Create channels.
+        incoming = rdfc.util.Channel("incoming")
+        report = rdfc.util.Channel("report")
+        outgoing = rdfc.util.Channel("outgoing")
+
+        valid_path = os.path.join(os.path.dirname(__file__), "resources/valid.ttl")
+        invalid_path = os.path.join(os.path.dirname(__file__), "resources/invalid.ttl")
+        shapes_path = os.path.join(os.path.dirname(__file__), "resources/shapes.ttl")
+
+        with open(valid_path, "rb") as f:
+            valid = f.read()
+
+        with open(invalid_path, "rb") as f:
+            invalid = f.read()
+
+        # Create argument dictionary with a result cache.
+        args = {
+            "incoming": incoming,
+            "report": report,
+            "outgoing": outgoing,
+            "shapes": shapes_path,
+            "cache_size": 8,
+        }
+
+        # Initialize processor.
+        processor = SHACLValidator(rdfc.util.DictionaryArguments(args))
+
+        # Every message is written twice.
+        for message in [valid, invalid, valid, invalid]:
+            await incoming.write(message)
+        await incoming.close()
+
+        # Execute the pipeline.
+        await processor.exec()
+
+        # Repeated messages are answered from the cache.
+        self.assertEqual(2, processor.cache.hits)
+        self.assertEqual(2, processor.cache.misses)
+
+        # The output is identical to an uncached run.
+        data = [message async for message in outgoing]
+        self.assertEqual([valid, valid], data)
+
+        data = [message async for message in report]
+        self.assertEqual(2, len(data))
+        self.assertEqual(data[0], data[1])
+        self.assertTrue(b"Conforms: False" in data[0])
+
+    def shapes(self, text: str) -> str:
+        """Write shapes to a file, which is removed after the test."""
+        file = tempfile.NamedTemporaryFile("w", suffix=".ttl", delete=False)
+        self.addCleanup(os.remove, file.name)
+        with file:
+            file.write(text)
+        return file.name
+
+    async def test_batch(self):
+        shapes_path = os.path.join(os.path.dirname(__file__), "resources/shapes.ttl")
+
+        # Messages with distinct subjects, of which some do not conform.
+        template = """
+            @prefix test: <https://www.rdf-connect.com/test#> .
+            @prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+            <City{}> a test:Coordinate ;
+              test:latitude "{}"^^xsd:float ;
+              test:longitude "3.73"^^xsd:float .
+        """
+        messages = [
+            template.format(i, 100 if i % 3 == 0 else 50).encode() for i in range(10)
+        ]
+
+        # Also include a message which describes the same node as another.
+        messages.append(template.format(1, 50).encode())
+
+        # Batched validation must yield exactly the same output.
+        single = await validate(shapes_path, messages, batch_size=1)
+        batched = await validate(shapes_path, messages, batch_size=4)
+        self.assertEqual(single, batched)
+        self.assertEqual(7, len(batched[0]))
+        self.assertEqual(4, len(batched[1]))
+
+    async def test_batch_focus(self):
+        # Shapes of which the focus nodes are literals, and a node which none
+        # of the messages contain.
+        code = """
+            @prefix sh: <http://www.w3.org/ns/shacl#> .
+            @prefix ex: <http://example.org/> .
+            @prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+            ex:CodeShape a sh:NodeShape ;
+              sh:targetObjectsOf ex:code ;
+              sh:datatype xsd:integer .
+        """
+        root = """
+            @prefix sh: <http://www.w3.org/ns/shacl#> .
+            @prefix ex: <http://example.org/> .
+            ex:RootShape a sh:NodeShape ;
+              sh:targetNode ex:root ;
+              sh:class ex:Root .
+        """
+        messages = [
+            b"<http://example.org/a> <http://example.org/code> 1 .",
+            b'<http://example.org/b> <http://example.org/code> "x" .',
+            b"<http://example.org/c> <http://example.org/code> 3 .",
+        ]
+
+        # The literal violates the code shape by itself.
+        path = self.shapes(code)
+        single = await validate(path, messages, batch_size=1)
+        self.assertEqual(2, len(single[0]))
+        self.assertEqual(1, len(single[1]))
+        self.assertEqual(single, await validate(path, messages, batch_size=4))
+
+        # The target node violates the root shape for every message.
+        path = self.shapes(code + root)
+        single = await validate(path, messages, batch_size=1)
+        self.assertEqual(0, len(single[0]))
+        self.assertEqual(3, len(single[1]))
+        self.assertEqual(single, await validate(path, messages, batch_size=4))
+
+    async def test_batch_shared_object(self):
+        # Every object of ex:p needs two subjects, which no single message has.
+        path = self.shapes("""
+            @prefix sh: <http://www.w3.org/ns/shacl#> .
+            @prefix ex: <http://example.org/> .
+            ex:ObjectShape a sh:NodeShape ;
+              sh:targetObjectsOf ex:p ;
+              sh:property [ sh:path [ sh:inversePath ex:p ] ; sh:minCount 2 ] .
+        """)
+        messages = [
+            b"<http://example.org/a1> <http://example.org/p> <http://example.org/X> .",
+            b"<http://example.org/b1> <http://example.org/p> <http://example.org/X> .",
+        ]
+
+        # The union of both messages would conform, but neither does on its own.
+        single = await validate(path, messages, batch_size=1)
+        self.assertEqual(([], 2), (single[0], len(single[1])))
+        self.assertEqual(single, await validate(path, messages, batch_size=4))
+
+    async def test_graphs(self):
+        incoming = rdfc.util.Channel("incoming")
+        report = rdfc.util.Channel("report")
+        outgoing = rdfc.util.Channel("outgoing")
+
+        valid_path = os.path.join(os.path.dirname(__file__), "resources/valid.ttl")
+        invalid_path = os.path.join(os.path.dirname(__file__), "resources/invalid.ttl")
+        shapes_path = os.path.join(os.path.dirname(__file__), "resources/shapes.ttl")
+
+        args = {
+            "incoming": incoming,
+            "report": report,
+            "outgoing": outgoing,
+            "shapes": shapes_path,
+        }
+        processor = SHACLValidator(rdfc.util.DictionaryArguments(args))
+
+        # Graphs of stages in the same process are validated without parsing.
+        valid = rdflib.Graph().parse(valid_path, format="text/turtle")
+        invalid = rdflib.Graph().parse(invalid_path, format="text/turtle")
+        for graph in [valid, invalid]:
+            await incoming.write_object(rdfc.ObjectMessage(graph, turtle))
+        await incoming.close()
+
+        await processor.exec()
+
+        # Conforming graphs are passed on as is.
+        self.assertIs(valid, await outgoing.read_object())
+        self.assertEqual([], [message async for message in outgoing])
+
+        data = [message async for message in report]
+        self.assertEqual(1, len(data))
+        self.assertTrue(b"Conforms: False" in data[0])
+
+    async def test_codecs(self):
+        incoming = rdfc.util.Channel("incoming")
+        report = rdfc.util.Channel("report")
+        outgoing = rdfc.util.Channel("outgoing")
+
+        valid_path = os.path.join(os.path.dirname(__file__), "resources/valid.ttl")
+        invalid_path = os.path.join(os.path.dirname(__file__), "resources/invalid.ttl")
+        shapes_path = os.path.join(os.path.dirname(__file__), "resources/shapes.ttl")
+
+        args = {
+            "incoming": incoming,
+            "report": report,
+            "outgoing": outgoing,
+            "shapes": shapes_path,
+        }
+        processor = SHACLValidator(rdfc.util.DictionaryArguments(args))
+
+        # Messages tagged with their content type are parsed accordingly.
+        valid = rdfc.util.encode_graph(rdflib.Graph().parse(valid_path))
+        invalid = rdfc.util.encode_graph(
+            rdflib.Graph().parse(invalid_path), "application/n-triples"
+        )
+        await incoming.write(valid)
+        await incoming.write(invalid)
+        await incoming.close()
+
+        await processor.exec()
+
+        self.assertEqual([valid], [message async for message in outgoing])
+
+        data = [message async for message in report]
+        self.assertEqual(1, len(data))
+        self.assertTrue(b"Conforms: False" in data[0])
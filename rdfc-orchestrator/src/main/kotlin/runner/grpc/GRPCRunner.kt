@@ -6,6 +6,8 @@ import io.grpc.ManagedChannel
 import java.io.File
 import kotlin.random.Random
 import kotlin.random.nextUInt
+import kotlinx.coroutines.async
+import kotlinx.coroutines.awaitAll
 import kotlinx.coroutines.channels.Channel
 import kotlinx.coroutines.flow.receiveAsFlow
 import kotlinx.coroutines.runBlocking
@@ -51,7 +53,12 @@ private suspend fun ManagedChannel.attemptConnection(attempts: Int) {
  */
 open class GRPCRunner(config: GRPCConfig, stages: Collection<IRStage>) : Runner(stages) {
   private val conn = config.connect()
-  private val grpc = RunnerCoroutineStub(conn)
+  private val grpc =
+      RunnerCoroutineStub(conn).let { stub ->
+        // Messages to the runner are compressed if it is configured to do the same.
+        if (System.getenv("RDFC_GRPC_COMPRESSION") == "gzip") stub.withCompression("gzip")
+        else stub
+      }
   private val messages = Channel<ChannelMessage>()
 
   init {
@@ -59,11 +66,8 @@ open class GRPCRunner(config: GRPCConfig, stages: Collection<IRStage>) : Runner(
     runBlocking {
       conn.attemptConnection(attempts = 5)
 
-      // Load all stages.
-      for (stage in stages) {
-        val payload = serialize(stage)
-        grpc.load(payload)
-      }
+      // Load all stages concurrently, so that a slow stage does not hold back the others.
+      stages.map { stage -> async { grpc.load(serialize(stage)) } }.awaitAll()
     }
   }
 